@@ -1,4 +1,9 @@
 """API routes package"""
 from .voice_detection import router
+from .realtime import router as realtime_router
+from .stats import router as stats_router
+
+router.include_router(realtime_router)
+router.include_router(stats_router)
 
 __all__ = ["router"]
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query, WebSocket, WebSocketDisconnect, status
+
+from ..models import StreamVerdictResponse, ErrorResponse, Language, StreamFormat
+from ..core import is_valid_api_key
+from ..services import (
+    AudioInbox,
+    RealtimeSession,
+    RealtimeStreamManager,
+    StreamMemoryExceeded,
+    get_realtime_manager
+)
+from ..services.realtime import REALTIME_UPDATE_SECONDS
+from .voice_detection import log_inference
+
+router = APIRouter()
+
+
+@router.websocket("/voice-detection/stream")
+async def detect_voice_stream(
+    websocket: WebSocket,
+    language: Language = Query(..., description="Language of the audio"),
+    audioFormat: StreamFormat = Query(StreamFormat.PCM_S16LE, description="Encoding of the binary frames"),
+    sampleRate: int = Query(16000, ge=8000, le=48000, description="Sample rate of PCM frames"),
+    channels: int = Query(1, ge=1, le=2, description="Channel count of PCM frames"),
+    updateSeconds: float = Query(REALTIME_UPDATE_SECONDS, ge=1.0, le=60.0, description="Audio seconds between verdicts"),
+    apiKey: Optional[str] = Query(None, description="API key, for clients that cannot set headers"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Real-time Voice Detection Stream
+
+    Send audio as binary WebSocket messages (raw little-endian 16-bit PCM, or an
+    MP3 stream split at any byte boundary) and a `{"type": "end"}` text message
+    when the call is over. Every `updateSeconds` of audio the server pushes the
+    verdict for everything received so far, and a final verdict after the end
+    message. Verdicts have the /voice-detection response fields plus
+    `audioSeconds` and `final`.
+
+    Authenticate with the x-api-key header or the `apiKey` query parameter.
+    """
+    if not is_valid_api_key(x_api_key or apiKey):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid or missing API key")
+        return
+
+    manager = get_realtime_manager()
+    if not manager.try_open():
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many open streams")
+        return
+
+    session = None
+    try:
+        session = RealtimeSession(audioFormat.value, sampleRate, channels, updateSeconds)
+        await websocket.accept()
+        await _run_stream(websocket, manager, session, language)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.close(session)
+
+
+async def _run_stream(
+    websocket: WebSocket,
+    manager: RealtimeStreamManager,
+    session: RealtimeSession,
+    language: Language
+):
+    """Analyse audio as it arrives and push verdicts until the client ends the stream"""
+    receiver = asyncio.create_task(_receive_audio(websocket, session.inbox))
+
+    try:
+        while True:
+            data = await session.inbox.take()
+            if data is None:
+                break
+            if await manager.feed(session, data):
+                await _send_verdict(websocket, manager, session, language)
+
+        # Re-raises a disconnect seen by the receiver
+        await receiver
+
+        if session.audio_seconds == 0:
+            await _close_with_error(websocket, status.WS_1007_INVALID_FRAME_PAYLOAD_DATA, "No audio received")
+            return
+
+        start_time = time.time()
+        classification, confidence_score = await _send_verdict(websocket, manager, session, language, final=True)
+        log_inference(language, classification, confidence_score, int((time.time() - start_time) * 1000))
+        await websocket.close()
+
+    except StreamMemoryExceeded as e:
+        await _close_with_error(websocket, status.WS_1009_MESSAGE_TOO_BIG, str(e))
+
+    except ValueError as e:
+        await _close_with_error(websocket, status.WS_1007_INVALID_FRAME_PAYLOAD_DATA, str(e))
+
+    finally:
+        receiver.cancel()
+
+
+async def _receive_audio(websocket: WebSocket, inbox: AudioInbox):
+    """Move binary frames into the inbox; waiting on a full inbox is the stream's backpressure"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+
+            if message.get("bytes") is not None:
+                if len(message["bytes"]) > inbox.max_bytes:
+                    raise StreamMemoryExceeded(f"Audio frames must be at most {inbox.max_bytes} bytes")
+                await inbox.put(message["bytes"])
+            elif message.get("text") is not None and _is_end_message(message["text"]):
+                return
+    finally:
+        await inbox.close()
+
+
+def _is_end_message(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+
+async def _send_verdict(
+    websocket: WebSocket,
+    manager: RealtimeStreamManager,
+    session: RealtimeSession,
+    language: Language,
+    final: bool = False
+):
+    """Classify the audio received so far and push the verdict to the client"""
+    classification, confidence_score, explanation = await manager.verdict(session, final=final)
+    verdict = StreamVerdictResponse(
+        language=language.value,
+        classification=classification,
+        confidenceScore=confidence_score,
+        explanation=explanation,
+        audioSeconds=round(session.audio_seconds, 3),
+        final=final
+    )
+    await websocket.send_text(verdict.model_dump_json())
+    return classification, confidence_score
+
+
+async def _close_with_error(websocket: WebSocket, code: int, message: str):
+    """Send an ErrorResponse and close the socket with the matching close code"""
+    try:
+        await websocket.send_text(ErrorResponse(message=message).model_dump_json())
+        await websocket.close(code=code, reason=message[:120])
+    except (WebSocketDisconnect, RuntimeError):
+        # The client went away first
+        pass
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+from ..models import ErrorResponse, Language
+from ..models.database import engine
+from ..core import verify_api_key
+from ..services import query_stats
+
+router = APIRouter()
+
+# Upper bound on the number of time buckets one request may ask for
+MAX_STATS_BUCKETS = 10000
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, as stored in the database"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get(
+    "/stats",
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"}
+    },
+    summary="Traffic statistics per language and time bucket"
+)
+async def get_stats(
+    start: Optional[datetime] = Query(None, description="Start of the range (ISO 8601, default: 24 hours ago)"),
+    end: Optional[datetime] = Query(None, description="End of the range (ISO 8601, default: now)"),
+    bucketMinutes: int = Query(60, ge=1, le=7 * 24 * 60, description="Width of a time bucket in minutes"),
+    language: Optional[Language] = Query(None, description="Only include this language"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Inference Statistics
+
+    Served from the per-minute rollup table, so the cost depends on the range
+    and not on the size of the raw log. Returns overall, per-language and
+    per-(bucket, language) request counts, AI/human split, confidence
+    histograms and p50/p95/p99 response times. Percentiles are interpolated
+    from a log-spaced histogram with 20% wide bins.
+    """
+    end = _to_utc(end) if end is not None else datetime.utcnow()
+    start = _to_utc(start) if start is not None else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if (end - start) / timedelta(minutes=bucketMinutes) > MAX_STATS_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {MAX_STATS_BUCKETS} buckets; use a larger bucketMinutes"
+        )
+
+    def run_query():
+        with engine.connect() as connection:
+            return query_stats(
+                connection, start, end, bucketMinutes, language.value if language is not None else None
+            )
+
+    return await run_in_threadpool(run_query)
@@ -1,20 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
 from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
 import time
 from pathlib import Path
 
-from app.models import (
+from ..models import (
     VoiceDetectionRequest,
     VoiceDetectionResponse,
+    SegmentDetectionResponse,
     ErrorResponse,
-    InferenceLog,
-    get_db
+    Language,
+    AudioFormat
 )
-from app.core import verify_api_key
-from app.services import decode_base64_audio, validate_audio_format
-from ml_engine import get_classifier
+from ..core import verify_api_key
+from ..services import (
+    decode_base64_audio,
+    validate_audio_format,
+    read_audio_stream,
+    analyse_segments,
+    classify_audio,
+    get_batcher,
+    get_extraction_pool,
+    get_realtime_manager,
+    get_admission_controller,
+    get_model_warmup,
+    get_inference_log_sink,
+    get_log_retention
+)
+from ml_engine import InsufficientSpeechError, get_classifier
 
 router = APIRouter()
 
@@ -25,15 +41,17 @@ router = APIRouter()
     responses={
         400: {"model": ErrorResponse, "description": "Bad Request"},
         401: {"model": ErrorResponse, "description": "Unauthorized"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"}
+        422: {"model": ErrorResponse, "description": "Not enough speech in the audio"},
+        429: {"model": ErrorResponse, "description": "Too Many Requests"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Server is saturated; retry after Retry-After seconds"}
     },
     summary="Detect AI-generated or human voice",
     description="Analyzes an MP3 audio file to determine if it's AI-generated or human voice"
 )
 async def detect_voice(
     request: VoiceDetectionRequest,
-    api_key: str = Depends(verify_api_key),
-    db: Session = Depends(get_db)
+    api_key: str = Depends(verify_api_key)
 ):
     """
     Voice Detection Endpoint
@@ -49,39 +67,163 @@ async def detect_voice(
     start_time = time.time()
     
     try:
-        # Decode base64 audio
-        audio_bytes = await run_in_threadpool(decode_base64_audio, request.audioBase64)
+        # Wait for a slot (or get a 429/503) before any CPU-bound work
+        async with get_admission_controller().admit(api_key):
+            # Decode base64 audio
+            audio_bytes = await run_in_threadpool(decode_base64_audio, request.audioBase64)
+            
+            # Validate audio format
+            await run_in_threadpool(validate_audio_format, audio_bytes, request.audioFormat.value)
+            
+            return await _detect_and_log(audio_bytes, request.language, start_time)
         
-        # Validate audio format
-        await run_in_threadpool(validate_audio_format, audio_bytes, request.audioFormat.value)
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
         
-        # Get classifier and perform inference
-        classifier = get_classifier()
-        classification, confidence_score, explanation = await run_in_threadpool(classifier.predict, audio_bytes)
+    except Exception as e:
+        # Handle unexpected errors
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.post(
+    "/voice-detection/upload",
+    response_model=VoiceDetectionResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        413: {"model": ErrorResponse, "description": "Payload Too Large"},
+        415: {"model": ErrorResponse, "description": "Unsupported Media Type"},
+        422: {"model": ErrorResponse, "description": "Not enough speech in the audio"},
+        429: {"model": ErrorResponse, "description": "Too Many Requests"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Server is saturated; retry after Retry-After seconds"}
+    },
+    summary="Detect AI-generated or human voice from a raw upload",
+    description="Same analysis as /voice-detection, but accepts the MP3 as a binary or multipart upload instead of base64"
+)
+async def detect_voice_upload(
+    request: Request,
+    language: Optional[Language] = Query(None, description="Language of the audio"),
+    audioFormat: AudioFormat = Query(AudioFormat.MP3, description="Format of the audio file"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Voice Detection Upload Endpoint
+    
+    Avoids the base64 overhead of /voice-detection. The body is streamed into a
+    single bounded buffer and handed to the feature extractor without copies.
+    
+    - **application/octet-stream** (or **audio/mpeg**): the body is the MP3 file;
+      `language` and `audioFormat` are query parameters
+    - **multipart/form-data**: the MP3 is the `file` part; `language` and
+      `audioFormat` may be form fields or query parameters
+    
+    Returns the same response as /voice-detection.
+    """
+    start_time = time.time()
+    content_type = request.headers.get("content-type", "")
+    
+    try:
+        # Admit before reading the body, so a saturated worker does not buffer uploads it will turn away
+        async with get_admission_controller().admit(api_key):
+            if content_type.startswith("multipart/form-data"):
+                audio_bytes, language, audioFormat = await _read_multipart_upload(request, language, audioFormat)
+            elif content_type.startswith(("application/octet-stream", "audio/")):
+                if language is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Missing language query parameter"
+                    )
+                content_length = request.headers.get("content-length")
+                size_hint = int(content_length) if content_length and content_length.isdigit() else None
+                audio_bytes = await read_audio_stream(request.stream(), size_hint)
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="Use application/octet-stream or multipart/form-data for audio uploads"
+                )
+            
+            if language is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Missing language. Provide it as a query parameter or form field."
+                )
+            
+            validate_audio_format(audio_bytes, audioFormat.value)
+            
+            return await _detect_and_log(audio_bytes, language, start_time)
         
-        # Calculate response time
-        response_time_ms = int((time.time() - start_time) * 1000)
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
         
-        # Log inference to database
-        try:
-            log_entry = InferenceLog(
-                language=request.language.value,
-                classification=classification,
-                confidence_score=confidence_score,
-                response_time_ms=response_time_ms
-            )
-            db.add(log_entry)
-            db.commit()
-        except Exception as db_error:
-            # Don't fail the request if logging fails
-            print(f"Database logging error: {str(db_error)}")
+    except Exception as e:
+        # Handle unexpected errors
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.post(
+    "/voice-detection/segments",
+    response_model=SegmentDetectionResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        422: {"model": ErrorResponse, "description": "Not enough speech in the audio"},
+        429: {"model": ErrorResponse, "description": "Too Many Requests"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Server is saturated; retry after Retry-After seconds"}
+    },
+    summary="Detect AI-generated sections of a clip",
+    description="Scores overlapping windows of the audio and returns a timeline of verdicts plus the clip-level decision"
+)
+async def detect_voice_segments(
+    request: VoiceDetectionRequest,
+    windowSeconds: float = Query(4.0, ge=0.5, le=60.0, description="Window length in seconds"),
+    hopSeconds: float = Query(2.0, ge=0.1, le=60.0, description="Seconds between window starts"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Segment Detection Endpoint
+    
+    Same body as /voice-detection. Catches splices, e.g. a human intro followed
+    by synthetic speech, that a single clip-level score averages away. The clip
+    is AI_GENERATED when consecutive AI windows span at least one window plus
+    one hop.
+    
+    Returns the clip-level classification, confidence score and explanation,
+    and one verdict per window in `segments`.
+    """
+    start_time = time.time()
+    
+    try:
+        async with get_admission_controller().admit(api_key):
+            audio_bytes = await run_in_threadpool(decode_base64_audio, request.audioBase64)
+            await run_in_threadpool(validate_audio_format, audio_bytes, request.audioFormat.value)
+            
+            try:
+                (classification, confidence_score, explanation), segments = await analyse_segments(
+                    audio_bytes, windowSeconds, hopSeconds
+                )
+            except InsufficientSpeechError as e:
+                # Silent or noise-only clips are rejected before the window analysis
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
         
-        # Return response
-        return VoiceDetectionResponse(
+        response_time_ms = int((time.time() - start_time) * 1000)
+        log_inference(request.language, classification, confidence_score, response_time_ms)
+        
+        return SegmentDetectionResponse(
             language=request.language.value,
             classification=classification,
             confidenceScore=confidence_score,
-            explanation=explanation
+            explanation=explanation,
+            segments=segments
         )
         
     except HTTPException:
@@ -96,6 +238,69 @@ async def detect_voice(
         )
 
 
+async def _detect_and_log(audio_bytes: bytes, language: Language, start_time: float) -> VoiceDetectionResponse:
+    """Classify validated audio, log the inference and build the response"""
+    # Perform inference (micro-batched with concurrent requests)
+    try:
+        classification, confidence_score, explanation = await classify_audio(audio_bytes)
+    except InsufficientSpeechError as e:
+        # Silent or noise-only clips are rejected before the expensive extraction stages
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    # Calculate response time
+    response_time_ms = int((time.time() - start_time) * 1000)
+    
+    # Queue the log row; it is written to the database in the background
+    log_inference(language, classification, confidence_score, response_time_ms)
+    
+    # Return response
+    return VoiceDetectionResponse(
+        language=language.value,
+        classification=classification,
+        confidenceScore=confidence_score,
+        explanation=explanation
+    )
+
+
+def log_inference(language: Language, classification: str, confidence_score: float, response_time_ms: int):
+    """Queue an inference log row; never blocks or fails the request"""
+    get_inference_log_sink().log(language.value, classification, confidence_score, response_time_ms)
+
+
+async def _read_multipart_upload(
+    request: Request, language: Optional[Language], audio_format: AudioFormat
+) -> Tuple[memoryview, Optional[Language], AudioFormat]:
+    """Read the audio part and the optional language/audioFormat fields of a multipart upload"""
+    async with request.form(max_files=1, max_fields=4) as form:
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Missing audio file. Send it as the 'file' form field."
+            )
+        
+        try:
+            if form.get("language"):
+                language = Language(form["language"])
+            if form.get("audioFormat"):
+                audio_format = AudioFormat(form["audioFormat"])
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        audio_bytes = await read_audio_stream(_iter_upload(upload), upload.size)
+    
+    return audio_bytes, language, audio_format
+
+
+async def _iter_upload(upload: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Yield an uploaded file in chunks"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
 @router.get("/health", summary="Health check endpoint")
 async def health_check():
     """Health check endpoint to verify API is running"""
@@ -104,3 +309,66 @@ async def health_check():
         "service": "BharatVox AI",
         "version": "1.0.0"
     }
+
+
+@router.get(
+    "/ready",
+    summary="Readiness check endpoint",
+    responses={503: {"description": "Model is still loading or warming up"}}
+)
+async def readiness_check():
+    """Ready once this worker has loaded the model and finished its warm-up clip"""
+    warmup = get_model_warmup()
+    body = {"status": "ready" if warmup.ready else "warming_up", **warmup.metrics()}
+    if not warmup.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+    return body
+
+
+@router.get("/metrics/warmup", summary="Model warm-up metrics")
+async def warmup_metrics():
+    """Model load and warm-up durations of this worker"""
+    return get_model_warmup().metrics()
+
+
+@router.get("/metrics/batching", summary="Micro-batching metrics")
+async def batching_metrics():
+    """Queue depth and batch-size statistics of the inference micro-batcher"""
+    return get_batcher().metrics()
+
+
+@router.get("/metrics/extraction", summary="Extraction worker pool metrics")
+async def extraction_metrics():
+    """Worker count, in-flight extractions and rejected admissions of the process pool"""
+    return get_extraction_pool().metrics()
+
+
+@router.get("/metrics/realtime", summary="Real-time stream metrics")
+async def realtime_metrics():
+    """Open streams, rejected connections, verdicts and backpressure counters"""
+    return get_realtime_manager().metrics()
+
+
+@router.get("/metrics/admission", summary="Admission control metrics")
+async def admission_metrics():
+    """Slots in use, queue depth, rejections by reason and queue wait times of this worker"""
+    return get_admission_controller().metrics()
+
+
+@router.get("/metrics/inference-log", summary="Inference log sink metrics")
+async def inference_log_metrics():
+    """Buffered rows, batched writes and dropped rows of the inference log sink"""
+    return get_inference_log_sink().metrics()
+
+
+@router.get("/metrics/retention", summary="Inference log retention metrics")
+async def retention_metrics():
+    """Retention settings and the last archive/delete run of this worker"""
+    return get_log_retention().metrics()
+
+
+@router.get("/metrics/cache", summary="Result cache metrics")
+async def cache_metrics():
+    """Hit/miss counters and size of the content-addressed result cache"""
+    cache = get_classifier().result_cache
+    return cache.metrics() if cache is not None else {"enabled": False}
@@ -1,4 +1,12 @@
 """Core utilities and configurations"""
-from .auth import verify_api_key
+from .auth import verify_api_key, is_valid_api_key
+from .metrics import MetricsMiddleware, render_metrics, SERVER_TIMING_ENABLED, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
-__all__ = ["verify_api_key"]
+__all__ = [
+    "verify_api_key",
+    "is_valid_api_key",
+    "MetricsMiddleware",
+    "render_metrics",
+    "SERVER_TIMING_ENABLED",
+    "METRICS_CONTENT_TYPE"
+]
@@ -34,3 +34,8 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> str:
         )
     
     return x_api_key
+
+
+def is_valid_api_key(api_key: Optional[str]) -> bool:
+    """Check an API key passed outside the x-api-key header (e.g. a WebSocket query parameter)"""
+    return bool(api_key) and api_key == API_KEY
@@ -0,0 +1,209 @@
+"""
+Prometheus metrics and per-request stage timing
+
+Exposes the per-stage durations measured with ml_engine.timing, request
+durations, in-flight/threadpool gauges and the metrics of components that
+register a collector (e.g. admission control) in the Prometheus text format.
+The values are kept per worker process; scrape every worker (or run a single
+worker per container) to see the whole server.
+"""
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from anyio import to_thread
+
+from ml_engine import timing
+
+# Add a Server-Timing header with the stage breakdown to every HTTP response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+
+# Seconds; stages range from sub-millisecond (forest) to seconds (long clips)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}"
+
+
+class Gauge:
+    """Single-value gauge"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_format_value(self.value)}"
+
+
+class Counter:
+    """Counter with labels, set from totals kept by the component it describes"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+
+STAGE_SECONDS = Histogram(
+    "bharatvox_stage_duration_seconds",
+    "Time spent in each stage of the inference path",
+    ("stage",),
+    STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "bharatvox_request_duration_seconds",
+    "HTTP request duration by route and status code",
+    ("method", "route", "status"),
+    REQUEST_BUCKETS
+)
+IN_FLIGHT = Gauge("bharatvox_requests_in_flight", "HTTP requests currently being handled")
+THREADPOOL_BUSY = Gauge("bharatvox_threadpool_busy_threads", "Threadpool threads running blocking work")
+THREADPOOL_LIMIT = Gauge("bharatvox_threadpool_max_threads", "Size of the threadpool used by run_in_threadpool")
+THREADPOOL_WAITING = Gauge("bharatvox_threadpool_waiting_tasks", "Calls waiting for a free threadpool thread")
+
+timing.add_observer(lambda stage, seconds: STAGE_SECONDS.observe(seconds, stage))
+
+# Callbacks that refresh and return the metrics of other components at scrape time
+_collectors: List[Callable[[], Iterable]] = []
+
+
+def add_collector(collector: Callable[[], Iterable]):
+    """Render the metrics collector() returns with every scrape (called on the event loop)"""
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    """All metrics of this worker in the Prometheus text format (call on the event loop)"""
+    limiter = to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_BUSY.value = statistics.borrowed_tokens
+    THREADPOOL_LIMIT.value = statistics.total_tokens
+    THREADPOOL_WAITING.value = statistics.tasks_waiting
+
+    lines: List[str] = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, IN_FLIGHT, THREADPOOL_BUSY, THREADPOOL_LIMIT, THREADPOOL_WAITING):
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for metric in collector():
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def format_server_timing(timings: Dict[str, float], total_seconds: float) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    entries = [f"{name};dur={seconds * 1000.0:.2f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total_seconds * 1000.0:.2f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request
+
+    Counts in-flight requests, records the duration per route template, and
+    collects the stage timings of the request so they can be returned in a
+    Server-Timing header when SERVER_TIMING_ENABLED is set.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        with timing.collect() as timings:
+            async def send_wrapper(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if self.server_timing:
+                        header = format_server_timing(timings, time.perf_counter() - start)
+                        headers = [*message.get("headers", []), (b"server-timing", header.encode())]
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            IN_FLIGHT.value += 1
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                IN_FLIGHT.value -= 1
+                # The route template keeps the label set bounded
+                route = scope.get("route")
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - start,
+                    scope["method"],
+                    getattr(route, "path", "unmatched"),
+                    str(status_code)
+                )
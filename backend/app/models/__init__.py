@@ -2,21 +2,30 @@
 from .schemas import (
     VoiceDetectionRequest,
     VoiceDetectionResponse,
+    StreamVerdictResponse,
+    SegmentVerdict,
+    SegmentDetectionResponse,
     ErrorResponse,
     Language,
     AudioFormat,
+    StreamFormat,
     Classification
 )
-from .database import InferenceLog, init_db, get_db
+from .database import InferenceLog, InferenceRollup, init_db, get_db
 
 __all__ = [
     "VoiceDetectionRequest",
     "VoiceDetectionResponse",
+    "StreamVerdictResponse",
+    "SegmentVerdict",
+    "SegmentDetectionResponse",
     "ErrorResponse",
     "Language",
     "AudioFormat",
+    "StreamFormat",
     "Classification",
     "InferenceLog",
+    "InferenceRollup",
     "init_db",
     "get_db"
 ]
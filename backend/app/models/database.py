@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -21,19 +21,61 @@ class InferenceLog(Base):
     confidence_score = Column(Float, nullable=False)
     response_time_ms = Column(Integer, nullable=False)
     
+    # Time-range scans, optionally filtered by language or classification
+    __table_args__ = (
+        Index("ix_inference_logs_timestamp", "timestamp"),
+        Index("ix_inference_logs_language_timestamp", "language", "timestamp"),
+        Index("ix_inference_logs_classification_timestamp", "classification", "timestamp"),
+    )
+    
     def __repr__(self):
         return f"<InferenceLog(id={self.id}, language={self.language}, classification={self.classification})>"
 
 
+class InferenceRollup(Base):
+    """Per-minute aggregate of InferenceLog rows, maintained as rows are written"""
+    __tablename__ = "inference_rollups_minute"
+
+    bucket_start = Column(DateTime, primary_key=True)
+    language = Column(String(50), primary_key=True)
+    classification = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    response_time_sum = Column(Integer, nullable=False, default=0)
+    response_time_max = Column(Integer, nullable=False, default=0)
+    # JSON lists of counts over the fixed bins in services/stats.py
+    confidence_histogram = Column(Text, nullable=False)
+    latency_histogram = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_inference_rollups_minute_language_bucket", "language", "bucket_start"),
+    )
+
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bharatvox.db")
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run during writes; NORMAL sync skips the per-commit fsync of the WAL"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # Wait for another worker's write transaction instead of failing with "database is locked"
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def get_db():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Literal
+from typing import List, Literal
 from enum import Enum
 
 
@@ -17,6 +17,12 @@ class AudioFormat(str, Enum):
     MP3 = "mp3"
 
 
+class StreamFormat(str, Enum):
+    """Supported audio encodings for real-time streams"""
+    MP3 = "mp3"
+    PCM_S16LE = "pcm_s16le"
+
+
 class Classification(str, Enum):
     """Voice classification types"""
     AI_GENERATED = "AI_GENERATED"
@@ -45,6 +51,26 @@ class VoiceDetectionResponse(BaseModel):
     explanation: str
 
 
+class StreamVerdictResponse(VoiceDetectionResponse):
+    """Verdict pushed over a real-time detection stream"""
+    audioSeconds: float = Field(..., ge=0.0, description="Seconds of audio analysed so far")
+    final: bool = Field(False, description="True for the verdict sent after the stream ends")
+
+
+class SegmentVerdict(BaseModel):
+    """Verdict for one window of a segment analysis"""
+    start: float = Field(..., ge=0.0, description="Window start in seconds")
+    end: float = Field(..., ge=0.0, description="Window end in seconds")
+    classification: Classification
+    confidenceScore: float = Field(..., ge=0.0, le=1.0)
+    aiProbability: float = Field(..., ge=0.0, le=1.0)
+
+
+class SegmentDetectionResponse(VoiceDetectionResponse):
+    """Clip-level verdict plus the timeline of window verdicts behind it"""
+    segments: List[SegmentVerdict]
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     status: Literal["error"] = "error"
@@ -1,4 +1,53 @@
 """Services package"""
-from .audio_utils import decode_base64_audio, validate_audio_format
+from .audio_utils import decode_base64_audio, validate_audio_format, read_audio_stream
+from .batcher import MicroBatcher, get_batcher
+from .extraction_pool import (
+    ExtractionPool,
+    get_extraction_pool,
+    start_extraction_pool,
+    shutdown_extraction_pool
+)
+from .detection import analyse_segments, classify_audio, classify_feature_vector
+from .warmup import ModelWarmup, get_model_warmup
+from .inference_log import InferenceLogSink, get_inference_log_sink
+from .stats import query_stats, rebuild_rollups, update_rollups
+from .retention import LogRetention, get_log_retention
+from .admission import AdmissionController, get_admission_controller
+from .realtime import (
+    AudioInbox,
+    RealtimeSession,
+    RealtimeStreamManager,
+    StreamMemoryExceeded,
+    get_realtime_manager
+)
 
-__all__ = ["decode_base64_audio", "validate_audio_format"]
+__all__ = [
+    "decode_base64_audio",
+    "validate_audio_format",
+    "read_audio_stream",
+    "MicroBatcher",
+    "get_batcher",
+    "ExtractionPool",
+    "get_extraction_pool",
+    "start_extraction_pool",
+    "shutdown_extraction_pool",
+    "analyse_segments",
+    "classify_audio",
+    "classify_feature_vector",
+    "ModelWarmup",
+    "get_model_warmup",
+    "InferenceLogSink",
+    "get_inference_log_sink",
+    "query_stats",
+    "rebuild_rollups",
+    "update_rollups",
+    "LogRetention",
+    "get_log_retention",
+    "AdmissionController",
+    "get_admission_controller",
+    "AudioInbox",
+    "RealtimeSession",
+    "RealtimeStreamManager",
+    "StreamMemoryExceeded",
+    "get_realtime_manager"
+]
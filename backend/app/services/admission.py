@@ -0,0 +1,249 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from ml_engine import timing
+
+from ..core.metrics import Counter, Gauge, add_collector
+
+# Admission control of the detection endpoints (per worker process). A max in-flight
+# or per-key limit of 0 disables it; a queue of 0 rejects whenever every slot is busy
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(2 * (os.cpu_count() or 1))))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "5000"))
+ADMISSION_PER_KEY_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_PER_KEY_MAX_IN_FLIGHT", "0"))
+
+REJECT_REASONS = ("keyQuota", "queueFull", "deadline", "timeout")
+# Weight of the latest request in the running estimate of how long a slot is held
+SERVICE_TIME_SMOOTHING = 0.2
+MAX_RETRY_AFTER_SECONDS = 60
+
+# Prometheus series; the queue wait itself is the "admission" stage of the stage histogram
+IN_FLIGHT_GAUGE = Gauge("bharatvox_admission_in_flight", "Detection requests holding an admission slot")
+QUEUED_GAUGE = Gauge("bharatvox_admission_queued", "Detection requests waiting for an admission slot")
+REJECTED_COUNTER = Counter(
+    "bharatvox_admission_rejected_total",
+    "Detection requests turned away by admission control, by reason",
+    ("reason",)
+)
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded, deadline-aware wait queue
+
+    At most max_in_flight requests hold a slot at once; the rest wait in FIFO
+    order, up to max_queue of them and for at most queue_timeout_ms each. A
+    request is turned away at once instead of queueing when the queue is full,
+    or when the estimated wait (its queue position times the recent time a slot
+    is held, spread over the slots) already exceeds the timeout. Overload is
+    answered with a 503, a caller over its per-API-key quota (requests running
+    or queued) with a 429; both carry a Retry-After header.
+
+    Meant for one event loop: every method runs on it, so no locks are needed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_queue: int = 32,
+        queue_timeout_ms: float = 5000.0,
+        per_key_max_in_flight: int = 0
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_ms / 1000.0
+        self.per_key_max_in_flight = per_key_max_in_flight
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_key: Dict[str, int] = {}
+        self._service_time_s: Optional[float] = None
+
+        # Metrics
+        self._admitted_total = 0
+        self._queued_total = 0
+        self._rejected = dict.fromkeys(REJECT_REASONS, 0)
+        self._wait_seconds_total = 0.0
+        self._max_wait_s = 0.0
+
+    @asynccontextmanager
+    async def admit(self, api_key: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold a slot for the enclosed block, queueing for it when the worker is busy
+
+        Raises:
+            HTTPException: 429 when the API key is at its quota, 503 when the
+                queue is full or no slot frees up before the deadline
+        """
+        key = api_key or ""
+        if self.per_key_max_in_flight and self._per_key.get(key, 0) >= self.per_key_max_in_flight:
+            self._reject(
+                "keyQuota",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                "Too many concurrent requests for this API key. Please retry shortly.",
+                self._retry_after(1)
+            )
+
+        self._per_key[key] = self._per_key.get(key, 0) + 1
+        try:
+            await self._acquire()
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._release()
+                self._update_service_time(time.perf_counter() - start)
+        finally:
+            self._per_key[key] -= 1
+            if not self._per_key[key]:
+                del self._per_key[key]
+
+    async def _acquire(self):
+        """Take a free slot or wait in the queue for one"""
+        if not self.max_in_flight or (self._in_flight < self.max_in_flight and not self._waiters):
+            self._in_flight += 1
+            self._admitted_total += 1
+            timing.record("admission", 0.0)
+            return
+
+        position = len(self._waiters) + 1
+        if position > self.max_queue:
+            self._reject(
+                "queueFull",
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Server is busy. Please retry shortly.",
+                self._retry_after(position)
+            )
+        expected_wait = self._expected_wait(position)
+        if expected_wait is not None and expected_wait > self.queue_timeout_s:
+            # Waiting would only end in a timeout; free the client right away
+            self._reject(
+                "deadline",
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Server is busy. Please retry shortly.",
+                self._retry_after(position)
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._queued_total += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout_s)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as the wait ended; pass it on
+                self._release()
+            else:
+                future.cancel()
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self._record_wait(time.perf_counter() - start)
+                self._reject(
+                    "timeout",
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "Server is busy. Please retry shortly.",
+                    self._retry_after(len(self._waiters) + 1)
+                )
+            raise
+
+        self._admitted_total += 1
+        self._record_wait(time.perf_counter() - start)
+
+    def _release(self):
+        """Hand the slot to the oldest waiter still waiting, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _update_service_time(self, seconds: float):
+        if self._service_time_s is None:
+            self._service_time_s = seconds
+        else:
+            self._service_time_s += SERVICE_TIME_SMOOTHING * (seconds - self._service_time_s)
+
+    def _expected_wait(self, position: int) -> Optional[float]:
+        """Estimated seconds until the waiter at this queue position gets a slot"""
+        if self._service_time_s is None or not self.max_in_flight:
+            return None
+        return position * self._service_time_s / self.max_in_flight
+
+    def _retry_after(self, position: int) -> int:
+        """Seconds a rejected client should wait: about the time to drain the queue ahead of it"""
+        expected_wait = self._expected_wait(position)
+        if expected_wait is None:
+            return 1
+        return min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(expected_wait)))
+
+    def _record_wait(self, seconds: float):
+        self._wait_seconds_total += seconds
+        self._max_wait_s = max(self._max_wait_s, seconds)
+        timing.record("admission", seconds)
+
+    def _reject(self, reason: str, status_code: int, detail: str, retry_after: int):
+        self._rejected[reason] += 1
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    def metrics(self) -> Dict:
+        """Slots in use, queue depth, admissions, rejections by reason and queue waits"""
+        return {
+            "inFlight": self._in_flight,
+            "maxInFlight": self.max_in_flight,
+            "queued": len(self._waiters),
+            "maxQueue": self.max_queue,
+            "queueTimeoutMs": self.queue_timeout_s * 1000.0,
+            "perKeyMaxInFlight": self.per_key_max_in_flight,
+            "activeKeys": len(self._per_key),
+            "admittedTotal": self._admitted_total,
+            "queuedTotal": self._queued_total,
+            "rejectedTotal": sum(self._rejected.values()),
+            "rejected": dict(self._rejected),
+            "meanQueueWaitMs": self._wait_seconds_total * 1000.0 / self._queued_total if self._queued_total else 0.0,
+            "maxQueueWaitMs": self._max_wait_s * 1000.0,
+            "serviceTimeMs": self._service_time_s * 1000.0 if self._service_time_s is not None else None,
+        }
+
+
+# Singleton instance for reuse
+_controller_instance = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the admission controller of this worker"""
+    global _controller_instance
+    if _controller_instance is None:
+        _controller_instance = AdmissionController(
+            max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+            max_queue=ADMISSION_MAX_QUEUE,
+            queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+            per_key_max_in_flight=ADMISSION_PER_KEY_MAX_IN_FLIGHT
+        )
+    return _controller_instance
+
+
+def _collect_metrics():
+    """Refresh the Prometheus series from the controller of this worker"""
+    metrics = get_admission_controller().metrics()
+    IN_FLIGHT_GAUGE.value = metrics["inFlight"]
+    QUEUED_GAUGE.value = metrics["queued"]
+    REJECTED_COUNTER.values = {(reason,): count for reason, count in metrics["rejected"].items()}
+    return IN_FLIGHT_GAUGE, QUEUED_GAUGE, REJECTED_COUNTER
+
+
+add_collector(_collect_metrics)
@@ -1,8 +1,16 @@
 import base64
-from typing import Tuple
+import os
+from typing import AsyncIterator, Optional
 from fastapi import HTTPException, status
 
+from ml_engine.timing import timed
 
+# Largest raw upload accepted by the binary/multipart endpoint
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MIN_AUDIO_BYTES = 1000
+
+
+@timed("base64_decode")
 def decode_base64_audio(audio_base64: str) -> bytes:
     """
     Decode base64 audio string to bytes
@@ -24,7 +32,7 @@ def decode_base64_audio(audio_base64: str) -> bytes:
         audio_bytes = base64.b64decode(audio_base64)
         
         # Validate minimum size (should be at least a few KB for valid audio)
-        if len(audio_bytes) < 1000:
+        if len(audio_bytes) < MIN_AUDIO_BYTES:
             raise ValueError("Audio data too small to be valid")
         
         return audio_bytes
@@ -59,7 +67,9 @@ def validate_audio_format(audio_bytes: bytes, expected_format: str = "mp3") -> b
     ]
     
     if expected_format.lower() == "mp3":
-        is_valid = any(audio_bytes.startswith(sig) for sig in mp3_signatures)
+        # Works for bytes and memoryview input alike
+        header = bytes(audio_bytes[:4])
+        is_valid = any(header.startswith(sig) for sig in mp3_signatures)
         
         if not is_valid:
             raise HTTPException(
@@ -73,3 +83,53 @@ def validate_audio_format(audio_bytes: bytes, expected_format: str = "mp3") -> b
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=f"Unsupported audio format: {expected_format}. Only MP3 is supported."
     )
+
+
+async def read_audio_stream(
+    chunks: AsyncIterator[bytes],
+    size_hint: Optional[int] = None,
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> memoryview:
+    """
+    Read a streamed upload into a single bounded buffer
+    
+    Args:
+        chunks: Async iterator of body chunks
+        size_hint: Expected size (e.g. Content-Length) used to preallocate the buffer
+        max_bytes: Maximum accepted upload size
+        
+    Returns:
+        A memoryview over the received bytes, so no further copies are made
+        
+    Raises:
+        HTTPException: 413 if the upload exceeds max_bytes, 400 if it is too small
+    """
+    if size_hint is not None and size_hint > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Audio upload exceeds the {max_bytes} byte limit"
+        )
+    
+    buffer = bytearray(size_hint or 0)
+    received = 0
+    async for chunk in chunks:
+        end = received + len(chunk)
+        if end > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Audio upload exceeds the {max_bytes} byte limit"
+            )
+        if end <= len(buffer):
+            buffer[received:end] = chunk
+        else:
+            del buffer[received:]
+            buffer += chunk
+        received = end
+    
+    if received < MIN_AUDIO_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Audio data too small to be valid"
+        )
+    
+    return memoryview(buffer)[:received]
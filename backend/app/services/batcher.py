@@ -0,0 +1,175 @@
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from ml_engine import get_classifier, timing
+
+# Micro-batching configuration
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+ClassifyFn = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class MicroBatcher:
+    """
+    Coalesce feature vectors from concurrent requests into one classifier call
+
+    The first queued vector opens a batching window. The window closes when it
+    holds max_batch_size vectors or max_wait_ms has passed, whichever comes
+    first. The stacked batch is scaled and classified once in the threadpool and
+    every waiting request gets its own row of the result.
+    """
+
+    def __init__(self, classify: ClassifyFn, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.classify = classify
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._batches_total = 0
+        self._items_total = 0
+        self._max_batch_size_seen = 0
+        self._batch_size_counts: Dict[int, int] = {}
+
+    async def submit(self, features: np.ndarray) -> Tuple[int, float]:
+        """
+        Queue one feature vector and wait for its classification
+
+        Returns:
+            prediction: Class label (0 = AI_GENERATED, 1 = HUMAN)
+            confidence: Probability of the predicted class
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        # Queueing plus the shared forest call, as seen by this request
+        with timing.stage("batch"):
+            await self._queue.put((features, future))
+            return await future
+
+    def _ensure_started(self):
+        """Start the worker on the running loop, restarting it if the loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def _collect_batch(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """Wait for the first item, then gather more until the window closes"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_s
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding to the loop
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Worker loop: collect a batch, classify it once, fan results back out"""
+        # Started from some request's context; the batches it runs belong to no single request
+        timing.detach()
+        while True:
+            batch = await self._collect_batch()
+            futures = [future for _, future in batch]
+            self._record_batch(len(batch))
+
+            try:
+                features = np.vstack([vector for vector, _ in batch])
+                predictions, confidences = await run_in_threadpool(self.classify, features)
+            except asyncio.CancelledError:
+                for future in futures:
+                    if not future.done():
+                        future.cancel()
+                raise
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for row, future in enumerate(futures):
+                # The request may have been cancelled while the batch was running
+                if not future.done():
+                    future.set_result((predictions[row], float(confidences[row])))
+
+    def _record_batch(self, size: int):
+        self._batches_total += 1
+        self._items_total += size
+        self._max_batch_size_seen = max(self._max_batch_size_seen, size)
+        self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+
+    def metrics(self) -> Dict:
+        """Current queue depth and batch-size statistics"""
+        return {
+            "queueDepth": self._queue.qsize() if self._queue is not None else 0,
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitMs": self.max_wait_s * 1000.0,
+            "batchesTotal": self._batches_total,
+            "itemsTotal": self._items_total,
+            "meanBatchSize": self._items_total / self._batches_total if self._batches_total else 0.0,
+            "largestBatch": self._max_batch_size_seen,
+            "batchSizeCounts": dict(sorted(self._batch_size_counts.items())),
+        }
+
+    async def close(self):
+        """Stop the worker and cancel any requests still waiting in the queue"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+
+        self._worker = None
+
+
+def _classify_with_shared_model(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Classify with the shared classifier, loading it only when the first batch runs"""
+    return get_classifier().classify_features(features)
+
+
+# Singleton instance for reuse
+_batcher_instance = None
+
+
+def get_batcher() -> MicroBatcher:
+    """Get or create the micro-batcher in front of the shared classifier"""
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = MicroBatcher(
+            _classify_with_shared_model,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS
+        )
+    return _batcher_instance
@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from ml_engine import get_classifier
+from .batcher import BATCHING_ENABLED, get_batcher
+from .extraction_pool import EXTRACTION_MODE, get_extraction_pool
+
+
+async def classify_audio(audio_bytes: bytes) -> Tuple[str, float, str]:
+    """
+    Run feature extraction and classification for one clip
+
+    Repeated clips are served from the classifier's result cache. Otherwise
+    features are extracted in the threadpool, or in the worker process pool when
+    EXTRACTION_MODE=process. With micro-batching enabled, the vector then joins
+    the shared batcher so concurrent requests share one forest call.
+
+    Returns:
+        classification, confidence_score, explanation (as VoiceClassifier.predict)
+    """
+    classifier = get_classifier()
+
+    # Resubmitted clips are answered from the result cache
+    cache_key, features, result = await run_in_threadpool(classifier.lookup_cached, audio_bytes)
+    if result is not None:
+        return result
+
+    if features is None:
+        if EXTRACTION_MODE == "process":
+            features = await get_extraction_pool().extract(audio_bytes)
+        else:
+            features = await run_in_threadpool(classifier.extract_feature_array, audio_bytes)
+
+    result = await classify_feature_vector(features)
+    await run_in_threadpool(classifier.store_cached, cache_key, features, result)
+    return result
+
+
+async def analyse_segments(
+    audio_bytes: bytes, window_seconds: float, hop_seconds: float
+) -> Tuple[Tuple[str, float, str], List[Dict]]:
+    """
+    Classify a clip window by window (see VoiceClassifier.predict_segments)
+
+    With EXTRACTION_MODE=process the chunks of long clips are analysed by the
+    extraction worker processes; otherwise by threads in this process.
+
+    Returns:
+        result: (classification, confidence_score, explanation) for the whole clip
+        segments: Per-window verdicts in time order
+    """
+    classifier = get_classifier()
+    executor = get_extraction_pool().executor if EXTRACTION_MODE == "process" else None
+    return await run_in_threadpool(
+        classifier.predict_segments, audio_bytes, window_seconds, hop_seconds, executor=executor
+    )
+
+
+async def classify_feature_vector(features: np.ndarray) -> Tuple[str, float, str]:
+    """Classify one extracted feature vector, through the micro-batcher when enabled"""
+    classifier = get_classifier()
+
+    if BATCHING_ENABLED:
+        prediction, confidence = await get_batcher().submit(features)
+    else:
+        predictions, confidences = await run_in_threadpool(classifier.classify_features, features.reshape(1, -1))
+        prediction, confidence = predictions[0], confidences[0]
+
+    return classifier.build_result(prediction, confidence, features)
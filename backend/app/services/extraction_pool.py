@@ -0,0 +1,158 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from ml_engine import extraction_worker, get_classifier, timing
+
+# Feature extraction execution mode: "thread" (default threadpool) or "process"
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "thread").lower()
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", "64"))
+
+
+class ExtractionPool:
+    """
+    Pool of warm worker processes that turn audio bytes into feature vectors
+
+    Each worker holds a preloaded AudioFeatureExtractor, so CPU-bound librosa and
+    NumPy work runs outside the API process's GIL. Clips are passed through shared
+    memory and only the 40-float vector comes back. Admission is bounded: once
+    max_pending extractions are queued or running, new requests get a 429.
+    """
+
+    def __init__(self, feature_config: Dict, workers: int = 1, max_pending: int = 64):
+        self.feature_config = feature_config
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._rejected_total = 0
+
+    def start(self):
+        """Spawn every worker and wait until each has built and warmed its extractor"""
+        if self._executor is not None:
+            return
+
+        # Spawn rather than fork: the API process already runs threads and an event loop
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=extraction_worker.init_worker,
+            initargs=(self.feature_config,)
+        )
+        # Concurrent submissions make the executor start a process for each one
+        futures = [self._executor.submit(extraction_worker.worker_pid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    async def extract(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        Extract the feature vector of a clip in a worker process
+
+        Raises:
+            HTTPException: 429 when the pool is saturated, 503 if it is not running
+        """
+        if self._executor is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Feature extraction workers are not running"
+            )
+
+        if self._pending >= self.max_pending:
+            self._rejected_total += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Server is busy. Please retry shortly.",
+                headers={"Retry-After": "1"}
+            )
+
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(audio_bytes)))
+        self._pending += 1
+        try:
+            block.buf[:len(audio_bytes)] = audio_bytes
+            future = self._executor.submit(
+                extraction_worker.extract_from_shared_memory, block.name, len(audio_bytes)
+            )
+        except BaseException:
+            self._release_block(block)
+            raise
+
+        # A cancelled request (client gone, admission timeout) must not unlink the
+        # block while a worker may still attach to it: release it once the task is done
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._release_block_soon(loop, block))
+        features, timings = await asyncio.wrap_future(future)
+
+        # Stages ran in the worker process; count them here, where the histograms live
+        for name, seconds in timings.items():
+            timing.record(name, seconds)
+        return features
+
+    def _release_block(self, block: shared_memory.SharedMemory):
+        """Free a clip's shared memory and its admission slot"""
+        block.close()
+        block.unlink()
+        self._pending -= 1
+
+    def _release_block_soon(self, loop: asyncio.AbstractEventLoop, block: shared_memory.SharedMemory):
+        """Done callback (executor thread): release the block on the event loop"""
+        try:
+            loop.call_soon_threadsafe(self._release_block, block)
+        except RuntimeError:
+            # The loop is closed (shutdown); nothing else touches the counter any more
+            self._release_block(block)
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """The worker processes, for work that brings its own task function (None until started)"""
+        return self._executor
+
+    def metrics(self) -> Dict:
+        """Worker count, current load and rejected admissions"""
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "pending": self._pending,
+            "maxPending": self.max_pending,
+            "rejectedTotal": self._rejected_total,
+        }
+
+    def shutdown(self):
+        """Let running extractions finish, drop queued ones and stop the workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance for reuse
+_pool_instance = None
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Get or create the extraction pool, configured from the shared classifier"""
+    global _pool_instance
+    if _pool_instance is None:
+        extractor = get_classifier().feature_extractor
+        _pool_instance = ExtractionPool(
+            {**extractor.get_config(), **extractor.get_runtime_options()},
+            workers=EXTRACTION_WORKERS,
+            max_pending=EXTRACTION_MAX_PENDING
+        )
+    return _pool_instance
+
+
+def start_extraction_pool():
+    """Start the worker processes when process-mode extraction is configured"""
+    if EXTRACTION_MODE == "process":
+        get_extraction_pool().start()
+
+
+def shutdown_extraction_pool():
+    """Stop the worker processes if the pool was created"""
+    if _pool_instance is not None:
+        _pool_instance.shutdown()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+
+from ..models import InferenceLog
+from ..models.database import engine
+from .stats import update_rollups
+
+# Inference log sink configuration
+INFERENCE_LOG_BATCH_SIZE = int(os.getenv("INFERENCE_LOG_BATCH_SIZE", "200"))
+INFERENCE_LOG_FLUSH_MS = float(os.getenv("INFERENCE_LOG_FLUSH_MS", "500"))
+INFERENCE_LOG_MAX_BUFFER = int(os.getenv("INFERENCE_LOG_MAX_BUFFER", "10000"))
+
+
+class InferenceLogSink:
+    """
+    Buffered, batched writer for InferenceLog rows
+
+    log() only appends to an in-memory buffer, so recording an inference never
+    waits on the database. A background task writes the buffer in a single
+    transaction once it holds batch_size rows or flush_interval_ms has passed,
+    whichever comes first, and folds them into the per-minute rollups in the
+    same transaction. When the database falls behind and the buffer reaches
+    max_buffer rows, new rows are dropped and counted instead of growing memory
+    or slowing requests down.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval_ms: float = 500.0, max_buffer: int = 10000):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.max_buffer = max(max_buffer, batch_size)
+
+        self._buffer: List[Dict] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._written_total = 0
+        self._dropped_total = 0
+        self._failed_total = 0
+        self._flushes_total = 0
+        self._last_flush_ms = 0.0
+
+    def log(self, language: str, classification: str, confidence_score: float, response_time_ms: int) -> bool:
+        """
+        Queue one inference row (call from the event loop; never blocks)
+
+        Returns:
+            False if the row was dropped because the buffer is full
+        """
+        self._ensure_started()
+        if len(self._buffer) >= self.max_buffer:
+            self._dropped_total += 1
+            return False
+
+        self._buffer.append({
+            "timestamp": datetime.utcnow(),
+            "language": language,
+            "classification": classification,
+            "confidence_score": float(confidence_score),
+            "response_time_ms": int(response_time_ms),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _ensure_started(self):
+        """Start the writer on the running loop, restarting it if the loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Writer loop: wait for a full batch or the flush interval, then write"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far, batch_size rows per transaction"""
+        while self._buffer:
+            rows = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            await run_in_threadpool(self._write, rows)
+
+    def _write(self, rows: List[Dict]):
+        start = time.perf_counter()
+        try:
+            # One executemany INSERT in one transaction: a single commit for the whole batch
+            with engine.begin() as connection:
+                connection.execute(insert(InferenceLog), rows)
+                update_rollups(connection, rows)
+        except Exception as e:
+            # Losing log rows must not affect serving
+            self._failed_total += len(rows)
+            print(f"Database logging error: {str(e)}")
+            return
+
+        self._written_total += len(rows)
+        self._flushes_total += 1
+        self._last_flush_ms = (time.perf_counter() - start) * 1000.0
+
+    def metrics(self) -> Dict:
+        """Buffer depth and write/drop counters"""
+        return {
+            "bufferedRows": len(self._buffer),
+            "maxBuffer": self.max_buffer,
+            "batchSize": self.batch_size,
+            "flushIntervalMs": self.flush_interval_s * 1000.0,
+            "writtenTotal": self._written_total,
+            "droppedTotal": self._dropped_total,
+            "failedTotal": self._failed_total,
+            "flushesTotal": self._flushes_total,
+            "meanRowsPerFlush": self._written_total / self._flushes_total if self._flushes_total else 0.0,
+            "lastFlushMs": round(self._last_flush_ms, 3),
+        }
+
+    async def close(self):
+        """Stop the writer and flush the rows still buffered"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        await self.flush()
+
+
+# Singleton instance for reuse
+_sink_instance = None
+
+
+def get_inference_log_sink() -> InferenceLogSink:
+    """Get or create the inference log sink of this worker"""
+    global _sink_instance
+    if _sink_instance is None:
+        _sink_instance = InferenceLogSink(
+            batch_size=INFERENCE_LOG_BATCH_SIZE,
+            flush_interval_ms=INFERENCE_LOG_FLUSH_MS,
+            max_buffer=INFERENCE_LOG_MAX_BUFFER
+        )
+    return _sink_instance
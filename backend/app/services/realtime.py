@@ -0,0 +1,270 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from ml_engine import get_classifier
+from ml_engine.streaming import MP3StreamDecoder, PCMStreamDecoder, StreamingFeatureExtractor
+from .detection import classify_feature_vector
+
+# Real-time stream configuration (per worker process)
+REALTIME_MAX_STREAMS = int(os.getenv("REALTIME_MAX_STREAMS", "256"))
+REALTIME_MAX_CONCURRENCY = int(os.getenv("REALTIME_MAX_CONCURRENCY", str(os.cpu_count() or 1)))
+REALTIME_UPDATE_SECONDS = float(os.getenv("REALTIME_UPDATE_SECONDS", "5"))
+REALTIME_INBOX_BYTES = int(os.getenv("REALTIME_INBOX_BYTES", str(256 * 1024)))
+REALTIME_MAX_STREAM_BYTES = int(os.getenv("REALTIME_MAX_STREAM_BYTES", str(8 * 1024 * 1024)))
+REALTIME_MFCC_RETENTION_SECONDS = float(os.getenv("REALTIME_MFCC_RETENTION_SECONDS", "30"))
+REALTIME_ANALYSIS_SECONDS = float(os.getenv("REALTIME_ANALYSIS_SECONDS", "2"))
+
+
+class StreamMemoryExceeded(Exception):
+    """A stream's buffered state grew past its memory cap"""
+
+
+class AudioInbox:
+    """
+    Bounded byte buffer between a socket reader and the analysis task
+
+    put() waits while max_bytes are already queued, so a client that sends faster
+    than its audio can be analysed stops being read and TCP flow control pushes
+    back on it. take() returns everything queued as one chunk, so a slow stream
+    catches up in a few large analysis steps instead of many small ones.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._closed = False
+        self._condition = asyncio.Condition()
+        self.backpressure_waits = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def put(self, data: bytes):
+        """Queue a chunk, waiting while the inbox is full"""
+        async with self._condition:
+            if self._size >= self.max_bytes and not self._closed:
+                self.backpressure_waits += 1
+                await self._condition.wait_for(lambda: self._size < self.max_bytes or self._closed)
+            self._chunks.append(data)
+            self._size += len(data)
+            self._condition.notify_all()
+
+    async def take(self) -> Optional[bytes]:
+        """Wait for data and return all of it, or None once closed and drained"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._chunks or self._closed)
+            if not self._chunks:
+                return None
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            self._condition.notify_all()
+            return data
+
+    async def close(self):
+        """Mark the end of the stream; take() drains what is left, then returns None"""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class RealtimeSession:
+    """
+    Incremental analysis state of one live audio stream
+
+    Incoming chunks are decoded to mono float32 at the model's sample rate and
+    pushed into a StreamingFeatureExtractor, whose running accumulators keep the
+    state small no matter how long the call runs. Decoded audio is analysed in
+    steps of at least analysis_seconds: every step re-filters some HPSS context
+    frames, so many tiny steps would cost far more than the audio itself. A
+    verdict is due every update_seconds of audio.
+    """
+
+    def __init__(
+        self,
+        audio_format: str,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        update_seconds: float = REALTIME_UPDATE_SECONDS,
+        max_bytes: int = REALTIME_MAX_STREAM_BYTES,
+        analysis_seconds: float = REALTIME_ANALYSIS_SECONDS
+    ):
+        classifier = get_classifier()
+        self.classifier = classifier
+        self.update_seconds = update_seconds
+        self.max_bytes = max_bytes
+        self.inbox = AudioInbox(REALTIME_INBOX_BYTES)
+
+        target_rate = classifier.feature_extractor.sample_rate
+        resample_type = classifier.feature_extractor.resample_type
+        if audio_format == "mp3":
+            self.decoder = MP3StreamDecoder(target_rate, resample_type=resample_type)
+        else:
+            self.decoder = PCMStreamDecoder(target_rate, sample_rate, channels, resample_type=resample_type)
+
+        self.extractor = StreamingFeatureExtractor(
+            classifier.feature_extractor, mfcc_retention_seconds=REALTIME_MFCC_RETENTION_SECONDS
+        )
+        self._analysis_samples = int(analysis_seconds * target_rate)
+        self._pending: List[np.ndarray] = []
+        self._pending_samples = 0
+        self._next_update = update_seconds
+
+    @property
+    def audio_seconds(self) -> float:
+        """Seconds of audio decoded so far"""
+        return self.extractor.duration_seconds + self._pending_samples / self.extractor.sr
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by this stream between chunks"""
+        pending = sum(samples.nbytes for samples in self._pending)
+        return self.inbox.size + self.decoder.buffered_bytes + pending + self.extractor.memory_bytes()
+
+    def feed(self, data: bytes) -> bool:
+        """
+        Decode and analyse a chunk (CPU-bound; run it in the threadpool)
+
+        Returns:
+            True when enough new audio has arrived for the next verdict
+
+        Raises:
+            ValueError: If the audio cannot be decoded
+            StreamMemoryExceeded: If the stream's state grows past max_bytes
+        """
+        samples = self.decoder.decode(data)
+        if len(samples):
+            self._pending.append(samples)
+            self._pending_samples += len(samples)
+
+        due = self.audio_seconds >= self._next_update
+        if due or self._pending_samples >= self._analysis_samples:
+            self._analyse_pending()
+
+        if self.memory_bytes() > self.max_bytes:
+            raise StreamMemoryExceeded(
+                f"Stream state exceeded {self.max_bytes} bytes; send smaller chunks"
+            )
+
+        if due:
+            while self._next_update <= self.audio_seconds:
+                self._next_update += self.update_seconds
+        return due
+
+    def _analyse_pending(self):
+        if self._pending:
+            self.extractor.push(np.concatenate(self._pending))
+            self._pending.clear()
+            self._pending_samples = 0
+
+    def snapshot(self) -> np.ndarray:
+        """Feature vector of the audio analysed so far"""
+        return self.classifier.features_to_array(self.extractor.snapshot())
+
+    def finish(self) -> np.ndarray:
+        """Flush the decoder and close the accumulators; returns the final features"""
+        samples = self.decoder.flush()
+        if len(samples):
+            self._pending.append(samples)
+        self._analyse_pending()
+        features_dict, _ = self.extractor.finish()
+        return self.classifier.features_to_array(features_dict)
+
+
+class RealtimeStreamManager:
+    """
+    Admission and CPU sharing for the live streams of one worker
+
+    At most max_streams connections are accepted, and at most max_concurrency
+    analysis steps run in the threadpool at once, so hundreds of mostly idle
+    streams cannot starve regular upload requests.
+    """
+
+    def __init__(self, max_streams: int = 256, max_concurrency: int = 1):
+        self.max_streams = max_streams
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self._accepted_total = 0
+        self._rejected_total = 0
+        self._verdicts_total = 0
+        self._audio_seconds_total = 0.0
+        self._backpressure_waits = 0
+        self._memory_closed_total = 0
+
+    def try_open(self) -> bool:
+        """Reserve a stream slot; False when the worker is at capacity"""
+        if self._active >= self.max_streams:
+            self._rejected_total += 1
+            return False
+        self._active += 1
+        self._accepted_total += 1
+        return True
+
+    def close(self, session: Optional[RealtimeSession] = None):
+        """Release a stream slot and fold the session into the totals"""
+        self._active -= 1
+        if session is not None:
+            self._audio_seconds_total += session.audio_seconds
+            self._backpressure_waits += session.inbox.backpressure_waits
+
+    @asynccontextmanager
+    async def analysis_slot(self):
+        """Limit how many streams analyse audio in the threadpool at once"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            yield
+
+    async def feed(self, session: RealtimeSession, data: bytes) -> bool:
+        """Analyse a chunk of a stream; see RealtimeSession.feed"""
+        async with self.analysis_slot():
+            try:
+                return await run_in_threadpool(session.feed, data)
+            except StreamMemoryExceeded:
+                self._memory_closed_total += 1
+                raise
+
+    async def verdict(self, session: RealtimeSession, final: bool = False) -> Tuple[str, float, str]:
+        """Classify everything a stream has sent so far"""
+        async with self.analysis_slot():
+            features = await run_in_threadpool(session.finish if final else session.snapshot)
+        self._verdicts_total += 1
+        return await classify_feature_vector(features)
+
+    def metrics(self) -> Dict:
+        """Open streams, admissions and throughput counters"""
+        return {
+            "activeStreams": self._active,
+            "maxStreams": self.max_streams,
+            "maxConcurrency": self.max_concurrency,
+            "acceptedTotal": self._accepted_total,
+            "rejectedTotal": self._rejected_total,
+            "verdictsTotal": self._verdicts_total,
+            "audioSecondsTotal": round(self._audio_seconds_total, 3),
+            "backpressureWaits": self._backpressure_waits,
+            "closedForMemory": self._memory_closed_total,
+        }
+
+
+# Singleton instance for reuse
+_manager_instance = None
+
+
+def get_realtime_manager() -> RealtimeStreamManager:
+    """Get or create the live stream manager of this worker"""
+    global _manager_instance
+    if _manager_instance is None:
+        _manager_instance = RealtimeStreamManager(
+            max_streams=REALTIME_MAX_STREAMS,
+            max_concurrency=REALTIME_MAX_CONCURRENCY
+        )
+    return _manager_instance
@@ -0,0 +1,315 @@
+import asyncio
+import csv
+import gzip
+import os
+import threading
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+
+from ..models import InferenceLog, InferenceRollup
+from ..models.database import engine
+from .stats import rebuild_rollups
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks; run retention from a single process there
+    fcntl = None
+
+# Log retention configuration
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "data/log_archive")
+# Hours between background retention runs in the API process; 0 disables them
+LOG_RETENTION_INTERVAL_HOURS = float(os.getenv("LOG_RETENTION_INTERVAL_HOURS", "0"))
+LOG_RETENTION_DELETE_BATCH = int(os.getenv("LOG_RETENTION_DELETE_BATCH", "2000"))
+
+ARCHIVE_COLUMNS = ["id", "timestamp", "language", "classification", "confidence_score", "response_time_ms"]
+
+
+class LogRetention:
+    """
+    Moves inference log rows older than the retention window out of the live table
+
+    Old rows are handled one UTC day at a time:
+      1. The day's per-minute rollups are checked against its raw rows and
+         rebuilt if rows logged before rollups existed are missing from them,
+         one rebuild_batch_minutes slice at a time in its own short transaction.
+      2. The raw rows are written to a gzipped CSV file in the archive directory.
+      3. The archived rows are deleted in small batches, each in its own short
+         transaction, so request logging never waits long for the write lock.
+
+    Statistics keep working for archived days because they read the rollups.
+    SQLite reuses the freed pages for new rows; run VACUUM (manage.py
+    retention --vacuum) during a quiet period to shrink the file itself.
+    """
+
+    def __init__(
+        self,
+        retention_days: int = 30,
+        archive_dir: str = "data/log_archive",
+        delete_batch_size: int = 2000,
+        read_chunk_size: int = 20000,
+        batch_pause_seconds: float = 0.01,
+        rebuild_batch_minutes: int = 60
+    ):
+        self.retention_days = retention_days
+        self.archive_dir = Path(archive_dir)
+        self.delete_batch_size = delete_batch_size
+        self.read_chunk_size = read_chunk_size
+        self.batch_pause_seconds = batch_pause_seconds
+        self.rebuild_batch_minutes = rebuild_batch_minutes
+        self.last_run: Optional[Dict] = None
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Make the current and any later run return at the next batch boundary (shutdown)"""
+        self._stopping.set()
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the oldest UTC day that is kept in full"""
+        now = now or datetime.utcnow()
+        return (now - timedelta(days=self.retention_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def run(self, dry_run: bool = False, now: Optional[datetime] = None) -> Dict:
+        """
+        Archive and delete every full day older than the retention window (blocking)
+
+        Returns:
+            Summary of the run: days, rows archived and deleted, archive files
+        """
+        start = time.perf_counter()
+        cutoff = self.cutoff(now)
+        summary = {
+            "cutoff": cutoff.isoformat() + "Z",
+            "dryRun": dry_run,
+            "days": 0,
+            "rowsArchived": 0,
+            "rowsDeleted": 0,
+            "rollupsRebuilt": 0,
+            "files": [],
+            "skipped": None,
+            "stopped": False,
+        }
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        with _RunLock(self.archive_dir / ".retention.lock") as acquired:
+            if not acquired:
+                summary["skipped"] = "another process is running retention"
+            else:
+                for day in self._days_before(cutoff):
+                    if self._stopping.is_set():
+                        break
+                    self._process_day(day, dry_run, summary)
+                summary["stopped"] = self._stopping.is_set()
+
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+        self.last_run = summary
+        return summary
+
+    def _days_before(self, cutoff: datetime) -> List[datetime]:
+        table = InferenceLog.__table__
+        with engine.connect() as connection:
+            oldest = connection.execute(
+                select(func.min(table.c.timestamp)).where(table.c.timestamp < cutoff)
+            ).scalar()
+        if oldest is None:
+            return []
+
+        day = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = []
+        while day < cutoff:
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def _process_day(self, day: datetime, dry_run: bool, summary: Dict):
+        next_day = day + timedelta(days=1)
+        table = InferenceLog.__table__
+        in_day = (table.c.timestamp >= day) & (table.c.timestamp < next_day)
+
+        with engine.connect() as connection:
+            raw_count = connection.execute(select(func.count()).where(in_day)).scalar()
+        if raw_count == 0:
+            return
+
+        summary["days"] += 1
+        if dry_run:
+            summary["rowsArchived"] += raw_count
+            return
+
+        if self._reconcile_rollups(day, next_day, raw_count):
+            summary["rollupsRebuilt"] += 1
+
+        path, archived, last_id = self._archive_day(day, in_day)
+        summary["files"].append(str(path))
+        summary["rowsArchived"] += archived
+        summary["rowsDeleted"] += self._delete_archived(in_day, last_id)
+
+    def _reconcile_rollups(self, day: datetime, next_day: datetime, raw_count: int) -> bool:
+        """
+        Rebuild a day's rollups if they cover fewer rows than the raw log holds
+
+        Each slice of rebuild_batch_minutes is replaced in its own transaction,
+        like the deletes (see stats.rebuild_rollups).
+        """
+        rollups = InferenceRollup.__table__
+        in_day = (rollups.c.bucket_start >= day) & (rollups.c.bucket_start < next_day)
+        with engine.connect() as connection:
+            rolled = connection.execute(select(func.coalesce(func.sum(rollups.c.count), 0)).where(in_day)).scalar()
+        if rolled >= raw_count:
+            return False
+
+        rebuild_rollups(
+            engine, day, next_day,
+            slice_minutes=self.rebuild_batch_minutes,
+            chunk_size=self.read_chunk_size,
+            pause_seconds=self.batch_pause_seconds
+        )
+        return True
+
+    def _archive_day(self, day: datetime, in_day):
+        """Write a day's rows to a gzipped CSV; returns (path, row count, last archived id)"""
+        table = InferenceLog.__table__
+        with engine.connect() as connection:
+            first_id = connection.execute(select(func.min(table.c.id)).where(in_day)).scalar()
+
+        # The first id keeps a re-run after an interrupted delete from overwriting the earlier file
+        path = self.archive_dir / f"inference_logs-{day:%Y-%m-%d}-{first_id}.csv.gz"
+        tmp_path = path.with_name(path.name + ".tmp")
+        archived = 0
+        last_id = first_id
+        with engine.connect() as connection, gzip.open(tmp_path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ARCHIVE_COLUMNS)
+            for rows in self._iter_rows(connection, in_day):
+                writer.writerows(
+                    [row["id"], row["timestamp"].isoformat(), row["language"], row["classification"],
+                     row["confidence_score"], row["response_time_ms"]]
+                    for row in rows
+                )
+                archived += len(rows)
+                last_id = rows[-1]["id"]
+        # Only a complete file gets its final name, and rows are deleted only after that
+        os.replace(tmp_path, path)
+        return path, archived, last_id
+
+    def _delete_archived(self, in_day, last_id: int) -> int:
+        """
+        Delete archived rows in short transactions so writers are never blocked for long
+
+        A stopped run leaves the rest of the day for the next one, which archives
+        it to a file of its own.
+        """
+        table = InferenceLog.__table__
+        deleted = 0
+        while not self._stopping.is_set():
+            with engine.begin() as connection:
+                ids = connection.execute(
+                    select(table.c.id).where(in_day).where(table.c.id <= last_id)
+                    .order_by(table.c.id).limit(self.delete_batch_size)
+                ).scalars().all()
+                if not ids:
+                    return deleted
+                connection.execute(table.delete().where(table.c.id.in_(ids)))
+            deleted += len(ids)
+            time.sleep(self.batch_pause_seconds)
+        return deleted
+
+    def _iter_rows(self, connection, condition):
+        """Rows matching condition in id order, read in chunks"""
+        table = InferenceLog.__table__
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(*[table.c[name] for name in ARCHIVE_COLUMNS])
+                .where(condition).where(table.c.id > last_id)
+                .order_by(table.c.id).limit(self.read_chunk_size)
+            ).mappings().all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    def metrics(self) -> Dict:
+        """Settings and the summary of the last run in this process"""
+        return {
+            "retentionDays": self.retention_days,
+            "archiveDir": str(self.archive_dir),
+            "intervalHours": LOG_RETENTION_INTERVAL_HOURS,
+            "lastRun": self.last_run,
+        }
+
+
+class _RunLock:
+    """Non-blocking advisory file lock, so only one worker runs retention at a time"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> bool:
+        if fcntl is None:
+            return True
+        self._file = open(self.path, "w")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+async def run_retention_periodically(retention: "LogRetention", interval_hours: float):
+    """
+    Background task: run retention now and then every interval_hours
+
+    Cancelling it stops a run in progress at its next batch boundary, and the
+    task only ends once that run's last transaction has finished.
+    """
+    while True:
+        # Cancelling run_in_threadpool would not stop the thread, only stop waiting for it
+        run = asyncio.ensure_future(run_in_threadpool(retention.run))
+        try:
+            summary = await asyncio.shield(run)
+            if summary["days"]:
+                print(
+                    f"Log retention: archived {summary['rowsArchived']} rows from {summary['days']} days, "
+                    f"deleted {summary['rowsDeleted']}"
+                )
+        except asyncio.CancelledError:
+            retention.stop()
+            with suppress(Exception):
+                await run
+            raise
+        except Exception as e:
+            print(f"Log retention error: {str(e)}")
+        await asyncio.sleep(interval_hours * 3600)
+
+
+# Singleton instance for reuse
+_retention_instance = None
+
+
+def get_log_retention() -> LogRetention:
+    """Get or create the log retention job, configured from the environment"""
+    global _retention_instance
+    if _retention_instance is None:
+        _retention_instance = LogRetention(
+            retention_days=LOG_RETENTION_DAYS,
+            archive_dir=LOG_ARCHIVE_DIR,
+            delete_batch_size=LOG_RETENTION_DELETE_BATCH
+        )
+    return _retention_instance
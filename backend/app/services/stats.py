@@ -0,0 +1,369 @@
+import bisect
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, Text, cast, func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from ..models import InferenceLog, InferenceRollup
+
+# Confidence histogram: equal-width bins over [0, 1]
+CONFIDENCE_BINS = 10
+# Latency histogram: upper bounds growing by 20% from 1 ms to ~2 minutes, plus an overflow bin.
+# Percentiles read from it are within a few percent of the exact values.
+LATENCY_BOUNDS_MS = [1.2 ** i for i in range(65)]
+
+# Databases whose INSERT ... ON CONFLICT DO UPDATE merges rollup cells in one statement
+UPSERT_DIALECTS = ("sqlite", "postgresql")
+# Rounds of the locking merge used elsewhere, each retried after another writer inserted a cell first
+ROLLUP_MERGE_ATTEMPTS = 3
+
+_EPOCH = datetime(1970, 1, 1)
+
+RollupKey = Tuple[datetime, str, str]
+
+
+class _Aggregate:
+    """Counters of one (bucket, language, classification) cell"""
+
+    def __init__(self):
+        self.count = 0
+        self.confidence_sum = 0.0
+        self.response_time_sum = 0
+        self.response_time_max = 0
+        self.confidence_histogram = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+        self.latency_histogram = np.zeros(len(LATENCY_BOUNDS_MS) + 1, dtype=np.int64)
+
+    def add(self, confidence_score: float, response_time_ms: int):
+        self.count += 1
+        self.confidence_sum += confidence_score
+        self.response_time_sum += response_time_ms
+        self.response_time_max = max(self.response_time_max, response_time_ms)
+        self.confidence_histogram[min(int(confidence_score * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)] += 1
+        self.latency_histogram[bisect.bisect_left(LATENCY_BOUNDS_MS, response_time_ms)] += 1
+
+    def merge(self, other: "_Aggregate"):
+        self.count += other.count
+        self.confidence_sum += other.confidence_sum
+        self.response_time_sum += other.response_time_sum
+        self.response_time_max = max(self.response_time_max, other.response_time_max)
+        self.confidence_histogram += other.confidence_histogram
+        self.latency_histogram += other.latency_histogram
+
+    @classmethod
+    def from_row(cls, row) -> "_Aggregate":
+        aggregate = cls()
+        aggregate.count = row.count
+        aggregate.confidence_sum = row.confidence_sum
+        aggregate.response_time_sum = row.response_time_sum
+        aggregate.response_time_max = row.response_time_max
+        aggregate.confidence_histogram = np.array(json.loads(row.confidence_histogram), dtype=np.int64)
+        aggregate.latency_histogram = np.array(json.loads(row.latency_histogram), dtype=np.int64)
+        return aggregate
+
+    def to_values(self) -> Dict:
+        return {
+            "count": self.count,
+            "confidence_sum": self.confidence_sum,
+            "response_time_sum": self.response_time_sum,
+            "response_time_max": self.response_time_max,
+            "confidence_histogram": json.dumps(self.confidence_histogram.tolist()),
+            "latency_histogram": json.dumps(self.latency_histogram.tolist()),
+        }
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Percentile of response_time_ms, interpolated within its histogram bin"""
+        if self.count == 0:
+            return None
+        rank = q / 100.0 * self.count
+        cumulative = np.cumsum(self.latency_histogram)
+        index = int(np.searchsorted(cumulative, rank, side="left"))
+        lower = LATENCY_BOUNDS_MS[index - 1] if index > 0 else 0.0
+        upper = LATENCY_BOUNDS_MS[index] if index < len(LATENCY_BOUNDS_MS) else self.response_time_max
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bin = self.latency_histogram[index]
+        fraction = (rank - below) / in_bin if in_bin else 1.0
+        return min(lower + fraction * (upper - lower), self.response_time_max)
+
+
+class _Summary(_Aggregate):
+    """Aggregate over several cells that also tracks the AI/human split"""
+
+    def __init__(self):
+        super().__init__()
+        self._classification_counts: Dict[str, int] = defaultdict(int)
+
+    def merge_cell(self, classification: str, cell: _Aggregate):
+        self.merge(cell)
+        self._classification_counts[classification] += cell.count
+
+    def summary(self) -> Dict:
+        ai = self._classification_counts.get("AI_GENERATED", 0)
+        human = self._classification_counts.get("HUMAN", 0)
+        return {
+            "count": self.count,
+            "aiGenerated": ai,
+            "human": human,
+            "aiRatio": round(ai / self.count, 4) if self.count else None,
+            "meanConfidence": round(self.confidence_sum / self.count, 4) if self.count else None,
+            "confidenceHistogram": self.confidence_histogram.tolist(),
+            "responseTimeMs": {
+                "mean": round(self.response_time_sum / self.count, 1) if self.count else None,
+                "p50": _round(self.latency_percentile(50)),
+                "p95": _round(self.latency_percentile(95)),
+                "p99": _round(self.latency_percentile(99)),
+                "max": self.response_time_max if self.count else None,
+            },
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def minute_bucket(timestamp: datetime) -> datetime:
+    """Start of the minute a timestamp falls in"""
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def update_rollups(connection: Connection, rows: Iterable[Dict]):
+    """
+    Fold newly inserted InferenceLog rows into the per-minute rollups
+
+    The rows are aggregated per cell here and merged into the table with one
+    INSERT ... ON CONFLICT DO UPDATE that adds the counters, sums and histogram
+    bins to the stored ones, so concurrent writers never lose counts. Other
+    databases take a locking read-modify-write instead. Call it in the
+    transaction that inserted the rows, so both commit together.
+    """
+    cells: Dict[RollupKey, _Aggregate] = defaultdict(_Aggregate)
+    for row in rows:
+        key = (minute_bucket(row["timestamp"]), row["language"], row["classification"])
+        cells[key].add(row["confidence_score"], row["response_time_ms"])
+    if not cells:
+        return
+
+    if connection.dialect.name not in UPSERT_DIALECTS:
+        _merge_rollups_locked(connection, cells)
+        return
+    connection.execute(_rollup_upsert(connection.dialect.name), _cell_values(cells))
+
+
+def _cell_values(cells: Dict[RollupKey, _Aggregate]) -> List[Dict]:
+    return [
+        {"bucket_start": key[0], "language": key[1], "classification": key[2], **cell.to_values()}
+        for key, cell in cells.items()
+    ]
+
+
+def _merge_rollups_locked(connection: Connection, cells: Dict[RollupKey, _Aggregate]):
+    """
+    Merge rollup cells with SELECT ... FOR UPDATE, then UPDATE or INSERT
+
+    For databases without an upsert the statements above can build. Concurrent
+    writers queue on the locked rows; when another writer inserts a new cell
+    first, the INSERT fails inside a savepoint and the cell is merged again as
+    an update.
+    """
+    table = InferenceRollup.__table__
+    pending = dict(cells)
+    for attempt in range(ROLLUP_MERGE_ATTEMPTS):
+        existing = connection.execute(
+            select(table)
+            .where(table.c.bucket_start.in_({key[0] for key in pending}))
+            .with_for_update()
+        ).all()
+        for row in existing:
+            key = (row.bucket_start, row.language, row.classification)
+            if key not in pending:
+                continue
+            merged = _Aggregate.from_row(row)
+            merged.merge(pending.pop(key))
+            connection.execute(
+                table.update()
+                .where(table.c.bucket_start == key[0])
+                .where(table.c.language == key[1])
+                .where(table.c.classification == key[2])
+                .values(**merged.to_values())
+            )
+        if not pending:
+            return
+
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert(), _cell_values(pending))
+            return
+        except IntegrityError:
+            if attempt == ROLLUP_MERGE_ATTEMPTS - 1:
+                raise
+
+
+def _rollup_upsert(dialect: str):
+    """INSERT of rollup cells that adds onto an existing cell instead of failing"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSON, insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = InferenceRollup.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+
+    def histogram_sum(name: str, bins: int):
+        # Element-wise sum of two JSON arrays of fixed length
+        if dialect == "postgresql":
+            def element(column, i):
+                return cast(cast(column, JSON)[i].astext, BigInteger)
+            merged = func.json_build_array(*[element(table.c[name], i) + element(excluded[name], i) for i in range(bins)])
+            return cast(merged, Text)
+        return func.json_array(*[
+            func.json_extract(table.c[name], f"$[{i}]") + func.json_extract(excluded[name], f"$[{i}]")
+            for i in range(bins)
+        ])
+
+    larger = func.greatest if dialect == "postgresql" else func.max
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.bucket_start, table.c.language, table.c.classification],
+        set_={
+            "count": table.c.count + excluded.count,
+            "confidence_sum": table.c.confidence_sum + excluded.confidence_sum,
+            "response_time_sum": table.c.response_time_sum + excluded.response_time_sum,
+            "response_time_max": larger(table.c.response_time_max, excluded.response_time_max),
+            "confidence_histogram": histogram_sum("confidence_histogram", CONFIDENCE_BINS),
+            "latency_histogram": histogram_sum("latency_histogram", len(LATENCY_BOUNDS_MS) + 1),
+        }
+    )
+
+
+def rebuild_rollups(
+    bind: Engine,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    slice_minutes: int = 60,
+    chunk_size: int = 50000,
+    pause_seconds: float = 0.0
+) -> int:
+    """
+    Recompute the rollups of [start, end) from the raw InferenceLog rows
+
+    Used for rows logged before rollups existed. Without a start, rollups are
+    replaced from the oldest raw row on, so rollups whose raw rows were already
+    archived survive. Each slice of slice_minutes is deleted and re-aggregated
+    in its own transaction, so the inference log sink never waits long for the
+    write lock and readers see every slice either before or after its rebuild.
+    Stretches without raw rows are skipped, and rows are read in id order in
+    chunks, so memory stays bounded on large tables.
+
+    Returns:
+        Number of log rows aggregated
+    """
+    table = InferenceLog.__table__
+    rollups = InferenceRollup.__table__
+    step = timedelta(minutes=slice_minutes)
+    start = minute_bucket(start) if start is not None else None
+    total = 0
+    while True:
+        remaining = []
+        if start is not None:
+            remaining.append(table.c.timestamp >= start)
+        if end is not None:
+            remaining.append(table.c.timestamp < end)
+        with bind.connect() as connection:
+            next_timestamp = connection.execute(select(func.min(table.c.timestamp)).where(*remaining)).scalar()
+
+        if next_timestamp is None:
+            if start is not None and end is not None and start < end:
+                # Rollups past the last raw row of the range have nothing left to back them
+                with bind.begin() as connection:
+                    connection.execute(
+                        rollups.delete().where((rollups.c.bucket_start >= start) & (rollups.c.bucket_start < end))
+                    )
+            return total
+
+        if start is None:
+            start = minute_bucket(next_timestamp)
+        slice_end = minute_bucket(next_timestamp) + step
+        if end is not None:
+            slice_end = min(slice_end, end)
+
+        # The slice's rollups, including those of a skipped empty stretch before it, are
+        # replaced in one transaction
+        with bind.begin() as connection:
+            connection.execute(
+                rollups.delete().where((rollups.c.bucket_start >= start) & (rollups.c.bucket_start < slice_end))
+            )
+            last_id = 0
+            while True:
+                rows = connection.execute(
+                    select(
+                        table.c.id, table.c.timestamp, table.c.language,
+                        table.c.classification, table.c.confidence_score, table.c.response_time_ms
+                    )
+                    .where((table.c.timestamp >= start) & (table.c.timestamp < slice_end))
+                    .where(table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(chunk_size)
+                ).mappings().all()
+                if not rows:
+                    break
+                update_rollups(connection, rows)
+                last_id = rows[-1]["id"]
+                total += len(rows)
+
+        start = slice_end
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def query_stats(
+    connection: Connection,
+    start: datetime,
+    end: datetime,
+    bucket_minutes: int,
+    language: Optional[str] = None
+) -> Dict:
+    """
+    Traffic statistics between start and end from the per-minute rollups
+
+    Buckets are aligned to multiples of bucket_minutes since the Unix epoch (UTC).
+
+    Returns:
+        Overall, per-language and per-(bucket, language) summaries with counts,
+        AI/human split, confidence histogram and response time percentiles
+    """
+    bucket = timedelta(minutes=bucket_minutes)
+    first_bucket = _EPOCH + ((start - _EPOCH) // bucket) * bucket
+
+    table = InferenceRollup.__table__
+    query = select(table).where(table.c.bucket_start >= minute_bucket(start)).where(table.c.bucket_start < end)
+    if language is not None:
+        query = query.where(table.c.language == language)
+
+    overall = _Summary()
+    by_language: Dict[str, _Summary] = defaultdict(_Summary)
+    by_bucket: Dict[Tuple[datetime, str], _Summary] = defaultdict(_Summary)
+    for row in connection.execute(query):
+        cell = _Aggregate.from_row(row)
+        bucket_start = first_bucket + ((row.bucket_start - first_bucket) // bucket) * bucket
+        overall.merge_cell(row.classification, cell)
+        by_language[row.language].merge_cell(row.classification, cell)
+        by_bucket[(bucket_start, row.language)].merge_cell(row.classification, cell)
+
+    buckets: List[Dict] = [
+        {"start": bucket_start.isoformat() + "Z", "language": bucket_language, **summary.summary()}
+        for (bucket_start, bucket_language), summary in sorted(by_bucket.items())
+    ]
+    return {
+        "start": start.isoformat() + "Z",
+        "end": end.isoformat() + "Z",
+        "bucketMinutes": bucket_minutes,
+        "confidenceBins": [round(i / CONFIDENCE_BINS, 2) for i in range(CONFIDENCE_BINS + 1)],
+        "overall": overall.summary(),
+        "byLanguage": {name: summary.summary() for name, summary in sorted(by_language.items())},
+        "buckets": buckets,
+    }
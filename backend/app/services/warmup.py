@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from ml_engine import get_classifier
+
+# Load the model and warm it up before serving (per worker process)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Load and warm up at import time, so gunicorn --preload does it once in the master
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "false").lower() == "true"
+
+
+class ModelWarmup:
+    """
+    Eager model load and warm-up, and the readiness state derived from it
+
+    The first prediction in a fresh process pays for loading the artifacts,
+    compiling librosa's numba kernels and building filterbanks and resampler
+    tables. run() does all of that with a synthetic clip, and the worker only
+    reports ready once it has finished. When it ran in a gunicorn --preload
+    master, forked workers inherit the warm state copy-on-write and start ready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.preloaded = False
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def run(self, preload: bool = False):
+        """Load the classifier and run the warm-up clip once (blocking; idempotent)"""
+        with self._lock:
+            if self.ready:
+                return
+
+            try:
+                start = time.perf_counter()
+                classifier = get_classifier()
+                self.load_seconds = time.perf_counter() - start
+                self.warmup_seconds = classifier.warm_up()
+            except Exception as e:
+                self.error = str(e)
+                print(f"Model warm-up failed: {self.error}")
+                return
+
+            self.error = None
+            self.preloaded = preload
+            self.ready = True
+            print(
+                f"Model warmed up in {self.warmup_seconds * 1000:.0f} ms "
+                f"(load {self.load_seconds * 1000:.0f} ms{', preloaded' if preload else ''})"
+            )
+
+    def mark_ready(self):
+        """Report ready without warming up (WARMUP_ENABLED=false)"""
+        self.ready = True
+
+    def metrics(self) -> Dict:
+        """Readiness, warm-up timings and the last warm-up error"""
+        return {
+            "ready": self.ready,
+            "preloaded": self.preloaded,
+            "loadMs": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+            "warmupMs": round(self.warmup_seconds * 1000, 1) if self.warmup_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+# Singleton instance for reuse
+_warmup_instance = None
+
+
+def get_model_warmup() -> ModelWarmup:
+    """Get or create the warm-up state of this process"""
+    global _warmup_instance
+    if _warmup_instance is None:
+        _warmup_instance = ModelWarmup()
+    return _warmup_instance
@@ -1,11 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from .app.api import router
+from .app.core import MetricsMiddleware, render_metrics, SERVER_TIMING_ENABLED, METRICS_CONTENT_TYPE
 from .app.models import init_db
+from .app.services import (
+    get_batcher,
+    start_extraction_pool,
+    shutdown_extraction_pool,
+    get_model_warmup,
+    get_inference_log_sink,
+    get_log_retention
+)
+from .app.services.warmup import WARMUP_ENABLED, MODEL_PRELOAD
+from .app.services.retention import LOG_RETENTION_INTERVAL_HOURS, run_retention_periodically
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import sys
 from pathlib import Path
 
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 import sys
 from pathlib import Path
 import os # Import the os module
@@ -16,17 +30,49 @@ project_root = Path(__file__).parent.parent.resolve()
 os.chdir(project_root)
 # print(f"INFO: Changed working directory to: {os.getcwd()}") # Removed after confirmation
 
+# With gunicorn --preload this runs once in the master; workers fork with the model loaded and warm
+if MODEL_PRELOAD:
+    get_model_warmup().run(preload=True)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan context manager.
-    Initializes database on startup.
+    Initializes database and extraction workers on startup and warms up the
+    model in the background (/api/ready reports when it is done). Starts the
+    periodic inference log retention job if LOG_RETENTION_INTERVAL_HOURS is
+    set. Stops the inference batcher and worker processes and flushes
+    buffered inference logs on shutdown.
     """
     init_db()
     print("Database initialized successfully")
+    start_extraction_pool()
+    
+    warmup = get_model_warmup()
+    warmup_task = None
+    if WARMUP_ENABLED:
+        # The port opens right away for liveness checks; readiness waits for the warm-up
+        warmup_task = asyncio.create_task(run_in_threadpool(warmup.run))
+    else:
+        warmup.mark_ready()
+    retention_task = None
+    if LOG_RETENTION_INTERVAL_HOURS > 0:
+        # Every worker starts one; a file lock lets only one of them run at a time
+        retention_task = asyncio.create_task(
+            run_retention_periodically(get_log_retention(), LOG_RETENTION_INTERVAL_HOURS)
+        )
     print("BharatVox AI is ready to serve requests!")
     yield
-    # Can add shutdown logic here if needed
+    if retention_task is not None:
+        # Waits for a run in progress to finish its current transaction
+        retention_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await retention_task
+    if warmup_task is not None and not warmup_task.done():
+        await warmup_task
+    await get_batcher().close()
+    await get_inference_log_sink().close()
+    shutdown_extraction_pool()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -47,9 +93,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timings cover CORS handling too; Server-Timing is opt-in
+app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING_ENABLED)
+
 # Include API router
 app.include_router(router, prefix="/api", tags=["Voice Detection"])
 
+@app.get("/metrics", tags=["Root"], response_class=Response)
+async def prometheus_metrics():
+    """Prometheus metrics of this worker: stage and request histograms, in-flight, threadpool and admission gauges"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/api", tags=["Root"])
 async def api_root_get():
     """API root endpoint - GET"""
@@ -67,12 +122,8 @@ async def api_root_post(request: dict):
     API POST endpoint for direct voice detection.
     Accepts JSON body with: language, audio_format, audio_base64
     """
-    from .app.models import VoiceDetectionRequest
-    from .app.core import verify_api_key
-    from .app.services import decode_base64_audio, validate_audio_format
-    from ml_engine import get_classifier
-    from sqlalchemy.orm import Session
-    from .app.models import get_db, InferenceLog
+    from fastapi import HTTPException
+    from .app.services import decode_base64_audio, validate_audio_format, classify_audio, get_admission_controller
     import time
     
     try:
@@ -95,13 +146,13 @@ async def api_root_post(request: dict):
         
         start_time = time.time()
         
-        # Decode and validate audio
-        audio_bytes = decode_base64_audio(req_data["audioBase64"])
-        validate_audio_format(audio_bytes, req_data["audioFormat"])
-        
-        # Get classifier and predict
-        classifier = get_classifier()
-        classification, confidence_score, explanation = classifier.predict(audio_bytes)
+        # Same admission slot and inference path as /api/voice-detection
+        async with get_admission_controller().admit():
+            # Decode and validate audio
+            audio_bytes = await run_in_threadpool(decode_base64_audio, req_data["audioBase64"])
+            await run_in_threadpool(validate_audio_format, audio_bytes, req_data["audioFormat"])
+            
+            classification, confidence_score, explanation = await classify_audio(audio_bytes)
         
         response_time_ms = int((time.time() - start_time) * 1000)
         
@@ -114,6 +165,16 @@ async def api_root_post(request: dict):
             "responseTimeMs": response_time_ms
         }
         
+    except HTTPException as e:
+        if e.status_code in (429, 503):
+            # Saturation keeps its status code and Retry-After header
+            raise
+        return {
+            "status": "error",
+            "message": e.detail,
+            "code": e.status_code
+        }
+        
     except Exception as e:
         return {
             "status": "error",
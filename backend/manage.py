@@ -0,0 +1,80 @@
+"""
+Maintenance commands for the BharatVox AI database.
+
+Run from the project root:
+    python -m backend.manage rebuild-rollups
+    python -m backend.manage retention --days 30 --vacuum
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from .app.models import init_db
+from .app.models.database import engine
+from .app.services import LogRetention, rebuild_rollups
+from .app.services.retention import LOG_ARCHIVE_DIR, LOG_RETENTION_DAYS, LOG_RETENTION_DELETE_BATCH
+
+
+def cmd_rebuild_rollups(args):
+    """Recompute the per-minute rollups from the raw inference log"""
+    start = time.perf_counter()
+    # One transaction per slice, so the API can keep logging while this runs
+    rows = rebuild_rollups(engine, slice_minutes=args.slice_minutes, chunk_size=args.chunk_size)
+    print(f"Rolled up {rows} inference log rows in {time.perf_counter() - start:.1f}s")
+
+
+def cmd_retention(args):
+    """Archive inference log rows older than the retention window and delete them"""
+    retention = LogRetention(
+        retention_days=args.days,
+        archive_dir=args.archive_dir,
+        delete_batch_size=args.batch_size
+    )
+    summary = retention.run(dry_run=args.dry_run)
+    if summary["skipped"]:
+        print(f"Skipped: {summary['skipped']}")
+        return
+
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(
+        f"{verb} {summary['rowsArchived']} rows from {summary['days']} days before {summary['cutoff']} "
+        f"in {summary['seconds']:.1f}s"
+    )
+    for path in summary["files"]:
+        print(f"  {path}")
+
+    if args.vacuum and not args.dry_run and engine.dialect.name == "sqlite":
+        # VACUUM rewrites the whole file and blocks writers; run it in a quiet period
+        start = time.perf_counter()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+        print(f"Vacuumed database in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-rollups", help=cmd_rebuild_rollups.__doc__)
+    rebuild.add_argument("--chunk-size", type=int, default=50000, help="Log rows read per query")
+    rebuild.add_argument("--slice-minutes", type=int, default=60, help="Minutes of logs rebuilt per transaction")
+    rebuild.set_defaults(handler=cmd_rebuild_rollups)
+
+    retention = subparsers.add_parser("retention", help=cmd_retention.__doc__)
+    retention.add_argument("--days", type=int, default=LOG_RETENTION_DAYS, help="Full days of raw logs to keep")
+    retention.add_argument("--archive-dir", default=LOG_ARCHIVE_DIR, help="Directory for the gzipped CSV archives")
+    retention.add_argument(
+        "--batch-size", type=int, default=LOG_RETENTION_DELETE_BATCH, help="Rows deleted per transaction"
+    )
+    retention.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    retention.add_argument("--vacuum", action="store_true", help="Shrink the SQLite file afterwards")
+    retention.set_defaults(handler=cmd_retention)
+
+    args = parser.parse_args()
+    init_db()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
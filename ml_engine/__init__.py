@@ -1,5 +1,16 @@
 """ML Engine for BharatVox AI Voice Classification"""
 from .feature_extractor import AudioFeatureExtractor
+from .flat_forest import FlatForest
 from .inference import VoiceClassifier, get_classifier
+from .segments import SegmentFeatureExtractor
+from .vad import InsufficientSpeechError, VoiceActivityDetector
 
-__all__ = ["AudioFeatureExtractor", "VoiceClassifier", "get_classifier"]
+__all__ = [
+    "AudioFeatureExtractor",
+    "FlatForest",
+    "InsufficientSpeechError",
+    "SegmentFeatureExtractor",
+    "VoiceActivityDetector",
+    "VoiceClassifier",
+    "get_classifier",
+]
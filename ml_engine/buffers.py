@@ -0,0 +1,121 @@
+"""
+Reusable per-thread work buffers for feature extraction
+
+Every request used to allocate its STFT, magnitude, power, mel and HPSS arrays
+afresh, several megabytes each for a few seconds of audio. Handing the same
+memory back to the allocator and the kernel on every request costs page faults
+and fragments the heap. Each thread therefore keeps one growable array per
+named buffer and hands out views of it.
+
+The memory kept is bounded three ways:
+- an array larger than WORK_BUFFER_MAX_MB is allocated per call as before, so
+  one very long clip does not pin its memory
+- a thread keeps at most WORK_BUFFER_THREAD_MAX_MB across all its buffers and
+  drops the least recently used ones to make room
+- at most WORK_BUFFER_MAX_THREADS threads keep buffers at all; the others
+  allocate per call until a holder exits
+
+So the buffers never hold more than about WORK_BUFFER_MAX_THREADS x
+WORK_BUFFER_THREAD_MAX_MB, however many threads the server runs.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Largest array kept for reuse, in megabytes
+WORK_BUFFER_MAX_MB = float(os.getenv("WORK_BUFFER_MAX_MB", "16"))
+# Memory one thread keeps across all its buffers, in megabytes
+WORK_BUFFER_THREAD_MAX_MB = float(os.getenv("WORK_BUFFER_THREAD_MAX_MB", "64"))
+# Threads that keep buffers; extraction rarely runs on more threads than this at once
+WORK_BUFFER_MAX_THREADS = int(os.getenv("WORK_BUFFER_MAX_THREADS", str(2 * (os.cpu_count() or 1))))
+
+
+class WorkBuffers:
+    """Named scratch arrays that grow to the largest size requested and are then reused"""
+
+    def __init__(self, max_bytes: Optional[int] = None, max_total_bytes: Optional[int] = None):
+        self.max_bytes = int(WORK_BUFFER_MAX_MB * 1e6) if max_bytes is None else max_bytes
+        self.max_total_bytes = int(WORK_BUFFER_THREAD_MAX_MB * 1e6) if max_total_bytes is None else max_total_bytes
+        # Least recently used first
+        self._arrays: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype, order: str = "C") -> np.ndarray:
+        """
+        Uninitialised array of the given shape, backed by the named buffer
+
+        The contents are whatever the previous user left there, and the view is
+        only valid until the next get() of the same name on this thread.
+        """
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        nbytes = size * dtype.itemsize
+        if nbytes > self.max_bytes or nbytes > self.max_total_bytes:
+            return np.empty(shape, dtype=dtype, order=order)
+
+        array = self._arrays.get(name)
+        if array is None or array.dtype != dtype or array.size < size:
+            self._drop(name)
+            # Evicted arrays stay alive while a caller still holds a view of them
+            while self._nbytes + nbytes > self.max_total_bytes:
+                self._drop(next(iter(self._arrays)))
+            array = np.empty(size, dtype=dtype)
+            self._arrays[name] = array
+            self._nbytes += array.nbytes
+        else:
+            self._arrays.move_to_end(name)
+
+        flat = array[:size]
+        if order == "F":
+            return flat.reshape(shape[::-1]).T
+        return flat.reshape(shape)
+
+    def _drop(self, name: str):
+        array = self._arrays.pop(name, None)
+        if array is not None:
+            self._nbytes -= array.nbytes
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the buffers"""
+        return self._nbytes
+
+    def clear(self):
+        """Release every buffer"""
+        self._arrays.clear()
+        self._nbytes = 0
+
+
+_local = threading.local()
+_holders_lock = threading.Lock()
+_holders = 0
+# Handed to threads beyond WORK_BUFFER_MAX_THREADS; it keeps nothing, so sharing it is safe
+_unbuffered = WorkBuffers(max_bytes=0)
+
+
+def _release_holder():
+    global _holders
+    with _holders_lock:
+        _holders -= 1
+
+
+def thread_buffers() -> WorkBuffers:
+    """The calling thread's WorkBuffers, or a non-retaining one when too many threads hold buffers"""
+    global _holders
+    buffers = getattr(_local, "buffers", None)
+    if buffers is not None:
+        return buffers
+
+    with _holders_lock:
+        if _holders >= WORK_BUFFER_MAX_THREADS:
+            # Not cached: the thread gets its own buffers once a holder exits
+            return _unbuffered
+        _holders += 1
+    buffers = _local.buffers = WorkBuffers()
+    # Thread-local values are released when their thread exits
+    weakref.finalize(buffers, _release_holder)
+    return buffers
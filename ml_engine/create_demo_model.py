@@ -11,6 +11,9 @@ import joblib
 from pathlib import Path
 import sys
 
+from feature_extractor import AudioFeatureExtractor
+from flat_forest import FlatForest
+
 def create_demo_model():
     """Create a demo model with synthetic data for testing"""
     
@@ -90,12 +93,18 @@ def create_demo_model():
     # Save model and scaler
     model_path = model_dir / "voice_classifier.pkl"
     scaler_path = model_dir / "scaler.pkl"
+    feature_config_path = model_dir / "feature_config.json"
+    forest_path = model_dir / "voice_classifier.npz"
     
     joblib.dump(classifier, model_path)
     joblib.dump(scaler, scaler_path)
+    AudioFeatureExtractor().save_config(feature_config_path)
+    FlatForest.from_sklearn(classifier, scaler).save(forest_path)
     
     print(f"\nDemo model saved to: {model_path}")
     print(f"Demo scaler saved to: {scaler_path}")
+    print(f"Demo feature config saved to: {feature_config_path}")
+    print(f"Demo flat forest saved to: {forest_path}")
     
     print("\n" + "=" * 60)
     print("Demo model created successfully!")
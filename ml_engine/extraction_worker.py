@@ -0,0 +1,51 @@
+"""
+Feature extraction entry points for worker processes
+
+Each worker builds one AudioFeatureExtractor when it starts and keeps it for its
+lifetime. Audio is handed over through shared memory so the parent never has to
+pickle the clip into the worker's pipe.
+"""
+import os
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+
+from . import timing
+from .feature_extractor import AudioFeatureExtractor
+
+# Extractor owned by this worker process
+_worker_extractor = None
+
+
+def init_worker(feature_config: Dict):
+    """Process-pool initializer: build the extractor and warm up librosa's JIT kernels"""
+    global _worker_extractor
+    _worker_extractor = AudioFeatureExtractor(**feature_config)
+    _worker_extractor.warm_up()
+
+
+def worker_pid() -> int:
+    """Used to make the pool spawn and initialize every worker up front"""
+    return os.getpid()
+
+
+def extract_from_shared_memory(name: str, size: int) -> Tuple[np.ndarray, Dict[str, float]]:
+    """
+    Extract the feature vector of a clip stored in a shared memory block
+
+    Returns:
+        features: Feature vector in get_feature_names() order
+        timings: Seconds spent in each extraction stage, for the parent to record
+    """
+    # Decode from a copy: a failed decode's traceback would keep a view of the
+    # block alive, and close() would then raise BufferError over the real error
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        audio_bytes = bytes(block.buf[:size])
+    finally:
+        block.close()
+
+    with timing.collect() as timings:
+        features = _worker_extractor.extract_feature_array(audio_bytes)
+    return features, timings
@@ -0,0 +1,91 @@
+"""
+Approximate harmonic/percussive features straight from the power spectrogram
+
+The exact harmonic stage runs librosa's HPSS (two 2-D median filters over the
+full spectrogram) and two inverse STFTs, only to reduce the results to three
+scalars. This estimator keeps the same soft-mask separation but:
+
+- pools the spectrogram into FREQUENCY_POOLING-bin bands before filtering
+- runs each median filter as one 1-D filter over every row (or column) at
+  once, which scipy computes far faster than a 2-D footprint
+- skips the inverse STFTs: by Parseval, the energy of the masked signal is the
+  masked spectral energy divided by the STFT's window gain, and the mean
+  absolute value of each frame is estimated from its energy
+
+Everything is per frame, so whole clips, chunks with context frames and
+streams all produce the same values. tools/compare_hpss.py reports the error
+against the exact path.
+"""
+import librosa
+import numpy as np
+
+# STFT bins per band of the pooled spectrogram. Pooling 4 bins halves the cost
+# again but blurs harmonics into their neighbours and underestimates hnr by ~40%.
+FREQUENCY_POOLING = 2
+# Median filter lengths: librosa.decompose.hpss's 31 frames along time, and
+# 15 bands (30 bins) along frequency in place of its 31 bins
+TIME_KERNEL = 31
+FREQUENCY_KERNEL = 15
+# Frames needed on either side of a frame for its time median
+CONTEXT_FRAMES = TIME_KERNEL // 2
+# Mean absolute value relative to the RMS of a frame: Gaussian for the harmonic
+# part, Laplacian for the more impulsive percussive part
+HARMONIC_ABS_PER_RMS = float(np.sqrt(2.0 / np.pi))
+PERCUSSIVE_ABS_PER_RMS = float(np.sqrt(0.5))
+
+
+def median_filter_lines(x: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """
+    Median filter of every line of a 2-D array along one axis
+
+    Matches scipy.ndimage.median_filter with a 1-D footprint and mode="reflect",
+    but pads each line itself and filters them all in a single 1-D call.
+    """
+    # Imported on first use to keep scipy out of the API's import time
+    from scipy.ndimage import median_filter
+
+    half = size // 2
+    lines = np.moveaxis(x, axis, -1)
+    padded = np.pad(lines, [(0, 0), (half, half)], mode="symmetric")
+    filtered = median_filter(padded.ravel(), size=size).reshape(padded.shape)
+    return np.moveaxis(filtered[:, half:padded.shape[1] - half], -1, axis)
+
+
+def harmonic_frame_stats(power: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """
+    Per-frame harmonic and percussive estimates from an STFT power spectrogram
+
+    Frames need CONTEXT_FRAMES neighbours on either side (or the signal edge)
+    for their values to match those of the whole spectrogram.
+
+    Returns:
+        4 x frames array: harmonic energy, percussive energy, harmonic absolute
+        sum and percussive absolute sum, each for the hop of samples the frame
+        stands for
+    """
+    n_bins = power.shape[0]
+    edges = np.arange(0, n_bins, FREQUENCY_POOLING)
+    # One-sided spectrum: every bin but DC and Nyquist stands for two
+    pooled = 2.0 * np.add.reduceat(power, edges, axis=0, dtype=np.float64)
+    pooled[0] -= power[0]
+    if n_fft % 2 == 0:
+        pooled[-1] -= power[-1]
+
+    counts = np.diff(np.append(edges, n_bins))
+    magnitude = np.sqrt(pooled / counts[:, None]).astype(np.float32)
+    harmonic = median_filter_lines(magnitude, TIME_KERNEL, axis=1)
+    percussive = median_filter_lines(magnitude, FREQUENCY_KERNEL, axis=0)
+    mask_harmonic = librosa.util.softmask(harmonic, percussive, power=2.0, split_zeros=True)
+
+    # Parseval for a constant-overlap STFT: signal energy = spectral energy / window gain
+    window = librosa.filters.get_window("hann", n_fft, fftbins=True)
+    gain = n_fft * float(np.sum(window ** 2)) / hop_length
+    harmonic_energy = (mask_harmonic ** 2 * pooled).sum(axis=0) / gain
+    percussive_energy = ((1.0 - mask_harmonic) ** 2 * pooled).sum(axis=0) / gain
+
+    return np.vstack([
+        harmonic_energy,
+        percussive_energy,
+        HARMONIC_ABS_PER_RMS * np.sqrt(harmonic_energy * hop_length),
+        PERCUSSIVE_ABS_PER_RMS * np.sqrt(percussive_energy * hop_length)
+    ])
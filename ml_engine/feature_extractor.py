@@ -1,56 +1,408 @@
 import librosa
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple, Optional
 import io
+import json
 import soundfile as sf
+import soxr
+
+try:
+    from .buffers import WorkBuffers, thread_buffers
+    from .fast_hpss import harmonic_frame_stats
+    from .segments import SegmentFeatureExtractor
+    from .streaming import StreamingFeatureExtractor, stream_audio_blocks
+    from .timing import stage, timed
+    from .vad import InsufficientSpeechError, VoiceActivityDetector, mask_to_segments, sample_segments
+except ImportError:
+    # Imported as a top-level module by the training scripts
+    from buffers import WorkBuffers, thread_buffers
+    from fast_hpss import harmonic_frame_stats
+    from segments import SegmentFeatureExtractor
+    from streaming import StreamingFeatureExtractor, stream_audio_blocks
+    from timing import stage, timed
+    from vad import InsufficientSpeechError, VoiceActivityDetector, mask_to_segments, sample_segments
+
+# Constructor arguments that change the feature values and must match between
+# training and inference. They are saved next to the model artifacts.
+FEATURE_CONFIG_KEYS = (
+    "sample_rate", "n_mfcc", "n_fft", "hop_length", "pitch_estimator", "harmonic_estimator", "resample_type", "vad_trim"
+)
+
+# Constructor arguments that only tune serving and can differ between training and inference
+RUNTIME_OPTION_KEYS = ("streaming_min_seconds", "min_speech_seconds", "max_analysis_seconds")
+
+PITCH_ESTIMATORS = ("piptrack", "autocorr")
+
+# "hpss" separates the signals with librosa's HPSS and inverse STFTs; "fast"
+# estimates the same three features from the spectrogram (see fast_hpss.py)
+HARMONIC_ESTIMATORS = ("hpss", "fast")
+
+# Resamplers for clips whose rate differs from sample_rate, named as librosa's res_type.
+# soxr_hq is librosa.load's default. Changing it changes the features, so it is
+# part of the feature config and a model must be retrained to switch.
+RESAMPLE_TYPES = ("soxr_vhq", "soxr_hq", "soxr_mq", "soxr_lq", "soxr_qq", "polyphase")
+
+
+def resample(y: np.ndarray, source_rate: int, target_rate: int, resample_type: str = "soxr_hq") -> np.ndarray:
+    """Resample a mono float32 signal, trimmed or padded to the length librosa.resample(fix=True) returns"""
+    n_samples = int(np.ceil(len(y) * target_rate / source_rate))
+    if resample_type == "polyphase":
+        # Imported on first use: scipy.signal alone takes about a second to import
+        from scipy import signal
+        
+        gcd = np.gcd(int(source_rate), int(target_rate))
+        y = signal.resample_poly(y, target_rate // gcd, source_rate // gcd).astype(np.float32, copy=False)
+    else:
+        y = soxr.resample(y, source_rate, target_rate, quality=resample_type)
+    
+    if len(y) >= n_samples:
+        return y[:n_samples]
+    return np.pad(y, (0, n_samples - len(y)))
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only seekable file over a bytes-like object, reading it without a copy"""
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+
+
+class Spectrogram:
+    """Complex STFT of a clip plus the magnitude and power views derived from it"""
+    
+    def __init__(self, stft: np.ndarray, magnitude: Optional[np.ndarray] = None, power: Optional[np.ndarray] = None):
+        self.stft = stft
+        # Written into magnitude and power when work buffers are given
+        self.magnitude = np.abs(stft, out=magnitude)
+        self.power = np.square(self.magnitude, out=power)
+
+
+def _power_to_db_inplace(S: np.ndarray, amin: float = 1e-10, top_db: float = 80.0) -> np.ndarray:
+    """librosa.power_to_db(S) with ref=1.0, overwriting S"""
+    np.maximum(S, amin, out=S)
+    np.log10(S, out=S)
+    S *= 10.0
+    np.maximum(S, S.max() - top_db, out=S)
+    return S
+
+
+def _softmasks_inplace(harmonic: np.ndarray, percussive: np.ndarray, scratch: np.ndarray):
+    """
+    Overwrite two filtered magnitudes with their squared soft masks
+    
+    Matches librosa.util.softmask(power=2, split_zeros=True) in both directions,
+    as librosa.decompose.hpss computes them: both inputs are rescaled by their
+    maximum first, and bins where both are zero get 0.5 each.
+    """
+    peak = np.maximum(harmonic, percussive, out=scratch)
+    zeros = peak < np.finfo(peak.dtype).tiny
+    peak[zeros] = 1
+    for component in (harmonic, percussive):
+        np.divide(component, peak, out=component)
+        np.square(component, out=component)
+    total = np.add(harmonic, percussive, out=scratch)
+    total[zeros] = 1
+    harmonic /= total
+    percussive /= total
+    harmonic[zeros] = 0.5
+    percussive[zeros] = 0.5
 
 
 class AudioFeatureExtractor:
     """Extract audio features for ML classification"""
     
-    def __init__(self, sample_rate: int = 22050, n_mfcc: int = 13):
+    # Settings for the autocorrelation pitch estimator
+    _AUTOCORR_DECIMATION = 4
+    _AUTOCORR_FRAME_LENGTH = 256
+    _AUTOCORR_FMIN = 65.0
+    _AUTOCORR_FMAX = 400.0
+    _AUTOCORR_VOICING_THRESHOLD = 0.5
+    _AUTOCORR_ENERGY_FLOOR = 1e-3
+    
+    # librosa.piptrack's default search range and peak threshold
+    _PIPTRACK_FMIN = 150.0
+    _PIPTRACK_FMAX = 4000.0
+    _PIPTRACK_THRESHOLD = 0.1
+    
+    # Length of the chunks kept when a clip is capped to max_analysis_seconds
+    _ANALYSIS_SEGMENT_SECONDS = 5.0
+    
+    def __init__(
+        self,
+        sample_rate: int = 22050,
+        n_mfcc: int = 13,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        pitch_estimator: str = "piptrack",
+        harmonic_estimator: str = "hpss",
+        resample_type: str = "soxr_hq",
+        vad_trim: bool = False,
+        shared_stft: bool = True,
+        reuse_buffers: bool = True,
+        streaming_min_seconds: Optional[float] = None,
+        min_speech_seconds: Optional[float] = None,
+        max_analysis_seconds: Optional[float] = None
+    ):
+        if pitch_estimator not in PITCH_ESTIMATORS:
+            raise ValueError(
+                f"Unknown pitch estimator: {pitch_estimator}. Choose one of {', '.join(PITCH_ESTIMATORS)}"
+            )
+        if harmonic_estimator not in HARMONIC_ESTIMATORS:
+            raise ValueError(
+                f"Unknown harmonic estimator: {harmonic_estimator}. Choose one of {', '.join(HARMONIC_ESTIMATORS)}"
+            )
+        if resample_type not in RESAMPLE_TYPES:
+            raise ValueError(
+                f"Unknown resample type: {resample_type}. Choose one of {', '.join(RESAMPLE_TYPES)}"
+            )
+        
         self.sample_rate = sample_rate
         self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.pitch_estimator = pitch_estimator
+        self.harmonic_estimator = harmonic_estimator
+        # Part of the feature config: a model only sees audio resampled the way it was trained
+        self.resample_type = resample_type
+        # Compute the STFT once per clip and reuse it across all spectral stages
+        self.shared_stft = shared_stft
+        # Keep the large per-request arrays in per-thread buffers (see buffers.py)
+        self.reuse_buffers = reuse_buffers
+        # Clips at least this long are decoded and analysed block by block
+        self.streaming_min_seconds = streaming_min_seconds
+        # Voice-activity gating ahead of the expensive stages (see gate_audio)
+        self.vad_trim = vad_trim
+        self.min_speech_seconds = min_speech_seconds
+        self.max_analysis_seconds = max_analysis_seconds
+        self.vad = VoiceActivityDetector()
+        self._mel_basis: Dict[int, np.ndarray] = {}
+    
+    def get_config(self) -> Dict:
+        """Get the settings that determine feature values"""
+        return {key: getattr(self, key) for key in FEATURE_CONFIG_KEYS}
+    
+    def get_runtime_options(self) -> Dict:
+        """Get the serving options, e.g. to build an identical extractor in a worker process"""
+        return {key: getattr(self, key) for key in RUNTIME_OPTION_KEYS}
+    
+    def save_config(self, path) -> None:
+        """Save the feature settings so inference can rebuild an identical extractor"""
+        with open(path, "w") as f:
+            json.dump(self.get_config(), f, indent=2)
+    
+    @classmethod
+    def from_config_file(cls, path, **kwargs) -> "AudioFeatureExtractor":
+        """Create an extractor from a saved feature config"""
+        with open(path) as f:
+            config = json.load(f)
+        unknown = set(config) - set(FEATURE_CONFIG_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown feature config keys in {path}: {', '.join(sorted(unknown))}")
+        config.update(kwargs)
+        return cls(**config)
     
     def load_audio_from_bytes(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
-        """Load audio from bytes"""
+        """Load audio from bytes or any bytes-like buffer (e.g. a memoryview) without copying it"""
+        try:
+            return self._decode_soundfile(audio_bytes)
+        except sf.LibsndfileError:
+            # Formats libsndfile cannot read go through librosa's audioread fallback
+            pass
+        
         try:
-            audio_io = io.BytesIO(audio_bytes)
-            y, sr = librosa.load(audio_io, sr=self.sample_rate, mono=True)
+            audio_io = _BufferReader(audio_bytes)
+            with stage("decode"):
+                y, sr = librosa.load(audio_io, sr=self.sample_rate, mono=True, res_type=self.resample_type)
             return y, sr
         except Exception as e:
             raise ValueError(f"Failed to load audio: {str(e)}")
     
-    def extract_mfcc_features(self, y: np.ndarray, sr: int) -> np.ndarray:
+    def _decode_soundfile(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+        """
+        Decode with libsndfile (MP3, WAV, FLAC, OGG) straight to mono float32
+        
+        Produces the same samples as librosa.load(sr=sample_rate, mono=True,
+        res_type=resample_type) without importing librosa's audio module and the
+        scipy/numba stack behind it. Clips already at sample_rate are not resampled.
+        """
+        with stage("decode"):
+            with sf.SoundFile(_BufferReader(audio_bytes)) as f:
+                source_rate = f.samplerate
+                y = f.read(dtype="float32", always_2d=True)
+            y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+        
+        if source_rate != self.sample_rate:
+            with stage("resample"):
+                y = resample(y, source_rate, self.sample_rate, self.resample_type)
+        return np.ascontiguousarray(y), self.sample_rate
+    
+    @timed("vad")
+    def gate_audio(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Trim silence, reject clips without enough speech and cap the analysed length
+        
+        Runs an energy/ZCR voice-activity detector (a few milliseconds even for
+        long clips) before HPSS and pitch tracking see the signal:
+        - vad_trim: keep only the speech segments, dropping leading/trailing
+          silence and long pauses
+        - min_speech_seconds: raise InsufficientSpeechError below this much speech
+        - max_analysis_seconds: keep evenly spread chunks of the (trimmed) clip
+          totalling this length, preferring the chunks with the most speech
+        
+        Raises:
+            InsufficientSpeechError: If the clip has less speech than min_speech_seconds
+        """
+        if not self.vad_trim and self.min_speech_seconds is None and self.max_analysis_seconds is None:
+            return y
+        
+        mask, hop, segments, speech_seconds = self._detect_speech(y, sr)
+        self._require_speech(speech_seconds)
+        
+        if self.vad_trim and segments:
+            y = np.concatenate([y[start:end] for start, end in segments])
+            # Everything left is speech
+            mask = None
+        
+        if self.max_analysis_seconds is not None:
+            y = sample_segments(y, sr, self.max_analysis_seconds, self._ANALYSIS_SEGMENT_SECONDS, mask, hop)
+        return y
+    
+    def _detect_speech(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, int, List[Tuple[int, int]], float]:
+        """Speech mask, frame hop, speech segments (in samples) and seconds of speech of a signal"""
+        mask, hop = self.vad.speech_mask(y, sr)
+        segments = mask_to_segments(mask, hop, len(y))
+        return mask, hop, segments, sum(end - start for start, end in segments) / sr
+    
+    def _require_speech(self, speech_seconds: float):
+        """Raise InsufficientSpeechError when a clip has less speech than min_speech_seconds"""
+        if self.min_speech_seconds is not None and speech_seconds < self.min_speech_seconds:
+            raise InsufficientSpeechError(speech_seconds, self.min_speech_seconds)
+    
+    @timed("stft")
+    def compute_spectrogram(self, y: np.ndarray, buffers: Optional[WorkBuffers] = None) -> Spectrogram:
+        """
+        Compute the STFT shared by the MFCC, spectral, pitch and harmonic stages
+        
+        With buffers, the STFT, magnitude and power are written into them and
+        are only valid until the same thread computes the next spectrogram.
+        """
+        if buffers is None:
+            stft = librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length)
+            return Spectrogram(stft)
+        
+        # Frames of a centered STFT; Fortran order like librosa's own output
+        n_frames = 1 + (len(y) + 2 * (self.n_fft // 2) - self.n_fft) // self.hop_length
+        shape = (1 + self.n_fft // 2, n_frames)
+        stft = librosa.stft(
+            y, n_fft=self.n_fft, hop_length=self.hop_length,
+            out=buffers.get("stft", shape, librosa.util.dtype_r2c(y.dtype), order="F")
+        )
+        return Spectrogram(
+            stft,
+            magnitude=buffers.get("magnitude", shape, y.dtype, order="F"),
+            power=buffers.get("power", shape, y.dtype, order="F")
+        )
+    
+    def _work_buffers(self) -> WorkBuffers:
+        """This thread's work buffers, or throwaway ones that allocate on every call"""
+        return thread_buffers() if self.reuse_buffers else WorkBuffers(max_bytes=0)
+    
+    def _get_mel_basis(self, sr: int) -> np.ndarray:
+        """Get the mel filterbank for a sample rate, building it on first use"""
+        if sr not in self._mel_basis:
+            self._mel_basis[sr] = librosa.filters.mel(sr=sr, n_fft=self.n_fft)
+        return self._mel_basis[sr]
+    
+    @timed("mfcc")
+    def extract_mfcc_features(self, y: np.ndarray, sr: int, spec: Optional[Spectrogram] = None) -> np.ndarray:
         """Extract MFCC features"""
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=self.n_mfcc)
+        if spec is not None:
+            mel_basis = self._get_mel_basis(sr)
+            mel = self._work_buffers().get("mel", (mel_basis.shape[0], spec.power.shape[1]), spec.power.dtype)
+            np.matmul(mel_basis, spec.power, out=mel)
+            mfccs = librosa.feature.mfcc(S=_power_to_db_inplace(mel), n_mfcc=self.n_mfcc)
+        else:
+            mfccs = librosa.feature.mfcc(
+                y=y, sr=sr, n_mfcc=self.n_mfcc, n_fft=self.n_fft, hop_length=self.hop_length
+            )
         mfcc_mean = np.mean(mfccs, axis=1)
         mfcc_std = np.std(mfccs, axis=1)
         return np.concatenate([mfcc_mean, mfcc_std])
     
-    def extract_spectral_features(self, y: np.ndarray, sr: int) -> np.ndarray:
+    @timed("spectral")
+    def extract_spectral_features(self, y: np.ndarray, sr: int, spec: Optional[Spectrogram] = None) -> np.ndarray:
         """Extract spectral features"""
-        # Spectral centroid
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        spectral_centroid_mean = np.mean(spectral_centroids)
-        spectral_centroid_std = np.std(spectral_centroids)
+        if spec is not None:
+            spectral_centroids, spectral_rolloff, spectral_bandwidth = self._spectral_shape(spec.magnitude, sr)
+        else:
+            stft_kwargs = {"y": y, "sr": sr, "n_fft": self.n_fft, "hop_length": self.hop_length}
+            centroid = librosa.feature.spectral_centroid(**stft_kwargs)
+            spectral_centroids = centroid[0]
+            spectral_rolloff = librosa.feature.spectral_rolloff(**stft_kwargs)[0]
+            # Reuses the centroid instead of recomputing it
+            spectral_bandwidth = librosa.feature.spectral_bandwidth(**stft_kwargs, centroid=centroid)[0]
         
-        # Spectral rolloff
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-        spectral_rolloff_mean = np.mean(spectral_rolloff)
-        spectral_rolloff_std = np.std(spectral_rolloff)
+        return np.array([
+            np.mean(spectral_centroids), np.std(spectral_centroids),
+            np.mean(spectral_rolloff), np.std(spectral_rolloff),
+            np.mean(spectral_bandwidth), np.std(spectral_bandwidth)
+        ], dtype=np.float32)
+    
+    def _spectral_shape(self, S: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-frame spectral centroid, 85% rolloff and bandwidth of a magnitude spectrogram
         
-        # Spectral bandwidth
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-        spectral_bandwidth_mean = np.mean(spectral_bandwidth)
-        spectral_bandwidth_std = np.std(spectral_bandwidth)
+        Same definitions as librosa.feature.spectral_centroid/rolloff/bandwidth,
+        but the frequency-weighted sums are matrix products and the cumulative
+        energy and squared deviations share one work buffer, instead of
+        librosa's half a dozen spectrogram-sized temporaries.
+        """
+        buffers = self._work_buffers()
+        freq = librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
+        scratch = buffers.get("spectral_scratch", S.shape, S.dtype, order="F")
         
-        return np.array([
-            spectral_centroid_mean, spectral_centroid_std,
-            spectral_rolloff_mean, spectral_rolloff_std,
-            spectral_bandwidth_mean, spectral_bandwidth_std
-        ])
+        # Silent frames are left unnormalized, as by librosa.util.normalize
+        totals = S.sum(axis=0)
+        totals[totals < np.finfo(S.dtype).tiny] = 1
+        centroid = (freq.astype(S.dtype) @ S) / totals
+        
+        # First bin where the cumulative energy reaches 85% of the frame's total
+        np.cumsum(S, axis=0, out=scratch)
+        reached = buffers.get("spectral_reached", S.shape, bool, order="F")
+        np.greater_equal(scratch, 0.85 * scratch[-1], out=reached)
+        rolloff = freq[reached.argmax(axis=0)]
+        
+        np.subtract(freq.astype(S.dtype)[:, None], centroid, out=scratch)
+        np.square(scratch, out=scratch)
+        scratch *= S
+        bandwidth = np.sqrt(scratch.sum(axis=0) / totals)
+        return centroid, rolloff, bandwidth
     
+    @timed("zcr")
     def extract_zero_crossing_rate(self, y: np.ndarray) -> np.ndarray:
         """Extract zero crossing rate features"""
         zcr = librosa.feature.zero_crossing_rate(y)[0]
@@ -58,20 +410,16 @@ class AudioFeatureExtractor:
         zcr_std = np.std(zcr)
         return np.array([zcr_mean, zcr_std])
     
-    def extract_pitch_features(self, y: np.ndarray, sr: int) -> np.ndarray:
+    @timed("pitch")
+    def extract_pitch_features(self, y: np.ndarray, sr: int, spec: Optional[Spectrogram] = None) -> np.ndarray:
         """Extract pitch-related features"""
         # Fundamental frequency estimation
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        
-        # Get pitch values where magnitude is high
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
+        if self.pitch_estimator == "autocorr":
+            pitch_values = self._estimate_f0_autocorr(y, sr)
+        else:
+            pitch_values = self._estimate_f0_piptrack(y, sr, spec)
         
-        if len(pitch_values) > 0:
+        if pitch_values.size > 0:
             pitch_mean = np.mean(pitch_values)
             pitch_std = np.std(pitch_values)
             pitch_variance = np.var(pitch_values)
@@ -80,51 +428,384 @@ class AudioFeatureExtractor:
         
         return np.array([pitch_mean, pitch_std, pitch_variance])
     
-    def extract_harmonic_features(self, y: np.ndarray, sr: int) -> np.ndarray:
+    def _estimate_f0_piptrack(self, y: np.ndarray, sr: int, spec: Optional[Spectrogram] = None) -> np.ndarray:
+        """Per-frame pitch of the strongest piptrack bin, keeping voiced frames only"""
+        frame_pitches = self._strongest_pitches(spec.magnitude, sr) if spec is not None else None
+        if frame_pitches is not None:
+            return frame_pitches[frame_pitches > 0]
+        
+        if spec is not None:
+            pitches, magnitudes = librosa.piptrack(
+                S=spec.magnitude, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )
+        else:
+            pitches, magnitudes = librosa.piptrack(
+                y=y, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )
+        
+        # Pick the pitch at the highest-magnitude bin of every frame in one gather
+        strongest_bins = magnitudes.argmax(axis=0)
+        frame_pitches = pitches[strongest_bins, np.arange(pitches.shape[1])]
+        return frame_pitches[frame_pitches > 0]
+    
+    def _strongest_pitches(self, S: np.ndarray, sr: int) -> Optional[np.ndarray]:
+        """
+        Pitch of the strongest librosa.piptrack peak of every frame, 0 when there is none
+        
+        Gives the same values as the argmax over librosa.piptrack's output, but
+        only builds the band of bins piptrack searches and only interpolates its
+        local peaks, instead of allocating about ten spectrogram-sized arrays.
+        Returns None when the band reaches the first or last bin, which piptrack
+        interpolates differently.
+        """
+        freq = librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
+        band = np.flatnonzero((freq >= self._PIPTRACK_FMIN) & (freq < min(self._PIPTRACK_FMAX, sr / 2)))
+        if len(band) == 0 or band[0] < 1 or band[-1] + 2 > S.shape[0]:
+            return None
+        lo, hi = int(band[0]), int(band[-1]) + 1
+        n_frames = S.shape[1]
+        buffers = self._work_buffers()
+        
+        # Local maxima along frequency of the spectrum zeroed below 10% of each frame's peak
+        neighbours = S[lo - 1:hi + 1]
+        above = buffers.get("pitch_above", neighbours.shape, bool, order="F")
+        np.greater(neighbours, self._PIPTRACK_THRESHOLD * S.max(axis=0), out=above)
+        thresholded = buffers.get("pitch_thresholded", neighbours.shape, S.dtype, order="F")
+        np.multiply(neighbours, above, out=thresholded)
+        peaks = buffers.get("pitch_peaks", (hi - lo, n_frames), bool, order="F")
+        not_below_next = buffers.get("pitch_not_below_next", (hi - lo, n_frames), bool, order="F")
+        np.greater(thresholded[1:-1], thresholded[:-2], out=peaks)
+        np.greater_equal(thresholded[1:-1], thresholded[2:], out=not_below_next)
+        peaks &= not_below_next
+        rows, cols = np.nonzero(peaks)
+        bins = rows + lo
+        
+        # Parabolic peak offset with librosa's stencil, which works in float64
+        below, center, after = S[bins - 1, cols], S[bins, cols], S[bins + 1, cols]
+        curvature = (after + below).astype(np.float64) - 2 * center.astype(np.float64)
+        slope = (after - below).astype(np.float64) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = np.where(np.abs(slope) >= np.abs(curvature), 0.0, -slope / curvature).astype(S.dtype)
+        # Interpolated peak height, S + 0.5 * gradient * shift, in float32 as piptrack
+        gradient = (after - below) / 2.0
+        magnitudes = buffers.get("pitch_magnitudes", (hi - lo, n_frames), S.dtype, order="F")
+        magnitudes.fill(0)
+        magnitudes[rows, cols] = center + 0.5 * gradient * shift
+        pitches = buffers.get("pitch_values", (hi - lo, n_frames), S.dtype, order="F")
+        pitches[rows, cols] = (bins + shift.astype(np.float64)) * float(sr) / self.n_fft
+        
+        # Bins outside the band are 0 in piptrack's output, so a frame whose best
+        # peak is not positive resolves to bin 0, which has no pitch
+        frames = np.arange(n_frames)
+        strongest = magnitudes.argmax(axis=0)
+        return np.where(magnitudes[strongest, frames] > 0, pitches[strongest, frames], 0).astype(S.dtype)
+    
+    def _estimate_f0_autocorr(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Cheap F0 estimate from the normalized autocorrelation, keeping voiced frames only"""
+        f0, voiced, _ = self._autocorr_f0_track(y, sr)
+        return f0[voiced]
+    
+    def _autocorr_f0_track(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-frame F0 from the normalized autocorrelation of a decimated signal
+        
+        Every frame is autocorrelated at once through an FFT, the strongest lag in
+        the speech pitch range is refined with parabolic interpolation, and frames
+        that are quiet or not periodic enough are treated as unvoiced.
+        
+        Returns:
+            f0: Pitch of every frame in Hz
+            voiced: Mask of the frames with a usable pitch
+            centers: Center of every frame, in samples of y
+        """
+        # Imported on first use: scipy.signal alone takes about a second to import
+        from scipy import signal
+        
+        decimation = self._AUTOCORR_DECIMATION
+        y_dec = signal.resample_poly(y, 1, decimation)
+        sr_dec = sr / decimation
+        frame_length = self._AUTOCORR_FRAME_LENGTH
+        hop_length = max(1, self.hop_length // decimation)
+        
+        if len(y_dec) < frame_length:
+            empty = np.empty(0, dtype=np.float32)
+            return empty, np.zeros(0, dtype=bool), np.empty(0, dtype=np.int64)
+        
+        frames = librosa.util.frame(y_dec, frame_length=frame_length, hop_length=hop_length)
+        frames = frames - frames.mean(axis=0, keepdims=True)
+        
+        # Wiener-Khinchin: autocorrelation is the inverse FFT of the power spectrum
+        n_fft = 2 * frame_length
+        power = np.abs(np.fft.rfft(frames, n=n_fft, axis=0)) ** 2
+        max_lag = min(int(sr_dec / self._AUTOCORR_FMIN), frame_length - 2)
+        min_lag = max(int(sr_dec / self._AUTOCORR_FMAX), 2)
+        acf = np.fft.irfft(power, n=n_fft, axis=0)[:max_lag + 2]
+        
+        energy = acf[0]
+        acf = acf / np.maximum(energy, np.finfo(acf.dtype).tiny)
+        
+        frame_idx = np.arange(acf.shape[1])
+        best_lag = min_lag + acf[min_lag:max_lag + 1].argmax(axis=0)
+        peak = acf[best_lag, frame_idx]
+        
+        # Parabolic interpolation around the peak for sub-sample lag resolution
+        before = acf[best_lag - 1, frame_idx]
+        after = acf[best_lag + 1, frame_idx]
+        curvature = before - 2 * peak + after
+        is_peak = curvature < 0
+        offset = np.zeros_like(peak)
+        offset[is_peak] = 0.5 * (before[is_peak] - after[is_peak]) / curvature[is_peak]
+        
+        voiced = (peak > self._AUTOCORR_VOICING_THRESHOLD) & (
+            energy > self._AUTOCORR_ENERGY_FLOOR * energy.max()
+        )
+        f0 = sr_dec / (best_lag + offset)
+        centers = (frame_idx * hop_length + frame_length // 2) * decimation
+        return f0.astype(np.float32), voiced, centers
+    
+    @timed("harmonic")
+    def extract_harmonic_features(self, y: np.ndarray, sr: int, spec: Optional[Spectrogram] = None) -> np.ndarray:
         """Extract harmonic and percussive features"""
+        if self.harmonic_estimator == "fast":
+            return self._extract_harmonic_features_fast(y, spec)
+        
         # Separate harmonic and percussive components
-        y_harmonic, y_percussive = librosa.effects.hpss(y)
+        if spec is not None:
+            (harmonic_energy, harmonic_mean), (percussive_energy, percussive_mean) = self._hpss_stats(y, spec)
+        else:
+            y_harmonic, y_percussive = librosa.effects.hpss(
+                y, n_fft=self.n_fft, hop_length=self.hop_length
+            )
+            harmonic_energy = np.sum(y_harmonic ** 2)
+            percussive_energy = np.sum(y_percussive ** 2)
+            harmonic_mean = np.mean(np.abs(y_harmonic))
+            percussive_mean = np.mean(np.abs(y_percussive))
         
         # Calculate harmonic-to-noise ratio approximation
-        harmonic_energy = np.sum(y_harmonic ** 2)
-        percussive_energy = np.sum(y_percussive ** 2)
-        
         if percussive_energy > 0:
             hnr = harmonic_energy / percussive_energy
         else:
             hnr = harmonic_energy
         
-        harmonic_mean = np.mean(np.abs(y_harmonic))
-        percussive_mean = np.mean(np.abs(y_percussive))
+        return np.array([hnr, harmonic_mean, percussive_mean], dtype=np.float32)
+    
+    def _hpss_stats(self, y: np.ndarray, spec: Spectrogram) -> List[Tuple[float, float]]:
+        """
+        Energy and mean absolute value of the harmonic and percussive signals
+        
+        Same separation as librosa.decompose.hpss (31-frame/31-bin median filters,
+        squared soft masks), but the filtered magnitudes, masks, masked STFT and
+        inverse STFT are written into work buffers instead of a dozen temporaries.
+        """
+        # Imported on first use to keep scipy out of the API's import time
+        from scipy.ndimage import median_filter
+        
+        buffers = self._work_buffers()
+        shape = spec.magnitude.shape
+        harmonic = buffers.get("hpss_harmonic", shape, spec.magnitude.dtype, order="F")
+        percussive = buffers.get("hpss_percussive", shape, spec.magnitude.dtype, order="F")
+        median_filter(spec.magnitude, size=(1, 31), mode="reflect", output=harmonic)
+        median_filter(spec.magnitude, size=(31, 1), mode="reflect", output=percussive)
+        _softmasks_inplace(harmonic, percussive, buffers.get("hpss_scratch", shape, spec.magnitude.dtype, order="F"))
+        
+        masked = buffers.get("hpss_stft", shape, spec.stft.dtype, order="F")
+        signal = buffers.get("hpss_signal", (len(y),), y.dtype)
+        scratch = buffers.get("hpss_signal_scratch", (len(y),), y.dtype)
+        stats = []
+        for mask in (harmonic, percussive):
+            np.multiply(spec.stft, mask, out=masked)
+            librosa.istft(masked, n_fft=self.n_fft, hop_length=self.hop_length, length=len(y), dtype=y.dtype, out=signal)
+            # Accumulate in float64: these sums run over every sample of the clip
+            energy = float(np.square(signal, out=scratch).sum(dtype=np.float64))
+            mean_abs = float(np.abs(signal, out=scratch).mean(dtype=np.float64)) if len(y) else 0.0
+            stats.append((energy, mean_abs))
+        return stats
+    
+    def _extract_harmonic_features_fast(self, y: np.ndarray, spec: Optional[Spectrogram] = None) -> np.ndarray:
+        """Harmonic and percussive features estimated from the power spectrogram, without separating signals"""
+        power = spec.power if spec is not None else self.compute_spectrogram(y).power
+        harmonic_energy, percussive_energy, harmonic_abs, percussive_abs = harmonic_frame_stats(
+            power, self.n_fft, self.hop_length
+        ).sum(axis=1)
         
-        return np.array([hnr, harmonic_mean, percussive_mean])
+        hnr = harmonic_energy / percussive_energy if percussive_energy > 0 else harmonic_energy
+        n_samples = max(len(y), 1)
+        return np.array([hnr, harmonic_abs / n_samples, percussive_abs / n_samples], dtype=np.float32)
+    
+    def extract_feature_array(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        Extract all features from audio bytes as a contiguous float32 vector
+        
+        Returns:
+            Feature vector in get_feature_names() order, ready for the classifier
+        """
+        # Long recordings take the bounded-memory streaming path
+        if self.streaming_min_seconds is not None:
+            duration = self.get_duration(audio_bytes)
+            if duration is not None and duration >= self.streaming_min_seconds:
+                features, _ = self.extract_all_features_streaming(audio_bytes)
+                return np.array([features[name] for name in self.get_feature_names()], dtype=np.float32)
+        
+        # Load audio, then drop silence and cap the length before the expensive stages
+        y, sr = self.load_audio_from_bytes(audio_bytes)
+        y = self.gate_audio(y, sr)
+        
+        # Compute the STFT once and share it across the spectral stages
+        buffers = thread_buffers() if self.reuse_buffers else None
+        spec = self.compute_spectrogram(y, buffers) if self.shared_stft else None
+        
+        # Concatenate all feature sets in the order the classifier expects
+        return np.concatenate([
+            self.extract_mfcc_features(y, sr, spec),
+            self.extract_spectral_features(y, sr, spec),
+            self.extract_zero_crossing_rate(y),
+            self.extract_pitch_features(y, sr, spec),
+            self.extract_harmonic_features(y, sr, spec)
+        ], dtype=np.float32)
     
     def extract_all_features(self, audio_bytes: bytes) -> Dict[str, float]:
         """Extract all features from audio bytes and return as a dictionary"""
-        # Load audio
+        return self.features_to_dict(self.extract_feature_array(audio_bytes))
+    
+    def features_to_dict(self, features: np.ndarray) -> Dict[str, float]:
+        """Name the values of a feature vector, e.g. for explanations"""
+        return dict(zip(self.get_feature_names(), features.tolist()))
+    
+    @timed("segments")
+    def extract_segment_features(
+        self,
+        audio_bytes: bytes,
+        window_seconds: float = 4.0,
+        hop_seconds: float = 2.0,
+        max_workers: Optional[int] = None,
+        executor=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Extract the features of overlapping windows of a clip in one vectorized pass
+        
+        The frame-level tracks are computed once (in parallel chunks for long
+        clips) and every window's features are derived from them, so the cost
+        barely grows with the overlap. See ml_engine/segments.py.
+        
+        Args:
+            audio_bytes: Raw audio file bytes
+            window_seconds: Window length
+            hop_seconds: Time between window starts
+            max_workers: Threads for the chunk analysis (defaults to one per core)
+            executor: Run the chunks on this executor instead, e.g. a process pool
+            
+        Returns:
+            bounds: N x 2 array of window (start, end) times in seconds
+            features: N x 40 matrix, columns in get_feature_names() order
+            
+        Raises:
+            InsufficientSpeechError: If the clip has less speech than min_speech_seconds
+        """
         y, sr = self.load_audio_from_bytes(audio_bytes)
+        # The timeline keeps its timestamps: no trimming, and the cap keeps the
+        # first max_analysis_seconds instead of chunks spread over the clip
+        if self.min_speech_seconds is not None:
+            with stage("vad"):
+                self._require_speech(self._detect_speech(y, sr)[3])
+        if self.max_analysis_seconds is not None:
+            y = y[:int(self.max_analysis_seconds * sr)]
+        segments = SegmentFeatureExtractor(self, window_seconds=window_seconds, hop_seconds=hop_seconds)
+        return segments.extract(y, max_workers=max_workers, executor=executor)
+    
+    @timed("streaming")
+    def extract_all_features_streaming(
+        self,
+        audio_source,
+        window_seconds: Optional[float] = None,
+        block_seconds: float = 10.0
+    ) -> Tuple[Dict[str, float], List[Dict]]:
+        """
+        Extract all features while decoding the audio block by block
         
-        # Extract all feature sets
-        mfcc_features = self.extract_mfcc_features(y, sr)
-        spectral_features = self.extract_spectral_features(y, sr)
-        zcr_features = self.extract_zero_crossing_rate(y)
-        pitch_features = self.extract_pitch_features(y, sr)
-        harmonic_features = self.extract_harmonic_features(y, sr)
-        
-        # Concatenate all features into a single array to maintain order for scaler
-        all_features_array = np.concatenate([
-            mfcc_features,
-            spectral_features,
-            zcr_features,
-            pitch_features,
-            harmonic_features
-        ])
-
-        # Create a dictionary of features
-        feature_names = self.get_feature_names()
-        all_features_dict = dict(zip(feature_names, all_features_array))
+        Memory stays bounded by the block size rather than the clip length. The
+        summary features match extract_all_features (see ml_engine/streaming.py
+        for the MFCC caveat on clips longer than the retention window).
+        
+        Args:
+            audio_source: Audio bytes, a bytes-like buffer or a file path
+            window_seconds: Also return features for consecutive windows of this length
+            block_seconds: Length of each decoded block
+            
+        The voice-activity gate runs block by block: with vad_trim only the
+        speech of each block is analysed (window times then refer to the trimmed
+        audio), and decoding stops once max_analysis_seconds have been analysed.
+        
+        Returns:
+            features: Summary features of the whole clip
+            windows: Per-window {"start", "end", "features"} dicts
+            
+        Raises:
+            InsufficientSpeechError: If the analysed audio has less speech than min_speech_seconds
+        """
+        if not isinstance(audio_source, str):
+            audio_source = _BufferReader(audio_source)
+        
+        gated = self.vad_trim or self.min_speech_seconds is not None
+        max_samples = None if self.max_analysis_seconds is None else int(self.max_analysis_seconds * self.sample_rate)
+        decoded = analysed = 0
+        speech_seconds = 0.0
+        
+        stream = StreamingFeatureExtractor(self, window_seconds=window_seconds)
+        try:
+            for block in stream_audio_blocks(audio_source, self.sample_rate, block_seconds, self.resample_type):
+                decoded += len(block)
+                if gated:
+                    with stage("vad"):
+                        _, _, segments, block_speech = self._detect_speech(block, self.sample_rate)
+                    speech_seconds += block_speech
+                    if self.vad_trim:
+                        block = np.concatenate([block[start:end] for start, end in segments] or [block[:0]])
+                if max_samples is not None:
+                    block = block[:max_samples - analysed]
+                if len(block):
+                    stream.push(block)
+                    analysed += len(block)
+                if max_samples is not None and analysed >= max_samples:
+                    break
+        except Exception as e:
+            raise ValueError(f"Failed to load audio: {str(e)}")
+        
+        if decoded == 0:
+            raise ValueError("Failed to load audio: no samples decoded")
+        self._require_speech(speech_seconds)
+        if analysed == 0:
+            # vad_trim dropped every block
+            raise InsufficientSpeechError(speech_seconds, self.min_speech_seconds or self.vad.min_speech_seconds)
+        return stream.finish()
+    
+    def warm_up(self, duration_seconds: float = 1.0, source_rate: int = 16000) -> None:
+        """
+        Run a synthetic clip through the full extraction path
         
-        return all_features_dict
+        The first call of each librosa/numba stage compiles its kernels and the
+        decoder and resampler build their tables, which costs seconds. Doing it
+        once up front keeps that cost off the first real request. The clip is
+        encoded as WAV at a rate other than the model's so resampling is warmed too.
+        A syllable-rate envelope makes the voice-activity gate see it as speech.
+        """
+        if self.min_speech_seconds is not None:
+            duration_seconds = max(duration_seconds, 2 * self.min_speech_seconds)
+        t = np.arange(int(duration_seconds * source_rate)) / source_rate
+        pitch = 150 + 20 * np.sin(2 * np.pi * 3 * t)
+        envelope = 0.5 - 0.5 * np.cos(2 * np.pi * 4 * t)
+        y = 0.1 * envelope * np.sin(2 * np.pi * np.cumsum(pitch) / source_rate)
+        y += 0.01 * np.random.default_rng(0).standard_normal(len(y))
+        
+        buffer = io.BytesIO()
+        sf.write(buffer, y.astype(np.float32), source_rate, format="WAV")
+        self.extract_all_features(buffer.getvalue())
+    
+    def get_duration(self, audio_bytes: bytes) -> Optional[float]:
+        """Duration of encoded audio in seconds from its header, or None if it cannot be read"""
+        try:
+            return sf.info(_BufferReader(audio_bytes)).duration
+        except Exception:
+            return None
     
     def get_feature_names(self) -> list:
         """Get names of all features"""
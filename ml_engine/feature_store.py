@@ -0,0 +1,291 @@
+"""
+On-disk feature store and parallel extraction for model training
+
+Extracted feature vectors are kept in NumPy shards next to a JSON manifest that
+records, per audio file, its size, modification time and content hash. A
+training run only extracts files that are new or changed since the last run;
+everything else is read back from the memory-mapped shards. The store is tied to
+the feature settings, so changing them starts a fresh store.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .feature_extractor import AudioFeatureExtractor
+except ImportError:
+    # Imported as a top-level module by the training scripts
+    from feature_extractor import AudioFeatureExtractor
+
+
+def file_hash(audio_bytes: bytes) -> str:
+    """Content hash used to recognise files that were touched but not changed"""
+    return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+
+class FeatureStore:
+    """
+    Feature vectors of a training corpus, cached across training runs
+
+    Layout of the store directory:
+        manifest.json        feature settings, feature names and one entry per file
+        features-NNNNN.npy   shards of feature rows, loaded with mmap_mode="r"
+
+    Every save() writes the rows added since the previous save as a new shard,
+    so checkpoints during a long extraction are cheap. compact() rewrites the
+    live rows into a single shard once replaced rows pile up.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, directory, feature_config: Dict, feature_names: List[str]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.feature_config = feature_config
+        self.feature_names = feature_names
+
+        self._entries: Dict[str, Dict] = {}
+        self._shards: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def _load(self):
+        manifest_path = self.directory / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            return
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        if manifest.get("feature_config") != self.feature_config or manifest.get("feature_names") != self.feature_names:
+            print(f"Feature settings changed; starting a new feature store in {self.directory}")
+            self._dirty = True
+            return
+
+        self._entries = manifest["entries"]
+        for shard in {entry["shard"] for entry in self._entries.values()}:
+            self._shards[shard] = np.load(self.directory / shard, mmap_mode="r")
+
+    def is_current(self, path: Path) -> bool:
+        """True when the stored features of path are still valid"""
+        entry = self._entries.get(self._key(path))
+        if entry is None:
+            return False
+
+        stat = os.stat(path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        # Same size, new mtime: the file may only have been touched or copied
+        with open(path, "rb") as f:
+            if file_hash(f.read()) != entry["hash"]:
+                return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def get(self, path: Path) -> np.ndarray:
+        """Stored feature vector of a file"""
+        key = self._key(path)
+        if key in self._pending:
+            return self._pending[key]
+        entry = self._entries[key]
+        # Copy the row so callers never hold a view into a shard that compact() may delete
+        return np.array(self._shards[entry["shard"]][entry["row"]])
+
+    def put(self, path: Path, vector: np.ndarray, content_hash: str, size: int, mtime_ns: int):
+        """Add or replace the feature vector of a file (written by the next save())"""
+        key = self._key(path)
+        self._pending[key] = np.asarray(vector, dtype=np.float64)
+        self._entries[key] = {"shard": None, "row": None, "size": size, "mtime_ns": mtime_ns, "hash": content_hash}
+        self._dirty = True
+
+    def prune(self, paths: Iterable[Path]) -> int:
+        """Forget files that are no longer part of the corpus; returns how many were dropped"""
+        keep = {self._key(path) for path in paths}
+        removed = [key for key in self._entries if key not in keep]
+        for key in removed:
+            del self._entries[key]
+            self._pending.pop(key, None)
+        if removed:
+            self._dirty = True
+        return len(removed)
+
+    def save(self):
+        """Write pending rows as a new shard and rewrite the manifest"""
+        if self._pending:
+            shard = self._next_shard_name()
+            keys = list(self._pending)
+            np.save(self.directory / shard, np.vstack([self._pending[key] for key in keys]))
+            for row, key in enumerate(keys):
+                self._entries[key].update(shard=shard, row=row)
+            self._shards[shard] = np.load(self.directory / shard, mmap_mode="r")
+            self._pending.clear()
+            self._dirty = True
+
+        if self._dirty:
+            self._write_manifest()
+            self._remove_unused_shards()
+            self._dirty = False
+
+    def compact(self, max_shards: int = 16, min_dead_fraction: float = 0.5):
+        """Rewrite all live rows into one shard when shards pile up or most stored rows are dead"""
+        self.save()
+        stored = sum(len(rows) for rows in self._shards.values())
+        dead = stored - len(self._entries)
+        if len(self._shards) <= max_shards and dead <= min_dead_fraction * stored:
+            return
+
+        for key in self._entries:
+            self._pending[key] = self.get(key)
+        self.save()
+
+    def _next_shard_name(self) -> str:
+        existing = [int(p.stem.split("-")[1]) for p in self.directory.glob("features-*.npy")]
+        return f"features-{max(existing, default=-1) + 1:05d}.npy"
+
+    def _write_manifest(self):
+        manifest = {
+            "feature_config": self.feature_config,
+            "feature_names": self.feature_names,
+            "entries": self._entries,
+        }
+        # Replace atomically so an interrupted run never leaves a truncated manifest
+        tmp_path = self.directory / (self.MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.directory / self.MANIFEST_FILE)
+
+    def _remove_unused_shards(self):
+        used = {entry["shard"] for entry in self._entries.values()}
+        for shard in list(self._shards):
+            if shard not in used:
+                del self._shards[shard]
+        for path in self.directory.glob("features-*.npy"):
+            if path.name not in used:
+                path.unlink()
+
+
+# Extractor owned by each worker process
+_worker_extractor = None
+
+
+def _init_worker(feature_config: Dict):
+    global _worker_extractor
+    _worker_extractor = AudioFeatureExtractor(**feature_config)
+
+
+def _extract_file(path: str) -> Tuple[str, Optional[np.ndarray], str, int, int, float, Optional[str]]:
+    """Worker task: read, hash and extract one file"""
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        audio_bytes = f.read()
+
+    try:
+        vector = _worker_extractor.extract_feature_array(audio_bytes)
+        duration = _worker_extractor.get_duration(audio_bytes) or 0.0
+        error = None
+    except Exception as e:
+        vector, duration, error = None, 0.0, str(e)
+
+    return path, vector, file_hash(audio_bytes), stat.st_size, stat.st_mtime_ns, duration, error
+
+
+class ProgressReport:
+    """Periodic progress and throughput lines for a long extraction"""
+
+    def __init__(self, total: int, interval_seconds: float = 5.0):
+        self.total = total
+        self.interval_seconds = interval_seconds
+        self.done = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self._start = time.perf_counter()
+        self._last_print = self._start
+
+    def update(self, audio_seconds: float, failed: bool = False):
+        self.done += 1
+        self.failed += int(failed)
+        self.audio_seconds += audio_seconds
+        now = time.perf_counter()
+        if now - self._last_print >= self.interval_seconds or self.done == self.total:
+            self._last_print = now
+            print(self.line())
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        return (
+            f"  [{self.done}/{self.total}] {rate:.1f} files/s, "
+            f"{self.audio_seconds / elapsed if elapsed > 0 else 0.0:.1f} s of audio/s, "
+            f"{self.failed} failed, elapsed {elapsed:.0f}s, ETA {eta:.0f}s"
+        )
+
+
+def extract_features_parallel(
+    paths: List[Path],
+    feature_config: Dict,
+    store: Optional[FeatureStore] = None,
+    workers: Optional[int] = None,
+    checkpoint_every: int = 500
+) -> Dict[str, np.ndarray]:
+    """
+    Feature vectors of a list of audio files, extracting only what the store lacks
+
+    Missing or changed files are extracted in a process pool and written to the
+    store every checkpoint_every files, so an interrupted run resumes where it
+    stopped. Files that fail to decode are reported and left out.
+
+    Returns:
+        Mapping from each path (as given) to its feature vector
+    """
+    results: Dict[str, np.ndarray] = {}
+    todo = []
+    for path in paths:
+        if store is not None and store.is_current(path):
+            results[str(path)] = store.get(path)
+        else:
+            todo.append(str(path))
+
+    print(f"Feature store: {len(results)} cached, {len(todo)} to extract")
+    if not todo:
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    progress = ProgressReport(len(todo))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(feature_config,)) as executor:
+        futures = [executor.submit(_extract_file, path) for path in todo]
+        for future in as_completed(futures):
+            path, vector, content_hash, size, mtime_ns, duration, error = future.result()
+            if error is not None:
+                print(f"Error processing {path}: {error}")
+                progress.update(0.0, failed=True)
+                continue
+
+            results[path] = vector
+            if store is not None:
+                store.put(path, vector, content_hash, size, mtime_ns)
+                if len(results) % checkpoint_every == 0:
+                    store.save()
+            progress.update(duration)
+
+    if store is not None:
+        store.compact()
+    return results
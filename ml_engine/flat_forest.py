@@ -0,0 +1,207 @@
+"""
+Random forest flattened into NumPy arrays for fast inference
+
+All trees are stored in one set of node arrays (split feature, threshold, left
+and right child, class probabilities), and the StandardScaler is folded into
+the thresholds, so raw feature vectors are classified without sklearn. Leaves
+point to themselves, which lets a batch of rows walk every tree in lockstep for
+a fixed number of steps.
+
+The arrays are saved as an uncompressed .npz and can be loaded memory-mapped,
+so every worker process on a host shares one read-only copy of the forest
+through the OS page cache instead of holding its own.
+"""
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+
+class FlatForest:
+    """Vectorized evaluator for an exported RandomForestClassifier"""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        max_depth: int
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None) -> "FlatForest":
+        """
+        Flatten a fitted RandomForestClassifier
+
+        Args:
+            forest: Fitted RandomForestClassifier
+            scaler: Fitted StandardScaler applied before the forest, or None
+
+        Returns:
+            FlatForest that takes unscaled feature vectors
+        """
+        n_features = forest.n_features_in_
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None:
+            if scaler.mean_ is not None:
+                mean = scaler.mean_
+            if scaler.scale_ is not None:
+                scale = scaler.scale_
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left < 0
+            node_ids = np.arange(offset, offset + n)
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            # (x - mean) / scale <= t  <=>  x <= t * scale + mean, as scale_ is always positive
+            threshold = np.where(is_leaf, np.inf, tree.threshold * scale[feature] + mean[feature])
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+            value = tree.value[:, 0, :]
+            value = value / value.sum(axis=1, keepdims=True)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.vstack(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(forest.classes_),
+            max_depth=max_depth
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities for an N x n_features matrix of unscaled features"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Class label per row"""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, path: Union[str, Path]):
+        """Write the arrays to an uncompressed .npz file"""
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            classes=self.classes_,
+            max_depth=np.array(self.max_depth)
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = False) -> "FlatForest":
+        """
+        Load a forest written by save()
+
+        Args:
+            path: .npz file
+            mmap: Map the node arrays read-only instead of reading them into
+                process memory; pages are shared by every process mapping the file
+        """
+        if mmap:
+            arrays = _mmap_npz(path)
+        else:
+            with np.load(path) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            value=arrays["value"],
+            roots=arrays["roots"],
+            classes=np.array(arrays["classes"]),
+            max_depth=int(arrays["max_depth"])
+        )
+
+    def max_probability_error(self, forest, scaler: Optional[object], X: np.ndarray) -> float:
+        """Largest absolute difference from sklearn's predict_proba on X"""
+        X_scaled = scaler.transform(X) if scaler is not None else X
+        return float(np.max(np.abs(self.predict_proba(X) - forest.predict_proba(X_scaled))))
+
+
+def _mmap_npz(path: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """
+    Memory-map the members of an uncompressed .npz file
+
+    np.load() cannot map .npz members, but np.savez stores them uncompressed, so
+    each .npy payload sits at a fixed offset in the archive and can be mapped in
+    place.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped; save it with np.savez")
+
+            # Skip the local file header (30 bytes + name + extra field) to the .npy payload
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            mapped = np.memmap(
+                path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                order="F" if fortran_order else "C"
+            )
+            # Plain ndarray views avoid np.memmap overhead on every fancy index
+            arrays[Path(info.filename).stem] = np.asarray(mapped)
+    return arrays
@@ -1,9 +1,16 @@
 import numpy as np
-import joblib
 from pathlib import Path
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from .feature_extractor import AudioFeatureExtractor
+from .flat_forest import FlatForest
+from .result_cache import ResultCache, fingerprint_files
+from .segments import aggregate_segments
+from .timing import timed
+import json
 import os
+import threading
+import time
 
 
 class VoiceClassifier:
@@ -19,25 +26,75 @@ class VoiceClassifier:
         "zcr_std_human": 0.01,
     }
     
-    def __init__(self, model_path: str = None, scaler_path: str = None):
-        self.feature_extractor = AudioFeatureExtractor()
-        self.feature_names = self.feature_extractor.get_feature_names()
-        
+    def __init__(
+        self,
+        model_path: str = None,
+        scaler_path: str = None,
+        feature_config_path: str = None,
+        result_cache: Optional[ResultCache] = None,
+        forest_path: str = None
+    ):
         # Load model and scaler
         if model_path is None:
             model_path = os.getenv("MODEL_PATH", "ml_engine/model_artifacts/voice_classifier.pkl")
         if scaler_path is None:
             scaler_path = os.getenv("SCALER_PATH", "ml_engine/model_artifacts/scaler.pkl")
-        
-        try:
-            self.classifier = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            print(f"Model loaded from: {model_path}")
-            print(f"Scaler loaded from: {scaler_path}")
-        except FileNotFoundError as e:
-            raise FileNotFoundError(
-                f"Model files not found. Please train the model first using train_model.py. Error: {str(e)}"
+        if feature_config_path is None:
+            feature_config_path = os.getenv(
+                "FEATURE_CONFIG_PATH", str(Path(model_path).with_name("feature_config.json"))
             )
+        if forest_path is None:
+            # Named after the model, so a custom MODEL_PATH never picks up another model's export
+            forest_path = os.getenv("FOREST_PATH", str(Path(model_path).with_suffix(".npz")))
+        
+        # Clips at least this long are analysed block by block with bounded memory;
+        # clips with less speech than MIN_SPEECH_SECONDS are rejected before extraction
+        # and at most MAX_ANALYSIS_SECONDS of a clip is analysed
+        runtime_options = {
+            "streaming_min_seconds": _optional_float_env("STREAMING_MIN_SECONDS"),
+            "min_speech_seconds": _optional_float_env("MIN_SPEECH_SECONDS"),
+            "max_analysis_seconds": _optional_float_env("MAX_ANALYSIS_SECONDS")
+        }
+        
+        # Rebuild the extractor with the settings the model was trained with
+        if Path(feature_config_path).exists():
+            self.feature_extractor = AudioFeatureExtractor.from_config_file(feature_config_path, **runtime_options)
+            print(f"Feature config loaded from: {feature_config_path}")
+        else:
+            self.feature_extractor = AudioFeatureExtractor(**runtime_options)
+            print(f"Feature config not found at {feature_config_path}, using default feature settings")
+        self.feature_names = self.feature_extractor.get_feature_names()
+        
+        # The flat export (scaler folded in) loads and evaluates much faster than the pickles
+        if Path(forest_path).exists():
+            # Mapped read-only, the arrays are shared by every worker process on the host
+            self.forest = FlatForest.load(forest_path, mmap=os.getenv("MODEL_MMAP", "true").lower() == "true")
+            model_files = (forest_path,)
+            print(f"Flat forest loaded from: {forest_path}")
+        else:
+            # joblib (and sklearn, while unpickling) are only needed for this fallback
+            import joblib
+            
+            try:
+                classifier = joblib.load(model_path)
+                scaler = joblib.load(scaler_path)
+                print(f"Model loaded from: {model_path}")
+                print(f"Scaler loaded from: {scaler_path}")
+            except FileNotFoundError as e:
+                raise FileNotFoundError(
+                    f"Model files not found. Please train the model first using train_model.py. Error: {str(e)}"
+                )
+            self.forest = FlatForest.from_sklearn(classifier, scaler)
+            model_files = (model_path, scaler_path)
+        
+        # Fingerprints tie cached results to the exact features and artifacts that produced them
+        # The analysis cap changes the features of long clips, so it is part of the fingerprint
+        self.feature_fingerprint = fingerprint_files(extra=json.dumps(
+            {**self.feature_extractor.get_config(), "max_analysis_seconds": self.feature_extractor.max_analysis_seconds},
+            sort_keys=True
+        ))
+        self.model_fingerprint = fingerprint_files(*model_files, extra=self.feature_fingerprint)
+        self.result_cache = result_cache
     
     def predict(self, audio_bytes: bytes) -> Tuple[str, float, str]:
         """
@@ -48,25 +105,240 @@ class VoiceClassifier:
             confidence_score: Probability score (0-1)
             explanation: Human-readable explanation
         """
-        # Extract features as a dictionary
-        features_dict = self.feature_extractor.extract_all_features(audio_bytes)
+        cache_key, features, result = self.lookup_cached(audio_bytes)
+        if result is not None:
+            return result
+        
+        if features is None:
+            features = self.extract_feature_array(audio_bytes)
+        
+        predictions, confidences = self.classify_features(features.reshape(1, -1))
+        result = self.build_result(predictions[0], confidences[0], features)
+        
+        self.store_cached(cache_key, features, result)
+        return result
+    
+    def predict_batch(
+        self, audio_batch: List[bytes], max_workers: Optional[int] = None
+    ) -> List[Union[Tuple[str, float, str], Exception]]:
+        """
+        Predict a batch of clips with a single scaler and forest pass
+        
+        Features are extracted in parallel, stacked into one N x 40 matrix and
+        classified together. A clip that fails does not affect the others.
+        
+        Returns:
+            One entry per input clip, in order: the (classification,
+            confidence_score, explanation) tuple returned by predict(), or the
+            exception raised while processing that clip
+        """
+        if not audio_batch:
+            return []
+        
+        def extract(audio_bytes: bytes):
+            try:
+                return self.extract_feature_array(audio_bytes)
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            extracted = list(executor.map(extract, audio_batch))
+        
+        results: List[Union[Tuple[str, float, str], Exception]] = list(extracted)
+        ok_indices = [i for i, item in enumerate(extracted) if not isinstance(item, Exception)]
+        if not ok_indices:
+            return results
+        
+        features = np.vstack([extracted[i] for i in ok_indices])
+        try:
+            predictions, confidences = self.classify_features(features)
+        except Exception as e:
+            for i in ok_indices:
+                results[i] = e
+            return results
+        
+        for row, i in enumerate(ok_indices):
+            results[i] = self.build_result(predictions[row], confidences[row], features[row])
+        
+        return results
+    
+    def predict_windows(
+        self, audio_bytes: bytes, window_seconds: float = 30.0
+    ) -> Tuple[Tuple[str, float, str], List[Dict]]:
+        """
+        Predict a long recording as a whole and window by window
+        
+        The clip is decoded and analysed block by block, and the summary vector
+        and every window vector are classified in a single pass.
+        
+        Returns:
+            result: (classification, confidence_score, explanation) for the whole clip
+            windows: One {"start", "end", "classification", "confidenceScore"} dict per window
+        """
+        features_dict, windows = self.feature_extractor.extract_all_features_streaming(
+            audio_bytes, window_seconds=window_seconds
+        )
+        features = np.vstack(
+            [self.features_to_array(features_dict)]
+            + [self.features_to_array(window["features"]) for window in windows]
+        )
+        predictions, confidences = self.classify_features(features)
         
-        # Convert feature dictionary to numpy array in the correct order for the scaler
-        features = np.array([features_dict[name] for name in self.feature_names])
-        features_scaled = self.scaler.transform(features.reshape(1, -1))
+        result = self.build_result(predictions[0], confidences[0], features[0])
+        window_results = [
+            {
+                "start": round(window["start"], 3),
+                "end": round(window["end"], 3),
+                "classification": "AI_GENERATED" if prediction == 0 else "HUMAN",
+                "confidenceScore": float(confidence),
+            }
+            for window, prediction, confidence in zip(windows, predictions[1:], confidences[1:])
+        ]
+        return result, window_results
+    
+    def predict_segments(
+        self,
+        audio_bytes: bytes,
+        window_seconds: float = 4.0,
+        hop_seconds: float = 2.0,
+        min_ai_seconds: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        executor=None
+    ) -> Tuple[Tuple[str, float, str], List[Dict]]:
+        """
+        Predict a clip as a timeline of overlapping windows
+        
+        All window features are extracted in one vectorized pass and scored
+        with a single forest call, which is much cheaper than calling predict()
+        on every window. The clip is AI_GENERATED when consecutive AI windows
+        span at least min_ai_seconds (default: two overlapping windows), so a
+        synthetic section spliced into human speech is not averaged away.
         
-        # Predict
-        prediction = self.classifier.predict(features_scaled)[0]
-        probabilities = self.classifier.predict_proba(features_scaled)[0]
+        Args:
+            audio_bytes: Raw audio file bytes
+            window_seconds: Window length
+            hop_seconds: Time between window starts
+            min_ai_seconds: Shortest AI span that makes the whole clip AI_GENERATED
+            max_workers: Threads for the chunk analysis of long clips
+            executor: Run the chunk analysis on this executor instead, e.g. a process pool
+            
+        Returns:
+            result: (classification, confidence_score, explanation) for the whole clip
+            segments: One {"start", "end", "classification", "confidenceScore",
+                "aiProbability"} dict per window, in time order
+        """
+        bounds, features = self.feature_extractor.extract_segment_features(
+            audio_bytes, window_seconds, hop_seconds, max_workers=max_workers, executor=executor
+        )
+        predictions, confidences = self.classify_features(features)
+        ai_probability = np.where(predictions == 0, confidences, 1.0 - confidences)
         
-        # Map prediction to classification
+        if min_ai_seconds is None:
+            min_ai_seconds = window_seconds + hop_seconds
+        is_ai, confidence, deciding = aggregate_segments(bounds, ai_probability, min_ai_seconds)
+        
+        # Explain the verdict from the average features of the windows behind it
+        classification, confidence_score, explanation = self.build_result(
+            0 if is_ai else 1, confidence, features[deciding].mean(axis=0)
+        )
+        if is_ai and len(deciding) < len(bounds):
+            explanation += f"; AI-generated audio from {bounds[deciding[0], 0]:.1f}s to {bounds[deciding[-1], 1]:.1f}s"
+        
+        segments = [
+            {
+                "start": round(float(start), 3),
+                "end": round(float(end), 3),
+                "classification": "AI_GENERATED" if prediction == 0 else "HUMAN",
+                "confidenceScore": float(window_confidence),
+                "aiProbability": float(probability),
+            }
+            for (start, end), prediction, window_confidence, probability in zip(
+                bounds, predictions, confidences, ai_probability
+            )
+        ]
+        return (classification, confidence_score, explanation), segments
+    
+    def warm_up(self) -> float:
+        """
+        Run a synthetic clip through extraction and the forest before serving
+        
+        Returns:
+            Seconds the warm-up took
+        """
+        start = time.perf_counter()
+        self.feature_extractor.warm_up()
+        self.classify_features(np.zeros((1, len(self.feature_names))))
+        return time.perf_counter() - start
+    
+    @timed("cache_lookup")
+    def lookup_cached(
+        self, audio_bytes: bytes
+    ) -> Tuple[Optional[str], Optional[np.ndarray], Optional[Tuple[str, float, str]]]:
+        """
+        Look up a clip in the result cache
+        
+        Returns:
+            cache_key: Content hash to pass to store_cached (None without a cache)
+            features: Cached feature vector, if extracted with the current settings
+            result: Cached prediction, if produced by the current model artifacts
+        """
+        if self.result_cache is None:
+            return None, None, None
+        
+        cache_key = ResultCache.audio_key(audio_bytes)
+        features, result = self.result_cache.lookup(
+            cache_key, self.model_fingerprint, self.feature_fingerprint
+        )
+        return cache_key, features, result
+    
+    @timed("cache_store")
+    def store_cached(self, cache_key: Optional[str], features: np.ndarray, result: Tuple[str, float, str]):
+        """Store a clip's feature vector and prediction under the key from lookup_cached"""
+        if self.result_cache is not None and cache_key is not None:
+            self.result_cache.store(
+                cache_key, self.model_fingerprint, self.feature_fingerprint, features, result
+            )
+    
+    def extract_features(self, audio_bytes: bytes) -> Dict[str, float]:
+        """Extract the named feature dictionary for a clip"""
+        return self.feature_extractor.extract_all_features(audio_bytes)
+    
+    def extract_feature_array(self, audio_bytes: bytes) -> np.ndarray:
+        """Extract a clip's float32 feature vector in the order the forest expects"""
+        return self.feature_extractor.extract_feature_array(audio_bytes)
+    
+    def features_to_array(self, features_dict: Dict[str, float]) -> np.ndarray:
+        """Convert a feature dictionary to an array in the order the scaler expects"""
+        return np.array([features_dict[name] for name in self.feature_names], dtype=np.float32)
+    
+    @timed("forest")
+    def classify_features(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify an N x 40 feature matrix
+        
+        Walks all trees of the flat forest for the whole batch at once and
+        derives labels from the argmax of the probabilities.
+        
+        Returns:
+            predictions: Class label per row (0 = AI_GENERATED, 1 = HUMAN)
+            confidences: Probability of the predicted class per row
+        """
+        probabilities = self.forest.predict_proba(features)
+        best = probabilities.argmax(axis=1)
+        predictions = self.forest.classes_[best]
+        confidences = probabilities[np.arange(len(best)), best]
+        return predictions, confidences
+    
+    @timed("explanation")
+    def build_result(self, prediction, confidence_score: float, features: np.ndarray) -> Tuple[str, float, str]:
+        """Map a class label to the classification, confidence and explanation"""
+        # The named view is only needed by the explanation rules
+        features_dict = dict(zip(self.feature_names, features.tolist()))
         if prediction == 0:
             classification = "AI_GENERATED"
-            confidence_score = probabilities[0]
             explanation = self._generate_ai_explanation(features_dict, confidence_score)
         else:
             classification = "HUMAN"
-            confidence_score = probabilities[1]
             explanation = self._generate_human_explanation(features_dict, confidence_score)
         
         return classification, float(confidence_score), explanation
@@ -125,13 +397,22 @@ class VoiceClassifier:
         return base_msg + ", ".join(explanations) + f" (confidence: {confidence:.2%})"
 
 
+def _optional_float_env(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
 # Singleton instance for reuse
 _classifier_instance = None
+_classifier_lock = threading.Lock()
 
 
 def get_classifier() -> VoiceClassifier:
     """Get or create classifier instance (singleton pattern)"""
     global _classifier_instance
     if _classifier_instance is None:
-        _classifier_instance = VoiceClassifier()
+        # Startup warm-up and early requests may race to build it from different threads
+        with _classifier_lock:
+            if _classifier_instance is None:
+                _classifier_instance = VoiceClassifier(result_cache=ResultCache.from_env())
     return _classifier_instance
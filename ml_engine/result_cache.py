@@ -0,0 +1,244 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class ResultCache:
+    """
+    Content-addressed cache of feature vectors and classifications
+
+    Entries are keyed by a hash of the audio bytes and remember the fingerprints
+    of the feature settings and model artifacts that produced them. A lookup is a
+    full hit when the model fingerprint matches, and a feature hit when only the
+    feature settings match (the clip is re-classified without re-extracting).
+    Anything else is a miss, so a model or scaler change invalidates results
+    automatically.
+
+    The first tier is an in-process LRU with a TTL. An optional SQLite file adds a
+    second tier shared by every worker process on the host.
+    """
+
+    # Purge expired rows from the SQLite tier every this many writes
+    _PURGE_EVERY = 256
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        # Counters
+        self.hits = 0
+        self.feature_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._open_db(db_path)
+            # A process forked after loading (gunicorn --preload) must not share the parent's connection
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._reopen_after_fork)
+
+    @staticmethod
+    def audio_key(audio_bytes: bytes) -> str:
+        """Fast content hash of the decoded audio bytes"""
+        return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+    def lookup(
+        self, key: str, model_fingerprint: str, feature_fingerprint: str
+    ) -> Tuple[Optional[np.ndarray], Optional[Tuple[str, float, str]]]:
+        """
+        Look up a clip
+
+        Returns:
+            features: Cached feature vector, if the feature settings match
+            result: Cached (classification, confidence_score, explanation), if the
+                model artifacts match as well
+        """
+        entry = self._get_entry(key)
+
+        with self._lock:
+            if entry is not None and entry["model_fingerprint"] == model_fingerprint:
+                self.hits += 1
+                return entry["features"], entry["result"]
+            if entry is not None and entry["feature_fingerprint"] == feature_fingerprint:
+                self.feature_hits += 1
+                return entry["features"], None
+
+            self.misses += 1
+            return None, None
+
+    def store(
+        self,
+        key: str,
+        model_fingerprint: str,
+        feature_fingerprint: str,
+        features: np.ndarray,
+        result: Tuple[str, float, str]
+    ):
+        """Store the feature vector and classification of a clip in every tier"""
+        entry = {
+            "model_fingerprint": model_fingerprint,
+            "feature_fingerprint": feature_fingerprint,
+            "features": np.asarray(features, dtype=np.float64),
+            "result": (result[0], float(result[1]), result[2]),
+            "created": time.time(),
+        }
+        self._put_memory(key, entry)
+        if self._db is not None:
+            self._put_db(key, entry)
+
+    def metrics(self) -> Dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.feature_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "sharedTier": self.db_path,
+            "hits": self.hits,
+            "featureHits": self.feature_hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _is_expired(self, entry: Dict) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry["created"] > self.ttl_seconds
+
+    def _get_entry(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_expired(entry):
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None and self._db is not None:
+            entry = self._get_db(key)
+            if entry is not None:
+                # Promote shared-tier hits into this process's LRU
+                self._put_memory(key, entry)
+
+        return entry
+
+    def _put_memory(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _open_db(self, db_path: str):
+        """Open the shared SQLite tier; WAL lets several workers read while one writes"""
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                model_fingerprint TEXT NOT NULL,
+                feature_fingerprint TEXT NOT NULL,
+                features BLOB NOT NULL,
+                classification TEXT NOT NULL,
+                confidence_score REAL NOT NULL,
+                explanation TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._open_db(self.db_path)
+
+    def _get_db(self, key: str) -> Optional[Dict]:
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT model_fingerprint, feature_fingerprint, features, classification, "
+                    "confidence_score, explanation, created FROM result_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Result cache read error: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+
+        entry = {
+            "model_fingerprint": row[0],
+            "feature_fingerprint": row[1],
+            "features": np.frombuffer(row[2], dtype=np.float64),
+            "result": (row[3], row[4], row[5]),
+            "created": row[6],
+        }
+        return None if self._is_expired(entry) else entry
+
+    def _put_db(self, key: str, entry: Dict):
+        classification, confidence_score, explanation = entry["result"]
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        entry["model_fingerprint"],
+                        entry["feature_fingerprint"],
+                        entry["features"].tobytes(),
+                        classification,
+                        confidence_score,
+                        explanation,
+                        entry["created"],
+                    )
+                )
+                self._writes += 1
+                if self.ttl_seconds > 0 and self._writes % self._PURGE_EVERY == 0:
+                    self._db.execute(
+                        "DELETE FROM result_cache WHERE created < ?",
+                        (time.time() - self.ttl_seconds,)
+                    )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Result cache write error: {str(e)}")
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultCache"]:
+        """Build the cache from RESULT_CACHE_* environment variables (None when disabled)"""
+        if os.getenv("RESULT_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            max_entries=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600")),
+            db_path=os.getenv("RESULT_CACHE_DB") or None
+        )
+
+
+def fingerprint_files(*paths, extra: str = "") -> str:
+    """Content hash of a set of artifact files plus optional extra text"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    digest.update(extra.encode())
+    return digest.hexdigest()
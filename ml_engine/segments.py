@@ -0,0 +1,333 @@
+"""
+Segment-level analysis: features and verdicts for overlapping windows of one clip
+
+A single mean/std per feature over a whole clip hides splices, such as a real
+human intro followed by synthetic speech. SegmentFeatureExtractor computes the
+frame-level tracks behind the 40 features (log-mel, spectral shape, zero
+crossings, pitch, harmonic/percussive energy) once for the clip, then derives
+the features of every overlapping window from them at once:
+
+- spectral, ZCR, pitch and harmonic statistics come from prefix sums, so every
+  window costs O(1) no matter how much the windows overlap
+- MFCCs are computed for batches of windows with one DCT call, with the dB
+  floor following each window's own peak as for a standalone clip
+
+Long clips are cut into chunks that are analysed in parallel. Each chunk gets
+enough neighbouring frames for the HPSS median filter and the inverse STFT (or
+the fast estimator's median filter, see fast_hpss.py), so
+the tracks match an analysis of the whole clip exactly. A window's features
+therefore match extract_all_features on the window's audio except at its edges,
+where frames see the audio just outside the window.
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import librosa
+import numpy as np
+
+try:
+    from .fast_hpss import harmonic_frame_stats
+except ImportError:
+    # Imported as a top-level module by the training scripts
+    from fast_hpss import harmonic_frame_stats
+
+# librosa.decompose.hpss's default median filter length, in frames
+_HPSS_KERNEL_SIZE = 31
+
+
+class SegmentFeatureExtractor:
+    """
+    Feature matrix of overlapping windows of a clip
+
+    Windows are window_seconds long and start every hop_seconds, both rounded
+    to whole STFT frames. The last window is aligned with the end of the clip
+    so the tail is always covered, and a clip shorter than one window is a
+    single window.
+    """
+
+    # Librosa's zero_crossing_rate framing (independent of the STFT size)
+    _ZCR_FRAME_LENGTH = 2048
+    _ZCR_HOP_LENGTH = 512
+    # MFCC dB floor relative to the loudest mel bin (librosa.power_to_db top_db)
+    _TOP_DB = 80.0
+    # Upper bound on the log-mel values gathered for one batch of MFCC windows
+    _MFCC_BATCH_VALUES = 1 << 23
+
+    def __init__(
+        self,
+        extractor,
+        window_seconds: float = 4.0,
+        hop_seconds: float = 2.0,
+        chunk_seconds: float = 30.0
+    ):
+        if window_seconds <= 0 or hop_seconds <= 0:
+            raise ValueError("window_seconds and hop_seconds must be positive")
+
+        self.extractor = extractor
+        self.sr = extractor.sample_rate
+        self.n_fft = extractor.n_fft
+        self.hop_length = extractor.hop_length
+
+        frames_per_second = self.sr / self.hop_length
+        self.window_frames = max(1, int(round(window_seconds * frames_per_second)))
+        self.hop_frames = max(1, int(round(hop_seconds * frames_per_second)))
+        self.chunk_frames = max(1, int(round(chunk_seconds * frames_per_second)))
+        # HPSS needs half its kernel on either side, the inverse STFT the frames overlapping a sample
+        self.context_frames = _HPSS_KERNEL_SIZE // 2 + -(-self.n_fft // self.hop_length) + 1
+
+    def window_starts(self, n_frames: int) -> np.ndarray:
+        """First STFT frame of every window of a clip with n_frames frames"""
+        width = min(self.window_frames, n_frames)
+        starts = np.arange(0, n_frames - width + 1, self.hop_frames)
+        if starts[-1] + width < n_frames:
+            starts = np.append(starts, n_frames - width)
+        return starts
+
+    def extract(
+        self,
+        y: np.ndarray,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Features of every window of a decoded clip
+
+        Args:
+            y: Mono signal at the extractor's sample rate
+            max_workers: Threads for the chunk analysis (defaults to one per core)
+            executor: Run the chunks on this executor instead, e.g. a process pool
+
+        Returns:
+            bounds: N x 2 array of window (start, end) times in seconds
+            features: N x 40 matrix, columns in get_feature_names() order
+        """
+        y = np.asarray(y, dtype=np.float32)
+        if len(y) == 0:
+            raise ValueError("Cannot analyse an empty signal")
+
+        n_samples = len(y)
+        n_frames = 1 + n_samples // self.hop_length
+        padded = np.pad(y, self.n_fft // 2)
+
+        chunks = [(start, min(start + self.chunk_frames, n_frames)) for start in range(0, n_frames, self.chunk_frames)]
+        tasks = [self._chunk_task(padded, start, end, n_frames, n_samples) for start, end in chunks]
+
+        own_executor = None
+        if executor is None and len(tasks) > 1:
+            executor = own_executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            if executor is None:
+                results = [_analyse_chunk(*task) for task in tasks]
+                zcr, pitch_track = self._clip_tracks(y)
+            else:
+                futures = [executor.submit(_analyse_chunk, *task) for task in tasks]
+                # The whole-clip tracks run here while the chunks are being analysed
+                zcr, pitch_track = self._clip_tracks(y)
+                results = [future.result() for future in futures]
+        finally:
+            if own_executor is not None:
+                own_executor.shutdown()
+
+        log_mel = np.concatenate([result["log_mel"] for result in results], axis=1)
+        spectral = np.concatenate([result["spectral"] for result in results], axis=1)
+        harmonic = np.concatenate([result["harmonic"] for result in results], axis=1)
+        if pitch_track is None:
+            frame_pitches = np.concatenate([result["pitch"] for result in results])
+            pitch_positions = np.arange(n_frames) * self.hop_length
+            pitch_values = frame_pitches
+            pitch_weights = (frame_pitches > 0).astype(np.float64)
+        else:
+            pitch_values, pitch_positions = pitch_track
+            pitch_weights = np.ones(len(pitch_values))
+
+        starts = self.window_starts(n_frames)
+        width = min(self.window_frames, n_frames)
+        ends = starts + width
+        start_samples = starts * self.hop_length
+        end_samples = np.minimum(ends * self.hop_length, n_samples)
+
+        mfcc = self._window_mfcc(log_mel, starts, width)
+
+        spectral_mean, spectral_std = _window_mean_std(spectral, starts, ends)
+
+        zcr_first = -(-start_samples // self._ZCR_HOP_LENGTH)
+        zcr_last = np.minimum(-(-(ends * self.hop_length) // self._ZCR_HOP_LENGTH), len(zcr))
+        zcr_mean, zcr_std = _window_mean_std(zcr, zcr_first, zcr_last)
+
+        pitch_first = np.searchsorted(pitch_positions, start_samples)
+        pitch_last = np.searchsorted(pitch_positions, ends * self.hop_length)
+        pitch_mean, pitch_std = _window_mean_std(pitch_values, pitch_first, pitch_last, pitch_weights)
+
+        harmonic_energy, percussive_energy, harmonic_abs, percussive_abs = _window_sums(harmonic, starts, ends)
+        window_samples = end_samples - start_samples
+        # Harmonic-to-percussive energy ratio, or the harmonic energy when there is no percussive part
+        hnr = harmonic_energy.copy()
+        np.divide(harmonic_energy, percussive_energy, out=hnr, where=percussive_energy > 0)
+
+        features = np.column_stack([
+            mfcc,
+            spectral_mean[0], spectral_std[0],
+            spectral_mean[1], spectral_std[1],
+            spectral_mean[2], spectral_std[2],
+            zcr_mean, zcr_std,
+            pitch_mean, pitch_std, pitch_std ** 2,
+            hnr, harmonic_abs / window_samples, percussive_abs / window_samples
+        ])
+        bounds = np.column_stack([start_samples, end_samples]) / self.sr
+        return bounds, features
+
+    def _chunk_task(self, padded: np.ndarray, start: int, end: int, n_frames: int, n_samples: int) -> Tuple:
+        """Arguments of _analyse_chunk for frames [start, end), with their context frames"""
+        first = max(0, start - self.context_frames)
+        last = min(n_frames, end + self.context_frames)
+        segment = padded[first * self.hop_length:(last - 1) * self.hop_length + self.n_fft]
+        block_samples = min(end * self.hop_length, n_samples) - start * self.hop_length
+        return self.extractor, segment, start - first, end - start, block_samples
+
+    def _clip_tracks(self, y: np.ndarray) -> Tuple[np.ndarray, Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Tracks that are cheap enough to compute over the whole clip at once
+
+        Returns:
+            zcr: Zero-crossing rate of every ZCR frame
+            pitch_track: Voiced autocorrelation pitches and their centers in
+                samples, or None when pitch comes from piptrack on the chunks
+        """
+        zcr = librosa.feature.zero_crossing_rate(
+            y, frame_length=self._ZCR_FRAME_LENGTH, hop_length=self._ZCR_HOP_LENGTH
+        )[0]
+        if self.extractor.pitch_estimator != "autocorr":
+            return zcr, None
+        # The voicing threshold is relative to the loudest frame, so this track is not chunked
+        f0, voiced, centers = self.extractor._autocorr_f0_track(y, self.sr)
+        return zcr, (f0[voiced], centers[voiced])
+
+    def _window_mfcc(self, log_mel: np.ndarray, starts: np.ndarray, width: int) -> np.ndarray:
+        """MFCC means and stds (N x 2 * n_mfcc), each window floored at its own peak"""
+        n_mfcc = self.extractor.n_mfcc
+        windows = np.lib.stride_tricks.sliding_window_view(log_mel, width, axis=1)
+        peaks = np.lib.stride_tricks.sliding_window_view(log_mel.max(axis=0), width)[starts].max(axis=1)
+
+        batch = max(1, self._MFCC_BATCH_VALUES // (log_mel.shape[0] * width))
+        result = np.empty((len(starts), 2 * n_mfcc))
+        for first in range(0, len(starts), batch):
+            rows = slice(first, first + batch)
+            # Windows x mels x frames, floored per window
+            gathered = windows[:, starts[rows], :].transpose(1, 0, 2)
+            floors = (peaks[rows] - self._TOP_DB)[:, None, None]
+            mfccs = librosa.feature.mfcc(S=np.maximum(gathered, floors), n_mfcc=n_mfcc)
+            result[rows, :n_mfcc] = mfccs.mean(axis=2)
+            result[rows, n_mfcc:] = mfccs.std(axis=2)
+        return result
+
+
+def _analyse_chunk(extractor, segment: np.ndarray, lead: int, n_frames: int, block_samples: int) -> Dict[str, np.ndarray]:
+    """
+    Frame tracks of one chunk
+
+    Args:
+        extractor: AudioFeatureExtractor whose settings are used
+        segment: Zero-padded samples covering the chunk's frames and context frames
+        lead: Context frames before the chunk's first frame
+        n_frames: Frames in the chunk
+        block_samples: Clip samples in the chunk's hop-sized blocks
+
+    Returns:
+        log_mel: Unfloored log-mel power, mels x frames
+        spectral: Centroid, rolloff and bandwidth, 3 x frames
+        pitch: Strongest piptrack pitch per frame, 0 when unvoiced (piptrack only)
+        harmonic: Harmonic energy, percussive energy, harmonic and percussive
+            absolute sums of every hop-sized block of samples, 4 x frames
+    """
+    sr, n_fft, hop_length = extractor.sample_rate, extractor.n_fft, extractor.hop_length
+    stft = librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False)
+    core = slice(lead, lead + n_frames)
+    magnitude = np.abs(stft[:, core])
+
+    centroid = librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=n_fft)
+    rolloff = librosa.feature.spectral_rolloff(S=magnitude, sr=sr, n_fft=n_fft)
+    bandwidth = librosa.feature.spectral_bandwidth(S=magnitude, sr=sr, n_fft=n_fft, centroid=centroid)
+    log_mel = librosa.power_to_db(extractor._get_mel_basis(sr) @ magnitude ** 2, top_db=None)
+
+    result = {"log_mel": log_mel, "spectral": np.vstack([centroid, rolloff, bandwidth])}
+    if extractor.pitch_estimator != "autocorr":
+        pitches, magnitudes = librosa.piptrack(S=magnitude, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        result["pitch"] = pitches[magnitudes.argmax(axis=0), np.arange(n_frames)]
+
+    if extractor.harmonic_estimator == "fast":
+        result["harmonic"] = harmonic_frame_stats(np.abs(stft) ** 2, n_fft, hop_length)[:, core]
+        return result
+
+    # Harmonic/percussive signals of the chunk's samples; the context frames make them exact
+    stft_harmonic, stft_percussive = librosa.decompose.hpss(stft, kernel_size=_HPSS_KERNEL_SIZE)
+    offset = lead * hop_length + n_fft // 2
+    sums = []
+    for component in (stft_harmonic, stft_percussive):
+        signal = librosa.istft(component, n_fft=n_fft, hop_length=hop_length, center=False, dtype=np.float32)
+        blocks = np.zeros(n_frames * hop_length)
+        blocks[:block_samples] = signal[offset:offset + block_samples]
+        blocks = blocks.reshape(n_frames, hop_length)
+        sums.append((np.square(blocks).sum(axis=1), np.abs(blocks).sum(axis=1)))
+    (harmonic_energy, harmonic_abs), (percussive_energy, percussive_abs) = sums
+    result["harmonic"] = np.vstack([harmonic_energy, percussive_energy, harmonic_abs, percussive_abs])
+    return result
+
+
+def _window_sums(values: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Sum of values[..., first:last] for every window, from one prefix sum"""
+    prefix = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,))
+    np.cumsum(values, axis=-1, out=prefix[..., 1:])
+    return prefix[..., last] - prefix[..., first]
+
+
+def _window_mean_std(
+    values: np.ndarray, first: np.ndarray, last: np.ndarray, weights: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and population std of values[..., first:last] per window; 0 for empty windows"""
+    values = np.asarray(values, dtype=np.float64)
+    if weights is None:
+        count = (last - first).astype(np.float64)
+        total = _window_sums(values, first, last)
+        squares = _window_sums(values ** 2, first, last)
+    else:
+        count = _window_sums(weights, first, last)
+        total = _window_sums(values * weights, first, last)
+        squares = _window_sums(values ** 2 * weights, first, last)
+
+    safe_count = np.maximum(count, 1.0)
+    mean = np.where(count > 0, total / safe_count, 0.0)
+    variance = np.where(count > 0, np.maximum(squares / safe_count - mean ** 2, 0.0), 0.0)
+    return mean, np.sqrt(variance)
+
+
+def aggregate_segments(
+    bounds: np.ndarray, ai_probability: np.ndarray, min_ai_seconds: float
+) -> Tuple[bool, float, List[int]]:
+    """
+    Clip-level decision from per-window AI probabilities
+
+    Consecutive AI windows (probability above 0.5) form AI spans. The clip is
+    AI-generated when its longest AI span lasts at least min_ai_seconds, or
+    when every window is AI, so a spliced synthetic section is caught even if
+    most of the clip is human.
+
+    Returns:
+        is_ai: Clip-level verdict
+        confidence: Mean probability of the verdict over the deciding windows
+        deciding: Indices of the windows behind the verdict (the longest AI
+            span, or every window for a human verdict)
+    """
+    best_span: List[int] = []
+    span: List[int] = []
+    for index, probability in enumerate(ai_probability):
+        span = span + [index] if probability > 0.5 else []
+        if len(span) > len(best_span):
+            best_span = span
+
+    if best_span:
+        span_seconds = bounds[best_span[-1], 1] - bounds[best_span[0], 0]
+        if span_seconds >= min_ai_seconds or len(best_span) == len(ai_probability):
+            return True, float(ai_probability[best_span].mean()), best_span
+
+    everything = list(range(len(ai_probability)))
+    return False, float(1.0 - ai_probability.mean()), everything
@@ -0,0 +1,810 @@
+"""
+Streaming feature extraction for long recordings
+
+Audio is decoded and resampled block by block, and every feature stage keeps
+running accumulators instead of whole-clip arrays, so memory stays bounded no
+matter how long the recording is. Frames are cut exactly like the centered
+librosa analysis in AudioFeatureExtractor, HPSS gets the median-filter context
+it needs from neighbouring blocks, and the harmonic/percussive signals are
+rebuilt with a streaming inverse STFT (the fast harmonic estimator only needs
+the power frames and their context). The summary features therefore match the
+in-memory path, with one documented approximation: the MFCC dB floor (80 dB
+below the loudest mel bin) is applied when frames leave a bounded retention
+window, using the loudest value seen so far.
+"""
+import copy
+import io
+
+import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .fast_hpss import CONTEXT_FRAMES, harmonic_frame_stats
+except ImportError:
+    # Imported as a top-level module by the training scripts
+    from fast_hpss import CONTEXT_FRAMES, harmonic_frame_stats
+
+
+class RunningStats:
+    """Running mean and population variance per row, merging blocks of observations (Chan/Welford)"""
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+
+    def update(self, values: np.ndarray):
+        """Add a (size, n) block of observations"""
+        values = np.asarray(values, dtype=np.float64).reshape(len(self.mean), -1)
+        n = values.shape[1]
+        if n == 0:
+            return
+
+        block_mean = values.mean(axis=1)
+        block_m2 = ((values - block_mean[:, None]) ** 2).sum(axis=1)
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self._m2 = self._m2 + block_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def var(self) -> np.ndarray:
+        return self._m2 / self.count if self.count else np.zeros_like(self._m2)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+
+class _FrameStream:
+    """
+    Cut a sample stream into the frames of a centered librosa analysis
+
+    Frame t covers samples [t * hop - frame_length // 2, t * hop + frame_length // 2)
+    and the signal is padded at both ends the way librosa pads it (zeros for the
+    STFT, edge values for the zero-crossing rate). Only the samples still needed
+    by future frames are kept.
+    """
+
+    def __init__(self, frame_length: int, hop_length: int, pad_mode: str):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.pad_mode = pad_mode
+        self._half = frame_length // 2
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._received = 0
+        self.next_frame = 0
+
+    def push(self, samples: np.ndarray) -> Tuple[int, Optional[np.ndarray]]:
+        """Add samples; return (first frame index, padded segment holding every newly complete frame)"""
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._received += len(samples)
+        if self._received < self._half:
+            return self.next_frame, None
+        return self._emit((self._received - self._half) // self.hop_length + 1)
+
+    def finish(self) -> Tuple[int, Optional[np.ndarray]]:
+        """Emit the trailing frames that extend into the end padding"""
+        if self._received == 0:
+            return self.next_frame, None
+        return self._emit(1 + self._received // self.hop_length)
+
+    def _emit(self, end_frame: int) -> Tuple[int, Optional[np.ndarray]]:
+        first_frame = self.next_frame
+        if end_frame <= first_frame:
+            return first_frame, None
+
+        left = first_frame * self.hop_length - self._half
+        right = (end_frame - 1) * self.hop_length - self._half + self.frame_length
+        lo = max(left, 0)
+        hi = min(right, self._received)
+        segment = self._buffer[lo - self._buffer_start:hi - self._buffer_start]
+        if lo > left or right > hi:
+            segment = np.pad(segment, (lo - left, right - hi), mode=self.pad_mode)
+
+        # Drop the samples that no future frame overlaps
+        keep_from = max(end_frame * self.hop_length - self._half, 0)
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+
+        self.next_frame = end_frame
+        return first_frame, segment
+
+
+class _ContextFrames:
+    """
+    Spectrogram frames buffered for a median filter along time
+
+    A frame is only released once margin later frames have arrived. Filtering a
+    slice that carries that much context on both sides gives exactly the values
+    of filtering the whole spectrogram, and the slice edges fall on the signal
+    edges at the start and end of the stream, where the reflect mode matches as well.
+    """
+
+    def __init__(self, margin: int):
+        self._margin = margin
+        self._frames: Optional[np.ndarray] = None
+        self._frames_start = 0
+        self._total = 0
+        self.next_frame = 0
+
+    def push(self, frames: np.ndarray, final: bool = False) -> Tuple[int, Optional[np.ndarray], slice]:
+        """Add frames; return (first ready frame, ready frames with their context, slice of the ready frames)"""
+        if frames.shape[1]:
+            self._frames = frames if self._frames is None else np.concatenate([self._frames, frames], axis=1)
+            self._total += frames.shape[1]
+
+        ready_end = self._total if final else self._total - self._margin
+        first_frame = self.next_frame
+        if self._frames is None or ready_end <= first_frame:
+            return first_frame, None, slice(0, 0)
+
+        context_start = max(first_frame - self._margin, 0)
+        context = self._frames[:, context_start - self._frames_start:]
+        target = slice(first_frame - context_start, ready_end - context_start)
+
+        # Keep only the frames later targets still need as context
+        keep_from = max(ready_end - self._margin, 0)
+        self._frames = self._frames[:, keep_from - self._frames_start:]
+        self._frames_start = keep_from
+
+        self.next_frame = ready_end
+        return first_frame, context, target
+
+    @property
+    def nbytes(self) -> int:
+        return self._frames.nbytes if self._frames is not None else 0
+
+
+class _StreamingHPSS:
+    """Harmonic/percussive separation of a stream of STFT frames, as librosa.decompose.hpss"""
+
+    def __init__(self, kernel_size: int = 31):
+        self.kernel_size = kernel_size
+        self._buffer = _ContextFrames(kernel_size // 2)
+
+    def push(self, frames: np.ndarray, final: bool = False) -> Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Add STFT frames; return (first frame index, harmonic frames, percussive frames) ready so far"""
+        # Imported on first use to keep scipy out of the API's import time
+        from scipy.ndimage import median_filter
+
+        first_frame, context, target = self._buffer.push(frames, final)
+        if context is None:
+            return first_frame, None, None
+
+        magnitude, phase = librosa.magphase(context)
+        harmonic = median_filter(magnitude, size=(1, self.kernel_size), mode="reflect")[:, target]
+        magnitude = magnitude[:, target]
+        percussive = median_filter(magnitude, size=(self.kernel_size, 1), mode="reflect")
+
+        mask_harmonic = librosa.util.softmask(harmonic, percussive, power=2.0, split_zeros=True)
+        mask_percussive = librosa.util.softmask(percussive, harmonic, power=2.0, split_zeros=True)
+        phase = phase[:, target]
+        stft_harmonic = (magnitude * mask_harmonic) * phase
+        stft_percussive = (magnitude * mask_percussive) * phase
+        return first_frame, stft_harmonic, stft_percussive
+
+
+class _StreamingHarmonicStats:
+    """Per-frame fast_hpss.harmonic_frame_stats of a stream of STFT power frames"""
+
+    def __init__(self, n_fft: int, hop_length: int):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self._buffer = _ContextFrames(CONTEXT_FRAMES)
+
+    def push(self, power: np.ndarray, final: bool = False) -> Tuple[int, Optional[np.ndarray]]:
+        """Add power frames; return (first frame index, 4 x frames stats) ready so far"""
+        first_frame, context, target = self._buffer.push(power, final)
+        if context is None:
+            return first_frame, None
+        return first_frame, harmonic_frame_stats(context, self.n_fft, self.hop_length)[:, target]
+
+
+class _OverlapAdd:
+    """Streaming inverse STFT that reproduces librosa.istft(center=True) sample for sample"""
+
+    def __init__(self, n_fft: int, hop_length: int):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self._half = n_fft // 2
+        self._window = librosa.filters.get_window("hann", n_fft, fftbins=True)
+        self._window_sq = self._window ** 2
+        self._signal = np.zeros(0, dtype=np.float32)
+        self._window_sum = np.zeros(0, dtype=np.float32)
+        self._start = 0
+        self._next_frame = 0
+
+    def push(self, frames: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Overlap-add the next frames; return (first sample index, completed samples)"""
+        n_frames = frames.shape[1]
+        end = (self._next_frame + n_frames - 1) * self.hop_length + self.n_fft
+        grow = end - self._start - len(self._signal)
+        if grow > 0:
+            self._signal = np.concatenate([self._signal, np.zeros(grow, dtype=np.float32)])
+            self._window_sum = np.concatenate([self._window_sum, np.zeros(grow, dtype=np.float32)])
+
+        frames_time = self._window[:, None] * np.fft.irfft(frames, n=self.n_fft, axis=0)
+        for j in range(n_frames):
+            offset = (self._next_frame + j) * self.hop_length - self._start
+            self._signal[offset:offset + self.n_fft] += frames_time[:, j]
+            self._window_sum[offset:offset + self.n_fft] += self._window_sq
+
+        self._next_frame += n_frames
+        # Samples before the next frame's start receive no further contributions
+        return self._release(self._next_frame * self.hop_length)
+
+    def finish(self, length: int) -> Tuple[int, np.ndarray]:
+        """Release the remaining samples, trimmed to the original signal length"""
+        first, samples = self._release(self._start + len(self._signal))
+        return first, samples[:max(length - first, 0)]
+
+    def _release(self, until: int) -> Tuple[int, np.ndarray]:
+        count = until - self._start
+        samples = self._signal[:count]
+        window_sum = self._window_sum[:count]
+        nonzero = window_sum > librosa.util.tiny(window_sum)
+        samples[nonzero] /= window_sum[nonzero]
+
+        # Convert padded positions to signal positions, dropping the head padding
+        first = self._start - self._half
+        if first < 0:
+            samples = samples[-first:]
+            first = 0
+
+        self._signal = self._signal[count:]
+        self._window_sum = self._window_sum[count:]
+        self._start = until
+        return first, samples
+
+
+class _SummaryStats:
+    """Accumulators for the 40 summary features of one clip or window"""
+
+    def __init__(self, n_mfcc: int):
+        self.mfcc = RunningStats(n_mfcc)
+        self.spectral = RunningStats(3)
+        self.zcr = RunningStats(1)
+        self.pitch = RunningStats(1)
+        self.harmonic_energy = 0.0
+        self.percussive_energy = 0.0
+        self.harmonic_abs = 0.0
+        self.percussive_abs = 0.0
+        self.samples = 0
+
+    def add_harmonic(self, harmonic: np.ndarray, percussive: np.ndarray):
+        self.harmonic_energy += float(np.dot(harmonic, harmonic))
+        self.percussive_energy += float(np.dot(percussive, percussive))
+        self.harmonic_abs += float(np.abs(harmonic).sum(dtype=np.float64))
+        self.percussive_abs += float(np.abs(percussive).sum(dtype=np.float64))
+        self.samples += len(harmonic)
+
+    def add_harmonic_stats(self, stats: np.ndarray, samples: int):
+        """Add fast_hpss.harmonic_frame_stats frames covering `samples` samples"""
+        harmonic_energy, percussive_energy, harmonic_abs, percussive_abs = stats.sum(axis=1)
+        self.harmonic_energy += float(harmonic_energy)
+        self.percussive_energy += float(percussive_energy)
+        self.harmonic_abs += float(harmonic_abs)
+        self.percussive_abs += float(percussive_abs)
+        self.samples += samples
+
+    def to_array(self) -> np.ndarray:
+        """Features in AudioFeatureExtractor.get_feature_names() order"""
+        spectral = np.column_stack([self.spectral.mean, self.spectral.std]).ravel()
+
+        if self.pitch.count:
+            pitch = [self.pitch.mean[0], self.pitch.std[0], self.pitch.var[0]]
+        else:
+            pitch = [0.0, 0.0, 0.0]
+
+        if self.percussive_energy > 0:
+            hnr = self.harmonic_energy / self.percussive_energy
+        else:
+            hnr = self.harmonic_energy
+        samples = max(self.samples, 1)
+
+        return np.concatenate([
+            self.mfcc.mean, self.mfcc.std,
+            spectral,
+            [self.zcr.mean[0], self.zcr.std[0]],
+            pitch,
+            [hnr, self.harmonic_abs / samples, self.percussive_abs / samples]
+        ])
+
+
+class StreamingFeatureExtractor:
+    """
+    Incremental version of AudioFeatureExtractor.extract_all_features
+
+    Push mono float32 blocks at the extractor's sample rate, then call finish()
+    for the summary features. With window_seconds set, features are also
+    produced for consecutive fixed-length windows so long recordings can be
+    scored window by window. snapshot() returns the features of everything
+    processed so far without ending the stream.
+    """
+
+    # Librosa's zero_crossing_rate framing (independent of the STFT size)
+    _ZCR_FRAME_LENGTH = 2048
+    _ZCR_HOP_LENGTH = 512
+    # MFCC dB floor relative to the loudest mel bin (librosa.power_to_db top_db)
+    _TOP_DB = 80.0
+
+    def __init__(self, extractor, window_seconds: Optional[float] = None, mfcc_retention_seconds: float = 300.0):
+        self.extractor = extractor
+        self.sr = extractor.sample_rate
+        self.n_fft = extractor.n_fft
+        self.hop_length = extractor.hop_length
+
+        self._stft_frames = _FrameStream(self.n_fft, self.hop_length, "constant")
+        self._zcr_frames = _FrameStream(self._ZCR_FRAME_LENGTH, self._ZCR_HOP_LENGTH, "edge")
+        self._hpss = _StreamingHPSS()
+        # The fast harmonic estimator works on power frames and needs no inverse STFT
+        self._fast_harmonic = extractor.harmonic_estimator == "fast"
+        self._harmonic_stats = _StreamingHarmonicStats(self.n_fft, self.hop_length)
+        self._harmonic_ola = _OverlapAdd(self.n_fft, self.hop_length)
+        self._percussive_ola = _OverlapAdd(self.n_fft, self.hop_length)
+        self._mel_basis = extractor._get_mel_basis(self.sr)
+
+        self._stats = _SummaryStats(extractor.n_mfcc)
+        self._received = 0
+
+        # Unclipped log-mel frames waiting for the dB floor, bounded by the retention window
+        self._retention_frames = int(mfcc_retention_seconds * self.sr / self.hop_length)
+        self._log_mel: List[np.ndarray] = []
+        self._log_mel_frames = 0
+        self._log_mel_max = -np.inf
+
+        # Per-window accumulators, keyed by window index
+        self._window_frames = int(round(window_seconds * self.sr / self.hop_length)) if window_seconds else None
+        self._windows: Dict[int, _SummaryStats] = {}
+        self._window_log_mel: Dict[int, List[np.ndarray]] = {}
+        self._closed_windows: List[Dict] = []
+        self._frames_done = 0
+        self._zcr_done = 0
+        self._samples_done = 0
+
+    def push(self, samples: np.ndarray):
+        """Process the next block of samples"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.extractor.pitch_estimator == "autocorr":
+            self._add_autocorr_pitch(samples, self._received)
+        self._received += len(samples)
+
+        self._add_zcr(*self._zcr_frames.push(samples))
+        self._add_stft(*self._stft_frames.push(samples), final=False)
+        self._close_windows()
+
+    def finish(self) -> Tuple[Dict[str, float], List[Dict]]:
+        """
+        End the stream
+
+        Returns:
+            features: Summary features, as returned by extract_all_features
+            windows: Per-window {"start", "end", "features"} dicts (empty without window_seconds)
+        """
+        self._add_zcr(*self._zcr_frames.finish())
+        self._add_stft(*self._stft_frames.finish(), final=True)
+
+        for window in list(self._window_log_mel):
+            self._fold_window_mfcc(window)
+        self._close_windows(final=True)
+
+        while self._log_mel:
+            self._fold_mfcc(self._log_mel.pop(0))
+
+        return self._as_dict(self._stats.to_array()), self._closed_windows
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary features of the audio processed so far (MFCCs include the retained frames)"""
+        stats = self._stats
+        if self._log_mel:
+            stats = copy.copy(self._stats)
+            stats.mfcc = copy.deepcopy(self._stats.mfcc)
+            floor = self._log_mel_max - self._TOP_DB
+            for log_mel in self._log_mel:
+                stats.mfcc.update(self._mfcc(log_mel, floor))
+        return self._as_dict(stats.to_array())
+
+    @property
+    def duration_seconds(self) -> float:
+        return self._received / self.sr
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the buffers held between pushes"""
+        arrays = [
+            self._stft_frames._buffer, self._zcr_frames._buffer,
+            self._harmonic_ola._signal, self._harmonic_ola._window_sum,
+            self._percussive_ola._signal, self._percussive_ola._window_sum,
+        ]
+        arrays.extend(self._log_mel)
+        for frames in self._window_log_mel.values():
+            arrays.extend(frames)
+        return sum(array.nbytes for array in arrays) + self._hpss._buffer.nbytes + self._harmonic_stats._buffer.nbytes
+
+    def _as_dict(self, features: np.ndarray) -> Dict[str, float]:
+        return dict(zip(self.extractor.get_feature_names(), features))
+
+    def _window_slices(self, first: int, count: int, unit: int):
+        """Split [first, first + count) (in frames or samples) at window boundaries"""
+        if self._window_frames is None:
+            return
+        size = self._window_frames * unit
+        start = first
+        while start < first + count:
+            window = start // size
+            end = min((window + 1) * size, first + count)
+            yield window, slice(start - first, end - first)
+            start = end
+
+    def _window(self, window: int) -> _SummaryStats:
+        if window not in self._windows:
+            self._windows[window] = _SummaryStats(self.extractor.n_mfcc)
+        return self._windows[window]
+
+    def _add_zcr(self, first_frame: int, segment: Optional[np.ndarray]):
+        if segment is None:
+            return
+        zcr = librosa.feature.zero_crossing_rate(
+            segment, frame_length=self._ZCR_FRAME_LENGTH, hop_length=self._ZCR_HOP_LENGTH, center=False
+        )[0]
+        self._stats.zcr.update(zcr)
+        for window, part in self._window_slices(first_frame, len(zcr), 1):
+            self._window(window).zcr.update(zcr[part])
+        self._zcr_done = first_frame + len(zcr)
+
+    def _add_stft(self, first_frame: int, segment: Optional[np.ndarray], final: bool):
+        if segment is not None:
+            stft = librosa.stft(segment, n_fft=self.n_fft, hop_length=self.hop_length, center=False)
+            magnitude = np.abs(stft)
+            self._add_frame_features(first_frame, magnitude)
+            self._frames_done = first_frame + stft.shape[1]
+        else:
+            stft = np.zeros((1 + self.n_fft // 2, 0), dtype=np.complex64)
+            magnitude = np.abs(stft)
+
+        if self._fast_harmonic:
+            self._add_harmonic_stats(*self._harmonic_stats.push(magnitude ** 2, final=final))
+            return
+
+        first_frame, stft_harmonic, stft_percussive = self._hpss.push(stft, final=final)
+        if stft_harmonic is None and not final:
+            return
+
+        if stft_harmonic is not None:
+            first_sample, harmonic = self._harmonic_ola.push(stft_harmonic)
+            _, percussive = self._percussive_ola.push(stft_percussive)
+            self._add_harmonic(first_sample, harmonic, percussive)
+        if final:
+            first_sample, harmonic = self._harmonic_ola.finish(self._received)
+            _, percussive = self._percussive_ola.finish(self._received)
+            self._add_harmonic(first_sample, harmonic, percussive)
+
+    def _add_frame_features(self, first_frame: int, magnitude: np.ndarray):
+        """MFCC, spectral and piptrack stages for a block of frames"""
+        sr, n_fft = self.sr, self.n_fft
+
+        centroid = librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=n_fft)
+        rolloff = librosa.feature.spectral_rolloff(S=magnitude, sr=sr, n_fft=n_fft)
+        bandwidth = librosa.feature.spectral_bandwidth(S=magnitude, sr=sr, n_fft=n_fft, centroid=centroid)
+        spectral = np.vstack([centroid, rolloff, bandwidth])
+        self._stats.spectral.update(spectral)
+
+        log_mel = librosa.power_to_db(self._mel_basis @ magnitude ** 2, top_db=None)
+        self._log_mel_max = max(self._log_mel_max, float(log_mel.max()))
+        self._log_mel.append(log_mel)
+        self._log_mel_frames += log_mel.shape[1]
+        while len(self._log_mel) > 1 and self._log_mel_frames - self._log_mel[0].shape[1] >= self._retention_frames:
+            self._fold_mfcc(self._log_mel.pop(0))
+
+        if self.extractor.pitch_estimator == "piptrack":
+            pitches, magnitudes = librosa.piptrack(S=magnitude, sr=sr, n_fft=n_fft, hop_length=self.hop_length)
+            frame_pitches = pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+            self._stats.pitch.update(frame_pitches[frame_pitches > 0])
+        else:
+            frame_pitches = None
+
+        for window, part in self._window_slices(first_frame, magnitude.shape[1], 1):
+            stats = self._window(window)
+            stats.spectral.update(spectral[:, part])
+            self._window_log_mel.setdefault(window, []).append(log_mel[:, part])
+            if frame_pitches is not None:
+                window_pitches = frame_pitches[part]
+                stats.pitch.update(window_pitches[window_pitches > 0])
+
+    def _add_autocorr_pitch(self, samples: np.ndarray, first_sample: int):
+        """Autocorrelation pitch estimate of one decoded block (frames do not span blocks)"""
+        f0, voiced, centers = self.extractor._autocorr_f0_track(samples, self.sr)
+        self._stats.pitch.update(f0[voiced])
+        for window, part in self._window_slices(first_sample, len(samples), self.hop_length):
+            in_window = (centers >= part.start) & (centers < part.stop) & voiced
+            self._window(window).pitch.update(f0[in_window])
+
+    def _add_harmonic(self, first_sample: int, harmonic: np.ndarray, percussive: np.ndarray):
+        self._stats.add_harmonic(harmonic, percussive)
+        for window, part in self._window_slices(first_sample, len(harmonic), self.hop_length):
+            self._window(window).add_harmonic(harmonic[part], percussive[part])
+        self._samples_done = first_sample + len(harmonic)
+
+    def _add_harmonic_stats(self, first_frame: int, stats: Optional[np.ndarray]):
+        """Fast harmonic estimates; frame t stands for samples [t * hop, (t + 1) * hop) of the clip"""
+        if stats is None:
+            return
+
+        def samples(first: int, count: int) -> int:
+            return min((first + count) * self.hop_length, self._received) - min(first * self.hop_length, self._received)
+
+        self._stats.add_harmonic_stats(stats, samples(first_frame, stats.shape[1]))
+        for window, part in self._window_slices(first_frame, stats.shape[1], 1):
+            self._window(window).add_harmonic_stats(stats[:, part], samples(first_frame + part.start, part.stop - part.start))
+        self._samples_done = (first_frame + stats.shape[1]) * self.hop_length
+
+    def _mfcc(self, log_mel: np.ndarray, floor: float) -> np.ndarray:
+        return librosa.feature.mfcc(S=np.maximum(log_mel, floor), n_mfcc=self.extractor.n_mfcc)
+
+    def _fold_mfcc(self, log_mel: np.ndarray):
+        """Apply the dB floor to retained frames and fold their MFCCs into the running stats"""
+        self._log_mel_frames -= log_mel.shape[1]
+        self._stats.mfcc.update(self._mfcc(log_mel, self._log_mel_max - self._TOP_DB))
+
+    def _fold_window_mfcc(self, window: int):
+        """Windows are scored like standalone clips, so the floor follows the window's own peak"""
+        frames = self._window_log_mel.pop(window, [])
+        if frames:
+            log_mel = np.concatenate(frames, axis=1)
+            self._window(window).mfcc.update(self._mfcc(log_mel, float(log_mel.max()) - self._TOP_DB))
+
+    def _close_windows(self, final: bool = False):
+        """Emit windows once every stage has moved past their end"""
+        if self._window_frames is None:
+            return
+
+        for window in sorted(self._windows):
+            end_frame = (window + 1) * self._window_frames
+            end_sample = end_frame * self.hop_length
+            done = min(self._frames_done, self._zcr_done) >= end_frame and self._samples_done >= end_sample
+            if not (final or done):
+                break
+
+            self._fold_window_mfcc(window)
+            stats = self._windows.pop(window)
+            start_s = window * self._window_frames * self.hop_length / self.sr
+            end_s = min(end_sample, self._received) / self.sr
+            self._closed_windows.append({
+                "start": start_s,
+                "end": end_s,
+                "features": self._as_dict(stats.to_array())
+            })
+
+
+def stream_resampler(source_rate: int, sample_rate: int, resample_type: str = "soxr_hq") -> soxr.ResampleStream:
+    """
+    soxr streaming resampler matching a feature config's resample_type
+
+    soxr_* types use the same filter as the whole-clip path. polyphase has no
+    streaming form and uses soxr's low-quality filter, which is about as fast.
+    """
+    quality = "LQ" if resample_type == "polyphase" else resample_type[len("soxr_"):].upper()
+    return soxr.ResampleStream(source_rate, sample_rate, 1, dtype="float32", quality=quality)
+
+
+def stream_audio_blocks(
+    audio_source, sample_rate: int, block_seconds: float = 10.0, resample_type: str = "soxr_hq"
+) -> Iterator[np.ndarray]:
+    """
+    Decode audio into mono float32 blocks at sample_rate
+
+    Uses soundfile's block reader and soxr's streaming resampler (the same
+    filter the whole-clip path applies), so only one block of decoded audio
+    is held at a time.
+
+    Args:
+        audio_source: File path or file-like object
+        sample_rate: Target sample rate
+        block_seconds: Decoded block length, in seconds of source audio
+        resample_type: Resampler of the feature config (see stream_resampler)
+    """
+    with sf.SoundFile(audio_source) as f:
+        resampler = None
+        if f.samplerate != sample_rate:
+            resampler = stream_resampler(f.samplerate, sample_rate, resample_type)
+
+        blocksize = max(1, int(block_seconds * f.samplerate))
+        for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            mono = block.mean(axis=1)
+            yield resampler.resample_chunk(mono) if resampler is not None else mono
+
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+class _StreamDecoder:
+    """Shared tail of the incremental decoders: downmix to mono and resample on the fly"""
+
+    def __init__(self, sample_rate: int, resample_type: str = "soxr_hq"):
+        self.sample_rate = sample_rate
+        self.resample_type = resample_type
+        self._resampler = None
+        self._source_rate = None
+
+    def _to_output(self, frames: np.ndarray, source_rate: int, last: bool = False) -> np.ndarray:
+        mono = frames.mean(axis=1) if frames.ndim == 2 else frames
+        mono = np.ascontiguousarray(mono, dtype=np.float32)
+        if source_rate == self.sample_rate:
+            return mono
+        if self._resampler is None:
+            self._resampler = stream_resampler(source_rate, self.sample_rate, self.resample_type)
+        return self._resampler.resample_chunk(mono, last=last)
+
+
+class PCMStreamDecoder(_StreamDecoder):
+    """Incremental decoder for raw little-endian 16-bit PCM"""
+
+    def __init__(self, sample_rate: int, source_rate: int, channels: int = 1, resample_type: str = "soxr_hq"):
+        super().__init__(sample_rate, resample_type)
+        self.source_rate = source_rate
+        self.channels = channels
+        self._frame_bytes = 2 * channels
+        self._remainder = b""
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._remainder)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """Decode the next chunk; a partial sample frame is kept for the following chunk"""
+        data = self._remainder + bytes(data)
+        usable = len(data) - len(data) % self._frame_bytes
+        self._remainder = data[usable:]
+        frames = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, self.channels)
+        return self._to_output(frames.astype(np.float32) / 32768.0, self.source_rate)
+
+    def flush(self) -> np.ndarray:
+        """End of stream: return the resampler's tail"""
+        self._remainder = b""
+        return self._to_output(np.zeros((0, self.channels), dtype=np.float32), self.source_rate, last=True)
+
+
+class _GrowingReader(io.RawIOBase):
+    """
+    File object over a byte stream that is still arriving
+
+    libsndfile sizes the stream when it opens it, so the reader reports a very
+    long virtual length and answers reads near that end (the ID3v1 tag probe)
+    with zeros. Consumed bytes are released, except for a short history the
+    decoder seeks back into while resynchronising on frame headers.
+    """
+
+    _VIRTUAL_LENGTH = 1 << 30
+    _TAIL = 4096
+    _KEEP_BEHIND = 16384
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._base = 0
+        self._pos = 0
+
+    def feed(self, data: bytes):
+        self._buffer += data
+
+    @property
+    def unread_bytes(self) -> int:
+        return self._base + len(self._buffer) - self._pos
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer)
+
+    def peek(self, n: int) -> bytes:
+        start = self._pos - self._base
+        return bytes(self._buffer[start:start + n])
+
+    def release_consumed(self):
+        consumed = self._pos - self._KEEP_BEHIND - self._base
+        if consumed > 0:
+            del self._buffer[:consumed]
+            self._base += consumed
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._pos >= self._VIRTUAL_LENGTH - self._TAIL:
+            n = max(0, min(len(b), self._VIRTUAL_LENGTH - self._pos))
+            b[:n] = bytes(n)
+        else:
+            start = self._pos - self._base
+            n = max(0, min(len(b), len(self._buffer) - start))
+            b[:n] = self._buffer[start:start + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._VIRTUAL_LENGTH
+        self._pos = max(self._base, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class MP3StreamDecoder(_StreamDecoder):
+    """
+    Incremental MP3 decoder for audio that arrives in arbitrary chunks
+
+    One libsndfile decoder runs over the growing stream, so frame boundaries and
+    the bit reservoir are handled exactly as for a complete file. Decoding stays
+    read_ahead_bytes behind the newest data so the decoder never hits the end of
+    what has arrived until flush().
+    """
+
+    # A few MP3 frames per read, well inside the read-ahead margin at any bitrate
+    _READ_FRAMES = 4608
+
+    def __init__(self, sample_rate: int, read_ahead_bytes: int = 8192, resample_type: str = "soxr_hq"):
+        super().__init__(sample_rate, resample_type)
+        self.read_ahead_bytes = read_ahead_bytes
+        self._reader = _GrowingReader()
+        self._file: Optional[sf.SoundFile] = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._reader.buffered_bytes
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """Decode every frame that is safely behind the newest data"""
+        self._reader.feed(data)
+        if self._file is None and not self._open(final=False):
+            return np.zeros(0, dtype=np.float32)
+        return self._read(self.read_ahead_bytes)
+
+    def flush(self) -> np.ndarray:
+        """End of stream: decode the remaining frames"""
+        if self._file is None and not self._open(final=True):
+            return np.zeros(0, dtype=np.float32)
+        decoded = self._read(None)
+        tail = self._to_output(np.zeros((0, 1), dtype=np.float32), self._file.samplerate, last=True)
+        self._file.close()
+        return np.concatenate([decoded, tail])
+
+    def _open(self, final: bool) -> bool:
+        """Open the decoder once the ID3 tag and the first frames have arrived"""
+        available = self._reader.unread_bytes
+        if available == 0 or (not final and available < self._tag_bytes() + self.read_ahead_bytes):
+            return False
+
+        try:
+            self._file = sf.SoundFile(self._reader)
+        except Exception as e:
+            raise ValueError(f"Failed to decode MP3 stream: {getattr(e, 'error_string', str(e))}")
+        return True
+
+    def _tag_bytes(self) -> int:
+        """Size of a leading ID3v2 tag, which the decoder reads in full when it opens"""
+        head = self._reader.peek(10)
+        if len(head) < 10 or not head.startswith(b"ID3"):
+            return 0
+        # Syncsafe size: 7 bits per byte, plus the 10-byte header
+        return 10 + sum((head[6 + i] & 0x7F) << (7 * (3 - i)) for i in range(4))
+
+    def _read(self, keep_unread: Optional[int]) -> np.ndarray:
+        """Decode until only keep_unread bytes are left, or to the end of the stream when None"""
+        blocks = []
+        while keep_unread is None or self._reader.unread_bytes > keep_unread:
+            block = self._file.read(self._READ_FRAMES, dtype="float32", always_2d=True)
+            if len(block) == 0:
+                break
+            blocks.append(self._to_output(block, self._file.samplerate))
+        self._reader.release_consumed()
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
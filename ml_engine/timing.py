@@ -0,0 +1,77 @@
+"""
+Per-stage timing of the inference path
+
+Stages (decode, stft, mfcc, forest, ...) are timed with stage() or @timed().
+Every measurement goes to the registered observers, which the API uses to feed
+its Prometheus histograms, and to the timings dict of the current request when
+one is being collected with collect(). The current dict lives in a context
+variable, so it follows a request into the threadpool without being passed
+through every call. Without observers or a collector the cost is two
+perf_counter calls per stage.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional
+
+StageObserver = Callable[[str, float], None]
+
+_observers: List[StageObserver] = []
+_current: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+def add_observer(observer: StageObserver):
+    """Call observer(stage, seconds) for every stage measured in this process"""
+    _observers.append(observer)
+
+
+def record(stage: str, seconds: float):
+    """Record a stage duration that was measured elsewhere (e.g. in a worker process)"""
+    timings = _current.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+    for observer in _observers:
+        observer(stage, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as one stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator form of stage()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """Collect the stages timed inside the block (and in threads it hands work to) into a dict"""
+    timings: Dict[str, float] = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def detach():
+    """
+    Stop attributing stages to the request that started the current task
+
+    Background tasks copy the context of the request that created them; shared
+    work such as a micro-batch must not be charged to that one request.
+    """
+    _current.set(None)
@@ -6,18 +6,36 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 import joblib
 import os
 from pathlib import Path
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Optional
 from feature_extractor import AudioFeatureExtractor
+from flat_forest import FlatForest
+from feature_store import FeatureStore, extract_features_parallel
 
 
 class VoiceClassifierTrainer:
     """Train a binary classifier for AI vs Human voice detection"""
     
-    def __init__(self, model_save_path: str = "model_artifacts"):
+    def __init__(
+        self,
+        model_save_path: str = "model_artifacts",
+        feature_config: Optional[Dict] = None,
+        feature_store_path: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
         self.model_save_path = Path(model_save_path)
         self.model_save_path.mkdir(parents=True, exist_ok=True)
         
-        self.feature_extractor = AudioFeatureExtractor()
+        self.feature_extractor = AudioFeatureExtractor(**(feature_config or {}))
+        self.workers = workers
+        
+        # Features of unchanged files are reused across training runs
+        self.feature_store = None
+        if feature_store_path:
+            self.feature_store = FeatureStore(
+                feature_store_path,
+                self.feature_extractor.get_config(),
+                self.feature_extractor.get_feature_names()
+            )
         self.scaler = StandardScaler()
         self.classifier = RandomForestClassifier(
             n_estimators=200,
@@ -28,11 +46,8 @@ class VoiceClassifierTrainer:
             n_jobs=-1
         )
     
-    def load_audio_files(self, directory: Path, label: int) -> Tuple[List[np.ndarray], List[int]]:
-        """Load all audio files from a directory and extract features"""
-        features = []
-        labels = []
-        
+    def find_audio_files(self, directory: Path) -> List[Path]:
+        """List the audio files under a directory"""
         audio_extensions = ['.mp3', '.wav', '.flac', '.ogg']
         audio_files = []
         
@@ -40,20 +55,21 @@ class VoiceClassifierTrainer:
             audio_files.extend(directory.glob(f"**/*{ext}"))
         
         print(f"Found {len(audio_files)} audio files in {directory}")
+        return sorted(audio_files)
+    
+    def load_audio_files(self, directory: Path, label: int) -> Tuple[List[np.ndarray], List[int]]:
+        """Load all audio files from a directory and extract features"""
+        audio_files = self.find_audio_files(directory)
+        vectors = extract_features_parallel(
+            audio_files,
+            self.feature_extractor.get_config(),
+            store=self.feature_store,
+            workers=self.workers
+        )
         
-        for audio_file in audio_files:
-            try:
-                with open(audio_file, 'rb') as f:
-                    audio_bytes = f.read()
-                
-                feature_vector = self.feature_extractor.extract_all_features(audio_bytes)
-                features.append(feature_vector)
-                labels.append(label)
-                
-            except Exception as e:
-                print(f"Error processing {audio_file}: {str(e)}")
-                continue
-        
+        # Keep directory order; files that failed to decode are skipped
+        features = [vectors[str(path)] for path in audio_files if str(path) in vectors]
+        labels = [label] * len(features)
         return features, labels
     
     def prepare_training_data(self, human_dir: str, ai_dir: str) -> Tuple[np.ndarray, np.ndarray]:
@@ -64,6 +80,13 @@ class VoiceClassifierTrainer:
         print("Loading AI-generated voice samples...")
         ai_features, ai_labels = self.load_audio_files(Path(ai_dir), label=0)  # 0 = AI_GENERATED
         
+        if self.feature_store is not None:
+            corpus = self.find_audio_files(Path(human_dir)) + self.find_audio_files(Path(ai_dir))
+            removed = self.feature_store.prune(corpus)
+            self.feature_store.save()
+            if removed:
+                print(f"Feature store: dropped {removed} files no longer in the corpus")
+        
         # Combine datasets
         X = np.array(human_features + ai_features)
         y = np.array(human_labels + ai_labels)
@@ -116,18 +139,29 @@ class VoiceClassifierTrainer:
         for idx in reversed(top_features_idx):
             print(f"{feature_names[idx]}: {feature_importance[idx]:.4f}")
         
+        # Export for inference and check it against sklearn on the held-out set
+        flat_forest = FlatForest.from_sklearn(self.classifier, self.scaler)
+        error = flat_forest.max_probability_error(self.classifier, self.scaler, X_test)
+        print(f"\nFlat forest: {flat_forest.n_nodes} nodes, max probability difference {error:.2e}")
+        
         return accuracy
     
     def save_model(self):
         """Save trained model and scaler"""
         model_path = self.model_save_path / "voice_classifier.pkl"
         scaler_path = self.model_save_path / "scaler.pkl"
+        feature_config_path = self.model_save_path / "feature_config.json"
+        forest_path = self.model_save_path / "voice_classifier.npz"
         
         joblib.dump(self.classifier, model_path)
         joblib.dump(self.scaler, scaler_path)
+        self.feature_extractor.save_config(feature_config_path)
+        FlatForest.from_sklearn(self.classifier, self.scaler).save(forest_path)
         
         print(f"\nModel saved to: {model_path}")
         print(f"Scaler saved to: {scaler_path}")
+        print(f"Feature config saved to: {feature_config_path}")
+        print(f"Flat forest saved to: {forest_path}")
     
     def train_and_save(self, human_dir: str, ai_dir: str):
         """Complete training pipeline"""
@@ -155,7 +189,22 @@ class VoiceClassifierTrainer:
 
 if __name__ == "__main__":
     # Training script
-    trainer = VoiceClassifierTrainer(model_save_path="model_artifacts")
+    # The pitch and harmonic estimators, resampler and silence trimming are saved with the model,
+    # so inference always matches training
+    feature_config = {
+        "pitch_estimator": os.getenv("PITCH_ESTIMATOR", "piptrack"),
+        "harmonic_estimator": os.getenv("HARMONIC_ESTIMATOR", "hpss"),
+        "resample_type": os.getenv("RESAMPLE_TYPE", "soxr_hq"),
+        "vad_trim": os.getenv("VAD_TRIM", "false").lower() == "true"
+    }
+    workers = os.getenv("TRAIN_WORKERS")
+    trainer = VoiceClassifierTrainer(
+        model_save_path="model_artifacts",
+        feature_config=feature_config,
+        # Set FEATURE_STORE_DIR to an empty value to always re-extract
+        feature_store_path=os.getenv("FEATURE_STORE_DIR", "../data/feature_store"),
+        workers=int(workers) if workers else None
+    )
     
     # Update these paths to your training data directories
     HUMAN_VOICE_DIR = "../data/training_data/human"
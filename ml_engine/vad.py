@@ -0,0 +1,188 @@
+"""
+Cheap voice-activity gating ahead of feature extraction
+
+An energy/zero-crossing-rate detector marks speech frames in a few milliseconds,
+so clips can be trimmed to their speech, rejected when they hold too little of
+it, and capped to a fixed analysis length before HPSS and pitch tracking run.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class InsufficientSpeechError(ValueError):
+    """Raised when a clip holds less speech than the configured minimum"""
+
+    def __init__(self, speech_seconds: float, min_speech_seconds: float):
+        # Both values are passed to ValueError so the error pickles across processes
+        super().__init__(speech_seconds, min_speech_seconds)
+        self.speech_seconds = speech_seconds
+        self.min_speech_seconds = min_speech_seconds
+
+    def __str__(self) -> str:
+        return (
+            f"Audio contains {self.speech_seconds:.2f}s of speech; "
+            f"at least {self.min_speech_seconds:.2f}s is required"
+        )
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level speech detector based on short-time energy and zero-crossing rate
+
+    A frame counts as speech when its energy is above a threshold that adapts to
+    the clip: dynamic_range_db below the loudest frames, but never below the
+    noise floor plus noise_margin_db. Noise-like frames (high zero-crossing rate)
+    must be noisy_margin_db louder still, which drops hiss and keeps loud
+    fricatives. A clip whose loudest frames are less than noise_margin_db above its
+    floor has no syllabic modulation (steady noise, hum or silence) and holds no
+    speech. Pauses shorter than max_gap_seconds are bridged, bursts shorter
+    than min_speech_seconds are dropped, and every segment is padded by
+    padding_seconds so onsets and decays are kept.
+    """
+
+    def __init__(
+        self,
+        frame_seconds: float = 0.03,
+        dynamic_range_db: float = 35.0,
+        noise_margin_db: float = 6.0,
+        max_threshold_below_peak_db: float = 20.0,
+        absolute_floor_db: float = -60.0,
+        max_zcr: float = 0.35,
+        noisy_margin_db: float = 10.0,
+        max_gap_seconds: float = 0.3,
+        min_speech_seconds: float = 0.1,
+        padding_seconds: float = 0.1
+    ):
+        self.frame_seconds = frame_seconds
+        self.dynamic_range_db = dynamic_range_db
+        self.noise_margin_db = noise_margin_db
+        self.max_threshold_below_peak_db = max_threshold_below_peak_db
+        self.absolute_floor_db = absolute_floor_db
+        self.max_zcr = max_zcr
+        self.noisy_margin_db = noisy_margin_db
+        self.max_gap_seconds = max_gap_seconds
+        self.min_speech_seconds = min_speech_seconds
+        self.padding_seconds = padding_seconds
+
+    def speech_mask(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, int]:
+        """
+        Per-frame speech decision
+
+        Returns:
+            mask: True for speech frames; frame i covers samples [i * hop, i * hop + 2 * hop)
+            hop: Hop between frames in samples
+        """
+        frame_length = max(2, int(self.frame_seconds * sr))
+        hop = frame_length // 2
+        if len(y) < frame_length:
+            return np.zeros(0, dtype=bool), hop
+
+        frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop]
+        energy_db = 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+
+        # Percentiles rather than min/max so a few clicks or dropouts don't move the threshold
+        peak_db = np.percentile(energy_db, 99)
+        floor_db = np.percentile(energy_db, 10)
+        if peak_db - floor_db < self.noise_margin_db:
+            return np.zeros(len(energy_db), dtype=bool), hop
+        threshold = max(
+            peak_db - self.dynamic_range_db,
+            min(floor_db + self.noise_margin_db, peak_db - self.max_threshold_below_peak_db),
+            self.absolute_floor_db
+        )
+
+        noisy = zcr > self.max_zcr
+        mask = (energy_db > threshold) & (~noisy | (energy_db > threshold + self.noisy_margin_db))
+
+        frames_per_second = sr / hop
+        # Bridge short pauses inside speech, then drop isolated bursts
+        mask = _fill_runs(mask, False, int(self.max_gap_seconds * frames_per_second), interior_only=True)
+        mask = _fill_runs(mask, True, int(self.min_speech_seconds * frames_per_second))
+        return _dilate(mask, int(self.padding_seconds * frames_per_second)), hop
+
+    def speech_segments(self, y: np.ndarray, sr: int) -> List[Tuple[int, int]]:
+        """Speech as (start, end) sample ranges"""
+        mask, hop = self.speech_mask(y, sr)
+        return mask_to_segments(mask, hop, len(y))
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Start, length and value of every run of equal values"""
+    change = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    starts = np.concatenate([[0], change])
+    lengths = np.diff(np.concatenate([starts, [len(mask)]]))
+    return starts, lengths, mask[starts]
+
+
+def _fill_runs(mask: np.ndarray, value: bool, max_length: int, interior_only: bool = False) -> np.ndarray:
+    """Flip runs of `value` no longer than max_length to the opposite value"""
+    if max_length <= 0 or len(mask) == 0:
+        return mask
+    mask = mask.copy()
+    starts, lengths, values = _runs(mask)
+    for start, length, run_value in zip(starts, lengths, values):
+        if run_value != value or length > max_length:
+            continue
+        # Runs touching either end of the clip are leading/trailing, not gaps
+        if interior_only and (start == 0 or start + length == len(mask)):
+            continue
+        mask[start:start + length] = not value
+    return mask
+
+
+def _dilate(mask: np.ndarray, frames: int) -> np.ndarray:
+    """Extend every True run by `frames` on both sides"""
+    if frames <= 0 or not mask.any():
+        return mask
+    counts = np.convolve(mask.astype(np.int32), np.ones(2 * frames + 1, dtype=np.int32), mode="same")
+    return counts > 0
+
+
+def mask_to_segments(mask: np.ndarray, hop: int, n_samples: int) -> List[Tuple[int, int]]:
+    """Convert a frame mask from speech_mask() to (start, end) sample ranges"""
+    if len(mask) == 0 or not mask.any():
+        return []
+    starts, lengths, values = _runs(mask)
+    return [
+        (int(start * hop), int(min((start + length + 1) * hop, n_samples)))
+        for start, length, value in zip(starts, lengths, values) if value
+    ]
+
+
+def sample_segments(
+    y: np.ndarray,
+    sr: int,
+    max_seconds: float,
+    segment_seconds: float = 5.0,
+    speech_mask: Optional[np.ndarray] = None,
+    hop: int = 1
+) -> np.ndarray:
+    """
+    Cap a signal to about max_seconds by sampling segments spread over its whole length
+
+    The signal is cut into segment_seconds chunks and split into as many equal
+    strata as chunks fit in max_seconds. From every stratum the chunk with the
+    most speech (per speech_mask, if given) is kept, so the result covers the
+    start, middle and end of the clip instead of only its beginning.
+    """
+    max_samples = int(max_seconds * sr)
+    if len(y) <= max_samples:
+        return y
+    segment = max(1, min(int(segment_seconds * sr), max_samples))
+
+    n_chunks = len(y) // segment
+    n_keep = max_samples // segment
+    if speech_mask is not None and len(speech_mask) > 0:
+        frames_per_chunk = max(1, segment // hop)
+        usable = speech_mask[:n_chunks * frames_per_chunk]
+        usable = np.pad(usable, (0, n_chunks * frames_per_chunk - len(usable)))
+        speech = usable.reshape(n_chunks, frames_per_chunk).mean(axis=1)
+    else:
+        speech = np.ones(n_chunks)
+
+    bounds = np.linspace(0, n_chunks, n_keep + 1).astype(int)
+    keep = [lo + int(np.argmax(speech[lo:hi])) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    return np.concatenate([y[i * segment:(i + 1) * segment] for i in keep])
@@ -0,0 +1,23 @@
+import io
+
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 22050
+
+
+def voice_signal(seconds: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Voiced tone with a syllable-rate envelope, which the VAD detects as speech"""
+    t = np.arange(int(seconds * sr)) / sr
+    pitch = 150 + 20 * np.sin(2 * np.pi * 3 * t)
+    envelope = 0.5 - 0.5 * np.cos(2 * np.pi * 4 * t)
+    y = 0.1 * envelope * np.sin(2 * np.pi * np.cumsum(pitch) / sr)
+    y += 0.005 * np.random.default_rng(seed).standard_normal(len(y))
+    return y.astype(np.float32)
+
+
+def wav_bytes(y: np.ndarray, sr: int = SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format="WAV")
+    return buffer.getvalue()
+
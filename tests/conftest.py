@@ -0,0 +1,8 @@
+import pytest
+
+from .audio import voice_signal
+
+
+@pytest.fixture
+def voice():
+    return voice_signal
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services.admission import AdmissionController
+
+
+async def hold(controller: AdmissionController, seconds: float, key: str = "key"):
+    async with controller.admit(key):
+        await asyncio.sleep(seconds)
+
+
+async def outcomes(*coroutines):
+    """Status code of every request, 200 for admitted ones"""
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    return [result.status_code if isinstance(result, HTTPException) else 200 for result in results]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_ms=5000)
+
+    async def run():
+        running = asyncio.create_task(hold(controller, 0.1))
+        queued = asyncio.create_task(hold(controller, 0.1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as error:
+            await hold(controller, 0.1)
+        await asyncio.gather(running, queued)
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 1
+    assert controller.metrics()["rejected"]["queueFull"] == 1
+
+
+def test_waiters_time_out_at_the_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout_ms=50)
+    codes = asyncio.run(outcomes(hold(controller, 0.3), hold(controller, 0.01)))
+    assert codes == [200, 503]
+    metrics = controller.metrics()
+    assert metrics["rejected"]["timeout"] == 1
+    assert metrics["maxQueueWaitMs"] >= 50
+
+
+def test_unreachable_deadline_is_rejected_up_front():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout_ms=100)
+
+    async def run():
+        # Teach the controller that a slot is held for ~0.2 s
+        await hold(controller, 0.2)
+        return await outcomes(hold(controller, 0.2), hold(controller, 0.01))
+
+    assert asyncio.run(run()) == [200, 503]
+    assert controller.metrics()["rejected"]["deadline"] == 1
+
+
+def test_per_key_quota():
+    controller = AdmissionController(max_in_flight=4, max_queue=4, per_key_max_in_flight=1)
+    codes = asyncio.run(outcomes(hold(controller, 0.05, "a"), hold(controller, 0.05, "a"), hold(controller, 0.05, "b")))
+    assert codes == [200, 429, 200]
+
+
+def test_slots_are_handed_over_in_order_and_released():
+    controller = AdmissionController(max_in_flight=2, max_queue=8, queue_timeout_ms=5000)
+    order = []
+
+    async def job(index: int):
+        async with controller.admit():
+            order.append(index)
+            await asyncio.sleep(0.02)
+
+    async def run():
+        tasks = [asyncio.create_task(job(index)) for index in range(6)]
+        await asyncio.sleep(0.005)
+        # A cancelled waiter gives up its place without leaking a slot
+        tasks[3].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    assert order == [0, 1, 2, 4, 5]
+    metrics = controller.metrics()
+    assert (metrics["inFlight"], metrics["queued"], metrics["activeKeys"]) == (0, 0, 0)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from multiprocessing import shared_memory
+
+import pytest
+
+from backend.app.services import extraction_pool
+from backend.app.services.extraction_pool import ExtractionPool
+from ml_engine.feature_extractor import AudioFeatureExtractor
+
+from .audio import voice_signal, wav_bytes
+
+
+class RecordingSharedMemory(shared_memory.SharedMemory):
+    """Remembers the blocks the pool creates"""
+    names = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.names.append(self.name)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    extractor = AudioFeatureExtractor()
+    pool = ExtractionPool(extractor.get_config(), workers=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def blocks(monkeypatch):
+    RecordingSharedMemory.names = []
+    monkeypatch.setattr(extraction_pool.shared_memory, "SharedMemory", RecordingSharedMemory)
+    return RecordingSharedMemory.names
+
+
+async def extract(pool: ExtractionPool, audio: bytes):
+    try:
+        return await pool.extract(audio)
+    finally:
+        # The block is released by a callback scheduled on the loop
+        await asyncio.sleep(0.05)
+
+
+def assert_released(pool: ExtractionPool, names):
+    assert pool.metrics()["pending"] == 0
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_clip_is_extracted_in_a_worker(pool, blocks):
+    audio = wav_bytes(voice_signal(2.0))
+    features = asyncio.run(extract(pool, audio))
+    assert features.tolist() == AudioFeatureExtractor().extract_feature_array(audio).tolist()
+    assert_released(pool, blocks)
+
+
+def test_corrupt_clip_reports_the_decode_error(pool, blocks):
+    with pytest.raises(ValueError, match="Failed to load audio"):
+        asyncio.run(extract(pool, b"ID3" + os.urandom(4096)))
+    assert len(blocks) == 1
+    assert_released(pool, blocks)
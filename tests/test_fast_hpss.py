@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scipy.ndimage import median_filter
+
+from ml_engine.fast_hpss import CONTEXT_FRAMES, harmonic_frame_stats, median_filter_lines
+from ml_engine.feature_extractor import AudioFeatureExtractor
+
+from .audio import voice_signal, wav_bytes
+
+# README: the fast estimator is usually within 5-17% of librosa's HPSS
+HPSS_TOLERANCE = 0.2
+
+
+@pytest.mark.parametrize("noise", [0.0, 0.05])
+@pytest.mark.parametrize("seconds", [1.0, 8.0])
+def test_fast_estimate_is_close_to_librosa_hpss(seconds, noise):
+    y = voice_signal(seconds)
+    y += noise * np.random.default_rng(1).standard_normal(len(y)).astype(np.float32)
+    audio = wav_bytes(y)
+    # hnr, harmonic_mean, percussive_mean
+    exact = AudioFeatureExtractor(harmonic_estimator="hpss").extract_feature_array(audio)[-3:]
+    fast = AudioFeatureExtractor(harmonic_estimator="fast").extract_feature_array(audio)[-3:]
+    np.testing.assert_allclose(fast, exact, rtol=HPSS_TOLERANCE)
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_median_filter_lines_matches_scipy(axis):
+    x = np.random.default_rng(0).random((40, 70)).astype(np.float32)
+    size = (31, 1) if axis == 0 else (1, 31)
+    np.testing.assert_array_equal(median_filter_lines(x, 31, axis), median_filter(x, size=size, mode="reflect"))
+
+
+def test_frames_with_context_match_the_whole_spectrogram():
+    extractor = AudioFeatureExtractor()
+    power = extractor.compute_spectrogram(voice_signal(4.0)).power
+    whole = harmonic_frame_stats(power, extractor.n_fft, extractor.hop_length)
+    start, end = 50, 90
+    chunk = harmonic_frame_stats(
+        power[:, start - CONTEXT_FRAMES:end + CONTEXT_FRAMES], extractor.n_fft, extractor.hop_length
+    )
+    np.testing.assert_allclose(chunk[:, CONTEXT_FRAMES:-CONTEXT_FRAMES], whole[:, start:end], rtol=1e-6)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from ml_engine.feature_extractor import AudioFeatureExtractor
+
+from .audio import voice_signal, wav_bytes
+
+
+@pytest.mark.parametrize("source_rate", [22050, 16000])
+@pytest.mark.parametrize("seconds", [1.0, 3.0, 7.3])
+def test_shared_stft_matches_per_stage_librosa(seconds, source_rate):
+    audio = wav_bytes(voice_signal(seconds, source_rate), source_rate)
+    reference = AudioFeatureExtractor(shared_stft=False, reuse_buffers=False).extract_feature_array(audio)
+
+    extractor = AudioFeatureExtractor()
+    features = extractor.extract_feature_array(audio)
+    assert features.dtype == np.float32
+    assert features.shape == (len(extractor.get_feature_names()),)
+    np.testing.assert_allclose(features, reference, rtol=1e-5)
+
+
+def test_reused_buffers_do_not_leak_between_clips():
+    extractor = AudioFeatureExtractor()
+    short, long = wav_bytes(voice_signal(1.0, seed=1)), wav_bytes(voice_signal(4.0, seed=2))
+    first = extractor.extract_feature_array(short)
+    extractor.extract_feature_array(long)
+    np.testing.assert_array_equal(extractor.extract_feature_array(short), first)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_engine.flat_forest import FlatForest
+
+
+@pytest.fixture(scope="module")
+def trained():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 40)) * rng.uniform(0.1, 100.0, size=40)
+    y = (X[:, 0] / 100.0 + X[:, 3] + rng.normal(size=400) > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    forest = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    return forest, scaler, rng.normal(size=(200, 40)) * rng.uniform(0.1, 100.0, size=40)
+
+
+def test_matches_sklearn_predict_proba(trained):
+    forest, scaler, X = trained
+    flat = FlatForest.from_sklearn(forest, scaler)
+    assert flat.max_probability_error(forest, scaler, X) < 1e-6
+    np.testing.assert_array_equal(flat.predict(X), forest.predict(scaler.transform(X)))
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_and_load_round_trip(trained, tmp_path, mmap):
+    forest, scaler, X = trained
+    flat = FlatForest.from_sklearn(forest, scaler)
+    flat.save(tmp_path / "forest.npz")
+    loaded = FlatForest.load(tmp_path / "forest.npz", mmap=mmap)
+    np.testing.assert_array_equal(loaded.predict_proba(X), flat.predict_proba(X))
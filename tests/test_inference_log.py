@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from backend.app.models.database import Base, InferenceLog, InferenceRollup
+from backend.app.services import inference_log
+from backend.app.services.inference_log import InferenceLogSink
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(inference_log, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def stored(engine):
+    """Rows in inference_logs and the rows counted by the rollups"""
+    with engine.connect() as connection:
+        logs = connection.execute(select(func.count()).select_from(InferenceLog)).scalar()
+        rolled_up = connection.execute(select(func.sum(InferenceRollup.count))).scalar() or 0
+    return logs, rolled_up
+
+
+def log(sink: InferenceLogSink, n: int):
+    return [sink.log("Hindi", "HUMAN", 0.9, 120) for _ in range(n)]
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_interval(engine):
+    sink = InferenceLogSink(batch_size=5, flush_interval_ms=60000)
+
+    async def run():
+        log(sink, 5)
+        await asyncio.sleep(0.5)
+        full_batch = stored(engine)
+        log(sink, 2)
+        await asyncio.sleep(0.5)
+        return full_batch, stored(engine), sink.metrics()
+
+    full_batch, partial_batch, metrics = asyncio.run(run())
+    assert full_batch == (5, 5)
+    assert partial_batch == (5, 5)
+    assert (metrics["writtenTotal"], metrics["flushesTotal"], metrics["bufferedRows"]) == (5, 1, 2)
+
+
+def test_partial_batch_is_flushed_on_the_interval(engine):
+    sink = InferenceLogSink(batch_size=100, flush_interval_ms=50)
+
+    async def run():
+        log(sink, 3)
+        assert stored(engine) == (0, 0)
+        await asyncio.sleep(0.5)
+        return stored(engine)
+
+    assert asyncio.run(run()) == (3, 3)
+
+
+def test_rows_beyond_the_buffer_are_dropped_and_counted(engine):
+    sink = InferenceLogSink(batch_size=3, flush_interval_ms=60000, max_buffer=3)
+
+    async def run():
+        accepted = log(sink, 5)
+        await sink.close()
+        return accepted
+
+    assert asyncio.run(run()) == [True] * 3 + [False] * 2
+    assert sink.metrics()["droppedTotal"] == 2
+    assert stored(engine) == (3, 3)
+
+
+def test_close_flushes_buffered_rows(engine):
+    sink = InferenceLogSink(batch_size=100, flush_interval_ms=60000)
+
+    async def run():
+        log(sink, 7)
+        await sink.close()
+
+    asyncio.run(run())
+    assert stored(engine) == (7, 7)
+    assert sink.metrics()["bufferedRows"] == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from ml_engine import result_cache
+from ml_engine.result_cache import ResultCache
+
+RESULT = ("HUMAN", 0.9, "explanation")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache, "time", fake)
+    return fake
+
+
+def store(cache: ResultCache, key: str = "clip", model: str = "model", features: str = "features"):
+    cache.store(key, model, features, np.arange(40, dtype=np.float32), RESULT)
+
+
+def test_hit_feature_hit_and_miss(clock):
+    cache = ResultCache(max_entries=8, ttl_seconds=60)
+    assert cache.lookup("clip", "model", "features") == (None, None)
+    store(cache)
+
+    features, result = cache.lookup("clip", "model", "features")
+    assert result == RESULT
+    np.testing.assert_array_equal(features, np.arange(40))
+
+    # Retrained model, same feature settings: features are reused, the result is not
+    features, result = cache.lookup("clip", "retrained", "features")
+    assert result is None and features is not None
+
+    assert cache.lookup("clip", "retrained", "new-features") == (None, None)
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["featureHits"], metrics["misses"]) == (1, 1, 2)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_entries=8, ttl_seconds=60)
+    store(cache)
+    clock.now += 59
+    assert cache.lookup("clip", "model", "features")[1] == RESULT
+    clock.now += 2
+    assert cache.lookup("clip", "model", "features") == (None, None)
+    assert cache.metrics()["entries"] == 0
+
+
+def test_lru_evicts_oldest_entry(clock):
+    cache = ResultCache(max_entries=2, ttl_seconds=0)
+    for key in ("a", "b"):
+        store(cache, key)
+    cache.lookup("a", "model", "features")
+    store(cache, "c")
+    assert cache.lookup("b", "model", "features") == (None, None)
+    assert cache.lookup("a", "model", "features")[1] == RESULT
+
+
+def test_shared_tier_serves_other_instances(clock, tmp_path):
+    path = str(tmp_path / "cache.db")
+    store(ResultCache(ttl_seconds=60, db_path=path))
+    assert ResultCache(ttl_seconds=60, db_path=path).lookup("clip", "model", "features")[1] == RESULT
+    clock.now += 61
+    assert ResultCache(ttl_seconds=60, db_path=path).lookup("clip", "model", "features") == (None, None)
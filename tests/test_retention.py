@@ -0,0 +1,71 @@
+import asyncio
+import random
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+
+from backend.app.models.database import Base, InferenceLog
+from backend.app.services import retention as retention_module
+from backend.app.services.retention import LogRetention, run_retention_periodically
+from backend.app.services.stats import update_rollups
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(retention_module, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def add_old_logs(engine, days: int, per_day: int):
+    rng = random.Random(0)
+    first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=40)
+    rows = [
+        {
+            "timestamp": first_day + timedelta(days=day, seconds=rng.randrange(86400)),
+            "language": "Hindi",
+            "classification": "HUMAN",
+            "confidence_score": rng.random(),
+            "response_time_ms": rng.randrange(1, 900),
+        }
+        for day in range(days) for _ in range(per_day)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(InferenceLog), rows)
+        update_rollups(connection, rows)
+
+
+def raw_rows(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(InferenceLog)).scalar()
+
+
+def test_run_archives_and_deletes_old_days(engine, tmp_path):
+    add_old_logs(engine, days=3, per_day=50)
+    summary = LogRetention(30, str(tmp_path / "archive"), delete_batch_size=20, batch_pause_seconds=0).run()
+    assert (summary["days"], summary["rowsArchived"], summary["rowsDeleted"]) == (3, 150, 150)
+    assert not summary["stopped"]
+    assert raw_rows(engine) == 0
+
+
+def test_cancelled_task_waits_for_the_run_in_progress(engine, tmp_path):
+    add_old_logs(engine, days=5, per_day=200)
+    retention = LogRetention(30, str(tmp_path / "archive"), delete_batch_size=10, batch_pause_seconds=0.01)
+
+    async def run():
+        task = asyncio.create_task(run_retention_periodically(retention, 24))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    # The run had returned, and so released the database, before the task ended
+    summary = retention.last_run
+    assert summary is not None and summary["stopped"]
+    assert 0 < summary["rowsDeleted"] < 1000
+    assert raw_rows(engine) == 1000 - summary["rowsDeleted"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from ml_engine.feature_extractor import AudioFeatureExtractor
+from ml_engine.segments import aggregate_segments
+
+from .audio import SAMPLE_RATE, voice_signal, wav_bytes
+
+
+@pytest.fixture(scope="module")
+def speech_silence_speech():
+    """Window bounds and harmonic_mean of 4 s speech, 4 s silence, 4 s speech in 2 s windows every 1 s"""
+    extractor = AudioFeatureExtractor()
+    y = np.concatenate([voice_signal(4.0), np.zeros(4 * SAMPLE_RATE, dtype=np.float32), voice_signal(4.0, seed=1)])
+    bounds, features = extractor.extract_segment_features(wav_bytes(y), window_seconds=2.0, hop_seconds=1.0)
+    assert features.shape == (len(bounds), len(extractor.get_feature_names()))
+    return bounds, features[:, extractor.get_feature_names().index("harmonic_mean")]
+
+
+def test_windows_tile_the_clip(speech_silence_speech):
+    bounds, _ = speech_silence_speech
+    assert bounds[0, 0] == 0.0
+    # The last window is aligned with the end of the clip
+    assert bounds[-1, 1] == pytest.approx(12.0)
+    np.testing.assert_allclose(bounds[:-1, 1] - bounds[:-1, 0], 2.0, atol=0.05)
+    np.testing.assert_allclose(np.diff(bounds[:-1, 0]), 1.0, atol=0.05)
+
+
+def test_silent_windows_carry_no_harmonic_energy(speech_silence_speech):
+    bounds, harmonic_mean = speech_silence_speech
+    inside_silence = (bounds[:, 0] >= 3.9) & (bounds[:, 1] <= 8.1)
+    inside_speech = (bounds[:, 1] <= 4.1) | (bounds[:, 0] >= 7.9)
+    assert inside_silence.sum() == 3
+    # Edge frames still see a little of the speech just outside the window
+    assert np.all(harmonic_mean[inside_silence] < 1e-4)
+    assert np.all(harmonic_mean[inside_speech] > 0.01)
+
+
+def test_aggregate_flags_a_long_enough_span(speech_silence_speech):
+    bounds, harmonic_mean = speech_silence_speech
+    # Stand-in classifier: the silent middle plays the spliced synthetic section
+    ai_probability = np.where(harmonic_mean < 1e-4, 0.9, 0.1)
+
+    is_ai, confidence, deciding = aggregate_segments(bounds, ai_probability, min_ai_seconds=3.0)
+    assert is_ai
+    assert deciding == [4, 5, 6]
+    assert confidence == pytest.approx(0.9)
+
+    is_ai, confidence, deciding = aggregate_segments(bounds, ai_probability, min_ai_seconds=5.0)
+    assert not is_ai
+    assert deciding == list(range(len(bounds)))
+    assert confidence == pytest.approx(1.0 - ai_probability.mean())
+
+
+def test_aggregate_of_a_short_all_ai_clip():
+    bounds = np.array([[0.0, 1.5]])
+    assert aggregate_segments(bounds, np.array([0.8]), min_ai_seconds=3.0) == (True, pytest.approx(0.8), [0])
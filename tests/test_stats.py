@@ -0,0 +1,81 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+
+from backend.app.models.database import Base, InferenceLog, InferenceRollup
+from backend.app.services import stats
+from backend.app.services.stats import rebuild_rollups, update_rollups
+
+
+def log_rows(n: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 12, 0)
+    return [
+        {
+            "timestamp": start + timedelta(seconds=rng.randrange(600)),
+            "language": rng.choice(["Hindi", "Tamil"]),
+            "classification": rng.choice(["HUMAN", "AI_GENERATED"]),
+            "confidence_score": rng.random(),
+            "response_time_ms": rng.randrange(1, 900),
+        }
+        for _ in range(n)
+    ]
+
+
+def rollups_after(tmp_path, name: str, batches):
+    engine = create_engine(f"sqlite:///{tmp_path / name}")
+    Base.metadata.create_all(bind=engine)
+    for rows in batches:
+        with engine.begin() as connection:
+            update_rollups(connection, rows)
+    cells = read_rollups(engine)
+    engine.dispose()
+    return cells
+
+
+def read_rollups(engine):
+    with engine.connect() as connection:
+        cells = connection.execute(select(InferenceRollup.__table__)).all()
+    return {
+        (cell.bucket_start, cell.language, cell.classification): (
+            cell.count, pytest.approx(cell.confidence_sum), cell.response_time_sum, cell.response_time_max,
+            json.loads(cell.confidence_histogram), json.loads(cell.latency_histogram)
+        )
+        for cell in cells
+    }
+
+
+def test_batches_merge_into_the_same_rollups_as_one_aggregation(tmp_path):
+    batches = [log_rows(300, seed) for seed in range(4)]
+    merged = rollups_after(tmp_path, "batches.db", batches)
+    assert merged == rollups_after(tmp_path, "single.db", [sum(batches, [])])
+    assert sum(cell[0] for cell in merged.values()) == 1200
+
+
+def test_locking_merge_matches_the_upsert(tmp_path, monkeypatch):
+    batches = [log_rows(300, seed) for seed in range(4)]
+    upserted = rollups_after(tmp_path, "upsert.db", batches)
+    # Databases without a known upsert take the SELECT ... FOR UPDATE path
+    monkeypatch.setattr(stats, "UPSERT_DIALECTS", ())
+    assert rollups_after(tmp_path, "locked.db", batches) == upserted
+
+
+def test_rebuild_replaces_rollups_one_slice_per_transaction(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rebuild.db'}")
+    Base.metadata.create_all(bind=engine)
+    rows = log_rows(500, seed=0) + [dict(row, timestamp=row["timestamp"] + timedelta(days=2)) for row in log_rows(100, 1)]
+    with engine.begin() as connection:
+        # Logged before rollups existed: raw rows only, plus a stale cell
+        connection.execute(insert(InferenceLog), rows)
+        update_rollups(connection, rows[:10])
+
+    commits = []
+    event.listen(engine, "commit", lambda connection: commits.append(connection))
+    assert rebuild_rollups(engine, slice_minutes=5, chunk_size=64) == 600
+    # Two 5-minute slices of logs on each day; the two days in between are skipped
+    assert len(commits) == 4
+    assert read_rollups(engine) == rollups_after(tmp_path, "expected.db", [rows])
+    engine.dispose()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from ml_engine.feature_extractor import AudioFeatureExtractor
+from ml_engine.streaming import RunningStats, StreamingFeatureExtractor
+
+from .audio import voice_signal, wav_bytes
+
+
+def uneven_chunks(y: np.ndarray, seed: int = 0):
+    """Chunks from a single sample up to a few STFT frames, so boundaries land everywhere"""
+    rng = np.random.default_rng(seed)
+    start = 0
+    while start < len(y):
+        size = int(rng.choice([1, 7, 511, 2048, 3001, 20000]))
+        yield y[start:start + size]
+        start += size
+
+
+def test_running_stats_merge_uneven_blocks():
+    values = np.random.default_rng(0).normal(3.0, 2.0, size=(4, 1000))
+    stats = RunningStats(4)
+    for start, stop in ((0, 1), (1, 2), (2, 300), (300, 300), (300, 1000)):
+        stats.update(values[:, start:stop])
+    assert stats.count == 1000
+    np.testing.assert_allclose(stats.mean, values.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(stats.std, values.std(axis=1), rtol=1e-12)
+
+
+# The autocorrelation pitch estimator is left out: its frames do not span blocks
+@pytest.mark.parametrize("harmonic_estimator", ["hpss", "fast"])
+def test_chunked_stream_matches_whole_clip(harmonic_estimator):
+    extractor = AudioFeatureExtractor(harmonic_estimator=harmonic_estimator)
+    audio = wav_bytes(voice_signal(6.1))
+    reference = extractor.extract_feature_array(audio)
+
+    y, _ = extractor.load_audio_from_bytes(audio)
+    stream = StreamingFeatureExtractor(extractor)
+    for chunk in uneven_chunks(y):
+        stream.push(chunk)
+    features, _ = stream.finish()
+    streamed = np.array([features[name] for name in extractor.get_feature_names()])
+    np.testing.assert_allclose(streamed, reference, rtol=1e-5)
+
+
+def test_block_decoding_matches_whole_clip():
+    extractor = AudioFeatureExtractor()
+    audio = wav_bytes(voice_signal(6.1))
+    features, _ = extractor.extract_all_features_streaming(audio, block_seconds=0.37)
+    streamed = np.array([features[name] for name in extractor.get_feature_names()])
+    np.testing.assert_allclose(streamed, extractor.extract_feature_array(audio), rtol=1e-5)
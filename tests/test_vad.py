@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from ml_engine import timing
+from ml_engine.feature_extractor import AudioFeatureExtractor
+from ml_engine.vad import InsufficientSpeechError
+
+from .audio import SAMPLE_RATE, wav_bytes
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_trim_drops_leading_silence(voice):
+    extractor = AudioFeatureExtractor(vad_trim=True)
+    y = np.concatenate([silence(2.0), voice(3.0)])
+    trimmed = extractor.gate_audio(y, SAMPLE_RATE)
+    assert 2.5 * SAMPLE_RATE < len(trimmed) < 3.5 * SAMPLE_RATE
+
+
+def test_cap_limits_analysed_length(voice):
+    extractor = AudioFeatureExtractor(max_analysis_seconds=6.0)
+    assert len(extractor.gate_audio(voice(20.0), SAMPLE_RATE)) <= 6 * SAMPLE_RATE
+
+
+def test_gate_is_a_no_op_when_disabled(voice):
+    y = voice(3.0)
+    assert AudioFeatureExtractor().gate_audio(y, SAMPLE_RATE) is y
+
+
+@pytest.mark.parametrize("options", [{}, {"streaming_min_seconds": 1.0}])
+def test_silence_is_rejected_on_every_path(options):
+    extractor = AudioFeatureExtractor(min_speech_seconds=1.0, **options)
+    with pytest.raises(InsufficientSpeechError):
+        extractor.extract_feature_array(wav_bytes(silence(4.0)))
+
+
+def test_silence_is_rejected_by_segment_path():
+    extractor = AudioFeatureExtractor(min_speech_seconds=1.0)
+    with pytest.raises(InsufficientSpeechError):
+        extractor.extract_segment_features(wav_bytes(silence(4.0)))
+
+
+def test_speech_passes_the_minimum(voice):
+    extractor = AudioFeatureExtractor(min_speech_seconds=1.0, streaming_min_seconds=1.0)
+    features, _ = extractor.extract_all_features_streaming(wav_bytes(voice(3.0)))
+    assert len(features) == len(extractor.get_feature_names())
+
+
+def test_streaming_path_stops_at_the_cap(voice):
+    extractor = AudioFeatureExtractor(max_analysis_seconds=4.0)
+    _, windows = extractor.extract_all_features_streaming(wav_bytes(voice(12.0)), window_seconds=2.0)
+    assert windows[-1]["end"] == pytest.approx(4.0)
+
+
+def test_gate_and_stft_are_timed_as_their_own_stages(voice):
+    extractor = AudioFeatureExtractor(min_speech_seconds=0.5)
+    y = voice(2.0)
+    with timing.collect() as timings:
+        extractor.gate_audio(y, SAMPLE_RATE)
+    assert set(timings) == {"vad"}
+    with timing.collect() as timings:
+        extractor.compute_spectrogram(y)
+    assert set(timings) == {"stft"}
@@ -0,0 +1,59 @@
+"""
+Compare the legacy per-stage STFT path with the shared-STFT feature pipeline.
+
+Usage:
+    python tools/benchmark_feature_pipeline.py --durations 5 30 60 --repeat 5
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extractor import AudioFeatureExtractor  # noqa: E402
+from synthetic_audio import make_voice_clip, to_audio_bytes  # noqa: E402
+
+
+def time_extraction(extractor: AudioFeatureExtractor, audio_bytes: bytes, repeat: int):
+    """Return the best wall time (seconds) and the feature vector"""
+    timings = []
+    features = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        features = extractor.extract_all_features(audio_bytes)
+        timings.append(time.perf_counter() - start)
+    return min(timings), np.array(list(features.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[5.0, 30.0, 60.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = AudioFeatureExtractor(shared_stft=False)
+    shared = AudioFeatureExtractor(shared_stft=True)
+
+    # Warm up numba-compiled librosa kernels so they don't skew the first row
+    warmup = to_audio_bytes(make_voice_clip(1.0), legacy.sample_rate)
+    legacy.extract_all_features(warmup)
+    shared.extract_all_features(warmup)
+
+    print(f"{'duration':>9} {'legacy ms':>10} {'shared ms':>10} {'speedup':>8} {'max rel diff':>13}")
+    for duration in args.durations:
+        audio_bytes = to_audio_bytes(make_voice_clip(duration), legacy.sample_rate)
+        legacy_s, legacy_vec = time_extraction(legacy, audio_bytes, args.repeat)
+        shared_s, shared_vec = time_extraction(shared, audio_bytes, args.repeat)
+        rel_diff = np.max(np.abs(legacy_vec - shared_vec) / np.maximum(np.abs(legacy_vec), 1e-9))
+        print(
+            f"{duration:>8.0f}s {legacy_s * 1000:>10.1f} {shared_s * 1000:>10.1f} "
+            f"{legacy_s / shared_s:>7.2f}x {rel_diff:>13.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Measure the cold-start import cost of the API process.
+
+Imports a module in fresh interpreters under `python -X importtime` and reports
+the median import time of the module, the wall time of the whole process and
+the heaviest top-level packages. The heavy DSP/ML stacks (scipy.signal,
+scipy.ndimage, sklearn, numba, librosa.core) are imported on first use, so
+importing the API must not pull them in; --forbid lists the modules that make
+the run fail if they appear.
+
+Exits with status 1 when the median import time exceeds --budget-ms or a
+forbidden module is imported, so it can gate startup regressions in CI.
+
+Usage:
+    python tools/benchmark_import.py --module backend.main --runs 5 --budget-ms 1500
+    python tools/benchmark_import.py --json import_times.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).parent.parent
+
+DEFAULT_FORBIDDEN = ["scipy.signal", "scipy.ndimage", "sklearn", "numba", "librosa.core", "joblib"]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_once(module: str) -> Tuple[float, Dict[str, int]]:
+    """Import module in a fresh interpreter; return (wall seconds, cumulative microseconds per module)"""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return wall, cumulative
+
+
+def top_packages(cumulative: Dict[str, int], count: int) -> List[Tuple[str, int]]:
+    """Heaviest top-level packages, by the largest cumulative time of any of their modules"""
+    packages: Dict[str, int] = {}
+    for name, micros in cumulative.items():
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), micros)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="Number of heaviest packages to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="Modules that must not be imported")
+    parser.add_argument("--json", type=Path, default=None, help="Write the results to this file")
+    args = parser.parse_args()
+
+    walls, module_ms, runs = [], [], []
+    for _ in range(args.runs):
+        wall, cumulative = import_once(args.module)
+        walls.append(wall * 1000)
+        module_ms.append(cumulative.get(args.module, 0) / 1000)
+        runs.append(cumulative)
+
+    median_import = statistics.median(module_ms)
+    median_wall = statistics.median(walls)
+    # Package costs of the run closest to the median
+    representative = runs[module_ms.index(sorted(module_ms)[len(module_ms) // 2])]
+    packages = top_packages(representative, args.top)
+    forbidden = sorted(name for name in args.forbid if any(name in run for run in runs))
+
+    print(f"import {args.module}: median {median_import:.0f} ms over {args.runs} runs "
+          f"(min {min(module_ms):.0f}, max {max(module_ms):.0f}); process wall time {median_wall:.0f} ms")
+    print(f"\n{'package':<24} {'ms':>8}")
+    for package, micros in packages:
+        print(f"{package:<24} {micros / 1000:>8.1f}")
+
+    failures = []
+    if forbidden:
+        failures.append(f"forbidden modules imported: {', '.join(forbidden)}")
+    if args.budget_ms is not None and median_import > args.budget_ms:
+        failures.append(f"median import time {median_import:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({
+                "module": args.module,
+                "runs": args.runs,
+                "importMs": {"median": median_import, "min": min(module_ms), "max": max(module_ms)},
+                "wallMs": {"median": median_wall},
+                "packagesMs": {package: micros / 1000 for package, micros in packages},
+                "forbiddenImported": forbidden,
+                "budgetMs": args.budget_ms,
+                "passed": not failures,
+            }, f, indent=2)
+
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
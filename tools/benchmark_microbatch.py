@@ -0,0 +1,83 @@
+"""
+Load test for the inference micro-batcher.
+
+Simulates concurrent requests that each classify one feature vector, first with
+one threadpool call per request (the old path) and then through MicroBatcher.
+Feature extraction is left out so the numbers isolate the classifier stage.
+
+Usage:
+    python tools/benchmark_microbatch.py --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ml_engine import get_classifier  # noqa: E402
+from backend.app.services.batcher import MicroBatcher  # noqa: E402
+
+
+async def run_load(submit, vectors: np.ndarray, concurrency: int):
+    """Drive `submit` from `concurrency` clients; return per-request latencies and wall time"""
+    latencies = []
+    next_index = 0
+
+    async def client():
+        nonlocal next_index
+        while next_index < len(vectors):
+            vector = vectors[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            await submit(vector)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies), time.perf_counter() - start
+
+
+def report(name: str, latencies: np.ndarray, wall_s: float):
+    p50, p99 = np.percentile(latencies * 1000, [50, 99])
+    print(f"{name:<12} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   throughput {len(latencies) / wall_s:8.1f} req/s")
+
+
+async def main_async(args):
+    classifier = get_classifier()
+    vectors = np.random.default_rng(0).standard_normal((args.requests, len(classifier.feature_names)))
+
+    async def direct(vector):
+        return await run_in_threadpool(classifier.classify_features, vector.reshape(1, -1))
+
+    batcher = MicroBatcher(classifier.classify_features, args.max_batch_size, args.max_wait_ms)
+
+    # Warm up both paths
+    await run_load(direct, vectors[:32], 4)
+    await run_load(batcher.submit, vectors[:32], 4)
+
+    latencies, wall_s = await run_load(direct, vectors, args.concurrency)
+    report("per-request", latencies, wall_s)
+
+    latencies, wall_s = await run_load(batcher.submit, vectors, args.concurrency)
+    report("micro-batch", latencies, wall_s)
+    metrics = batcher.metrics()
+    print(f"mean batch size {metrics['meanBatchSize']:.1f}, largest {metrics['largestBatch']}")
+    await batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
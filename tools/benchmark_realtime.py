@@ -0,0 +1,97 @@
+"""
+Capacity test for real-time detection streams in one worker.
+
+Drives many simulated live calls through the same RealtimeSession and
+RealtimeStreamManager objects the WebSocket route uses (no sockets). Each call
+sends 16 kHz PCM in real time; the report shows verdict latency, how much of the
+worker's time analysis takes (realtime factor) and the per-stream memory held
+between chunks.
+
+Usage:
+    python tools/benchmark_realtime.py --streams 200 --seconds 30 --frame-ms 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backend.app.services.realtime import RealtimeSession, RealtimeStreamManager  # noqa: E402
+from synthetic_audio import make_voice_clip  # noqa: E402
+
+
+async def run_stream(manager, pcm: bytes, frame_bytes: int, frame_s: float, update_s: float, stats: dict):
+    """Send one call's audio at real-time pace and analyse it as the route does"""
+    manager.try_open()
+    session = RealtimeSession("pcm_s16le", 16000, 1, update_s)
+    start = time.perf_counter()
+
+    async def receive():
+        for i, offset in enumerate(range(0, len(pcm), frame_bytes)):
+            # Sleep until this frame would have been captured
+            await asyncio.sleep(max(0.0, start + i * frame_s - time.perf_counter()))
+            await session.inbox.put(pcm[offset:offset + frame_bytes])
+        await session.inbox.close()
+
+    receiver = asyncio.create_task(receive())
+    while True:
+        data = await session.inbox.take()
+        if data is None:
+            break
+        if await manager.feed(session, data):
+            verdict_start = time.perf_counter()
+            await manager.verdict(session)
+            stats["verdict_latency"].append(time.perf_counter() - verdict_start)
+        stats["memory"].append(session.memory_bytes())
+    await receiver
+    await manager.verdict(session, final=True)
+    manager.close(session)
+
+
+async def main_async(args):
+    manager = RealtimeStreamManager(max_streams=args.streams + 1, max_concurrency=args.concurrency)
+    y = make_voice_clip(args.seconds, 16000)
+    pcm = (y * 32767).astype("<i2").tobytes()
+    frame_s = args.frame_ms / 1000.0
+    frame_bytes = int(16000 * frame_s) * 2
+
+    # Load the model and compile librosa kernels before timing
+    await run_stream(manager, pcm[:16000 * 4], frame_bytes, 0.0, 1.0, {"verdict_latency": [], "memory": []})
+
+    stats = {"verdict_latency": [], "memory": []}
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    await asyncio.gather(*(
+        run_stream(manager, pcm, frame_bytes, frame_s, args.update_seconds, stats)
+        for _ in range(args.streams)
+    ))
+    wall_s = time.perf_counter() - start
+    cpu_s = time.process_time() - cpu_start
+
+    latencies = np.array(stats["verdict_latency"]) * 1000
+    memory = np.array(stats["memory"]) / 1e6
+    print(f"streams {args.streams}   audio {args.seconds:.0f} s each   wall {wall_s:.1f} s")
+    print(f"worker CPU per second of audio: {cpu_s / (args.streams * args.seconds) * 1000:.2f} ms "
+          f"(room for ~{args.streams * args.seconds / cpu_s:.0f} real-time streams per core)")
+    print(f"verdict latency p50 {np.percentile(latencies, 50):.1f} ms   p99 {np.percentile(latencies, 99):.1f} ms")
+    print(f"stream memory mean {memory.mean():.2f} MB   max {memory.max():.2f} MB")
+    print(f"metrics {manager.metrics()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--frame-ms", type=float, default=100.0)
+    parser.add_argument("--update-seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare in-memory and streaming feature extraction on long recordings.
+
+Each clip is written to a temporary WAV file and analysed both ways. The table
+shows wall time, peak Python-tracked memory (numpy buffers included) and the
+largest relative difference between the two feature vectors.
+
+Usage:
+    python tools/benchmark_streaming.py --durations 60 300 900 --window-seconds 30
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extractor import AudioFeatureExtractor  # noqa: E402
+from synthetic_audio import make_voice_clip  # noqa: E402
+
+
+def measure(fn):
+    """Run fn once; return (result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[60.0, 300.0])
+    parser.add_argument("--block-seconds", type=float, default=10.0)
+    parser.add_argument("--window-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    extractor = AudioFeatureExtractor()
+
+    print(
+        f"{'duration':>9} {'memory ms':>10} {'memory MB':>10} "
+        f"{'stream ms':>10} {'stream MB':>10} {'windows':>8} {'max rel diff':>13}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for duration in args.durations:
+            path = os.path.join(tmp, f"clip_{duration:.0f}s.wav")
+            y = make_voice_clip(duration, extractor.sample_rate)
+            sf.write(path, y, extractor.sample_rate)
+            del y
+
+            with open(path, "rb") as f:
+                audio_bytes = f.read()
+            batch, batch_s, batch_mb = measure(lambda: extractor.extract_all_features(audio_bytes))
+            del audio_bytes
+
+            (stream, windows), stream_s, stream_mb = measure(
+                lambda: extractor.extract_all_features_streaming(
+                    path, window_seconds=args.window_seconds, block_seconds=args.block_seconds
+                )
+            )
+
+            batch_vec = np.array(list(batch.values()))
+            stream_vec = np.array(list(stream.values()))
+            rel_diff = np.max(np.abs(batch_vec - stream_vec) / np.maximum(np.abs(batch_vec), 1e-9))
+            print(
+                f"{duration:>8.0f}s {batch_s * 1000:>10.0f} {batch_mb:>10.1f} "
+                f"{stream_s * 1000:>10.0f} {stream_mb:>10.1f} {len(windows):>8} {rel_diff:>13.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Benchmark suite for the feature extraction and inference hot paths.
+
+Generates synthetic voice clips (no real recordings needed) for every
+combination of --formats, --sample-rates and --durations, and times:
+
+  decode, stft, mfcc, spectral, zcr, pitch, harmonic
+                      each AudioFeatureExtractor stage on its own
+  extract_all         AudioFeatureExtractor.extract_all_features
+  predict             VoiceClassifier.predict (result cache disabled)
+  segments            VoiceClassifier.predict_segments (4 s windows, 2 s hop)
+  api                 POST /api/voice-detection through FastAPI's TestClient
+                      (MP3 clips only, as the endpoint only accepts MP3)
+
+Each benchmark runs once to warm up, then --repeat timed runs. It reports latency
+percentiles, throughput, the real-time factor (seconds of audio processed per
+second) and the peak traced memory of one extra run (numpy buffers included).
+The whole table can be saved with --json. A later run with --baseline compares
+each benchmark's p50 latency and peak memory with the saved file. It exits with
+status 1 when either grew by more than --tolerance.
+
+Usage:
+    python tools/benchmark_suite.py --json benchmarks/baseline.json
+    python tools/benchmark_suite.py --baseline benchmarks/baseline.json --tolerance 0.15
+    python tools/benchmark_suite.py --benchmarks mfcc pitch harmonic --formats WAV --durations 30
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; the peak RSS line is skipped there
+    resource = None
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extractor import AudioFeatureExtractor  # noqa: E402
+from synthetic_audio import make_voice_clip, to_audio_bytes  # noqa: E402
+
+STAGES = ["decode", "stft", "mfcc", "spectral", "zcr", "pitch", "harmonic"]
+BENCHMARKS = STAGES + ["extract_all", "predict", "segments", "api"]
+
+# Key shared by the benchmark client and the in-process API
+BENCHMARK_API_KEY = "benchmark-key"
+
+
+def measure(fn: Callable, repeat: int, audio_seconds: float) -> Dict:
+    """Warm up, time `repeat` runs of fn, then trace the peak memory of one more run"""
+    fn()
+
+    timings = []
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    wall_s = time.perf_counter() - wall_start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(timings) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "runs": repeat,
+        "meanMs": round(float(ms.mean()), 3),
+        "p50Ms": round(float(p50), 3),
+        "p95Ms": round(float(p95), 3),
+        "p99Ms": round(float(p99), 3),
+        "minMs": round(float(ms.min()), 3),
+        "maxMs": round(float(ms.max()), 3),
+        "throughputPerSecond": round(repeat / wall_s, 3),
+        "realtimeFactor": round(audio_seconds * repeat / wall_s, 2),
+        "peakMemoryMB": round(peak / 1e6, 2),
+    }
+
+
+def stage_benchmarks(extractor: AudioFeatureExtractor, audio_bytes: bytes) -> Dict[str, Callable]:
+    """One callable per extraction stage, fed with the decoded clip and its shared STFT"""
+    y, sr = extractor.load_audio_from_bytes(audio_bytes)
+    spec = extractor.compute_spectrogram(y)
+    return {
+        "decode": lambda: extractor.load_audio_from_bytes(audio_bytes),
+        "stft": lambda: extractor.compute_spectrogram(y),
+        "mfcc": lambda: extractor.extract_mfcc_features(y, sr, spec),
+        "spectral": lambda: extractor.extract_spectral_features(y, sr, spec),
+        "zcr": lambda: extractor.extract_zero_crossing_rate(y),
+        "pitch": lambda: extractor.extract_pitch_features(y, sr, spec),
+        "harmonic": lambda: extractor.extract_harmonic_features(y, sr, spec),
+        "extract_all": lambda: extractor.extract_all_features(audio_bytes),
+    }
+
+
+def load_classifier():
+    """VoiceClassifier without a result cache, or None when no model has been trained"""
+    from ml_engine import VoiceClassifier
+
+    try:
+        return VoiceClassifier(result_cache=None)
+    except FileNotFoundError as e:
+        print(f"Skipping predict/segments/api benchmarks: {e}")
+        return None
+
+
+def start_api_client(tmp_dir: str):
+    """TestClient around the real app, logging to a throwaway database"""
+    # Set before the backend reads its configuration at import time
+    os.environ["API_KEY"] = BENCHMARK_API_KEY
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp_dir) / 'benchmark.db'}"
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("MODEL_PRELOAD", "false")
+
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    client = TestClient(app)
+    client.__enter__()
+    return client
+
+
+def api_benchmark(client, audio_bytes: bytes) -> Callable:
+    body = {
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(audio_bytes).decode("ascii"),
+    }
+    headers = {"x-api-key": BENCHMARK_API_KEY}
+
+    def post():
+        response = client.post("/api/voice-detection", json=body, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"API returned {response.status_code}: {response.text}")
+
+    return post
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Print current vs baseline p50 and peak memory; return the regressions"""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'base p50':>9} {'p50':>9} {'ratio':>6} {'base MB':>8} {'MB':>8} {'ratio':>6}")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<40} {'(new)':>9}")
+            continue
+
+        time_ratio = current["p50Ms"] / max(base["p50Ms"], 1e-6)
+        memory_ratio = current["peakMemoryMB"] / max(base["peakMemoryMB"], 1e-6)
+        flags = []
+        if time_ratio > 1 + tolerance:
+            flags.append("SLOWER")
+            regressions.append(f"{key}: p50 {base['p50Ms']:.2f} -> {current['p50Ms']:.2f} ms ({time_ratio:.2f}x)")
+        # Below 1 MB the traced peak is noise from small temporaries
+        if memory_ratio > 1 + tolerance and current["peakMemoryMB"] >= 1.0:
+            flags.append("MORE MEMORY")
+            regressions.append(
+                f"{key}: peak memory {base['peakMemoryMB']:.1f} -> {current['peakMemoryMB']:.1f} MB ({memory_ratio:.2f}x)"
+            )
+        print(
+            f"{key:<40} {base['p50Ms']:>9.2f} {current['p50Ms']:>9.2f} {time_ratio:>5.2f}x "
+            f"{base['peakMemoryMB']:>8.1f} {current['peakMemoryMB']:>8.1f} {memory_ratio:>5.2f}x  {' '.join(flags)}"
+        )
+
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"\n{len(missing)} baseline benchmarks were not run this time")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[2.0, 10.0, 30.0], help="Clip lengths in seconds")
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[16000, 44100], help="Source sample rates")
+    parser.add_argument("--formats", nargs="+", default=["MP3", "WAV"], choices=["MP3", "WAV"])
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, choices=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--json", type=Path, default=None, help="Write the results to this file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare with results saved by --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed growth before a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # The app changes into the repository root on import; resolve user paths first
+    json_path = args.json.resolve() if args.json is not None else None
+    baseline_path = args.baseline.resolve() if args.baseline is not None else None
+    os.chdir(REPO_ROOT)
+
+    classifier = None
+    if {"predict", "segments", "api"} & set(args.benchmarks):
+        classifier = load_classifier()
+    extractor = classifier.feature_extractor if classifier is not None else AudioFeatureExtractor()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    client = None
+    if classifier is not None and "api" in args.benchmarks and "MP3" in args.formats:
+        client = start_api_client(tmp_dir.name)
+
+    results: Dict[str, Dict] = {}
+    print(f"{'benchmark':<40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>8} {'x realtime':>11} {'peak MB':>8}")
+    try:
+        for fmt in args.formats:
+            for source_rate in args.sample_rates:
+                for duration in args.durations:
+                    audio_bytes = to_audio_bytes(make_voice_clip(duration, source_rate), source_rate, fmt)
+                    benchmarks = {
+                        name: fn for name, fn in stage_benchmarks(extractor, audio_bytes).items()
+                        if name in args.benchmarks
+                    }
+                    if classifier is not None and "predict" in args.benchmarks:
+                        benchmarks["predict"] = lambda: classifier.predict(audio_bytes)
+                    if classifier is not None and "segments" in args.benchmarks:
+                        benchmarks["segments"] = lambda: classifier.predict_segments(audio_bytes)
+                    if client is not None and fmt == "MP3":
+                        benchmarks["api"] = api_benchmark(client, audio_bytes)
+
+                    for name, fn in benchmarks.items():
+                        key = f"{name}/{fmt}/{source_rate}Hz/{duration:g}s"
+                        result = measure(fn, args.repeat, duration)
+                        results[key] = result
+                        print(
+                            f"{key:<40} {result['p50Ms']:>9.2f} {result['p95Ms']:>9.2f} {result['p99Ms']:>9.2f} "
+                            f"{result['throughputPerSecond']:>8.1f} {result['realtimeFactor']:>11.1f} "
+                            f"{result['peakMemoryMB']:>8.1f}"
+                        )
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+        tmp_dir.cleanup()
+
+    max_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+        print(f"\nPeak RSS of the benchmark process: {max_rss_mb:.0f} MB")
+
+    if json_path is not None:
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, "w") as f:
+            json.dump({
+                "createdAt": datetime.now(timezone.utc).isoformat(),
+                "environment": {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "platform": platform.platform(),
+                    "cpuCount": os.cpu_count(),
+                },
+                "settings": {
+                    "durations": args.durations,
+                    "sampleRates": args.sample_rates,
+                    "formats": args.formats,
+                    "repeat": args.repeat,
+                    "featureConfig": extractor.get_config(),
+                },
+                "peakRssMB": round(max_rss_mb, 1) if max_rss_mb is not None else None,
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to {json_path}")
+
+    if baseline_path is not None:
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
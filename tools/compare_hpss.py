@@ -0,0 +1,143 @@
+"""
+Compare the fast spectrogram-domain harmonic estimator with the exact HPSS path.
+
+Runs the harmonic stage both ways on synthetic clips (clean voice and voice in
+noise, for every --durations and --seeds) and on any --files, sharing one
+decoded signal and STFT per clip. It reports the time of each estimator and the
+relative error of hnr, harmonic_mean and percussive_mean. When a trained model
+is found, it also classifies every clip with the exact features and with the
+harmonic features swapped for the fast ones, and reports how often the verdict
+agrees and how far the AI probability moves.
+
+Usage:
+    python tools/compare_hpss.py --durations 5 30 60
+    python tools/compare_hpss.py --files data/human/*.mp3 data/ai/*.mp3 --durations
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extractor import AudioFeatureExtractor  # noqa: E402
+from synthetic_audio import make_voice_clip, to_audio_bytes  # noqa: E402
+
+HARMONIC_FEATURES = ["hnr", "harmonic_mean", "percussive_mean"]
+
+
+def clips(args, sample_rate: int) -> Iterator[Tuple[str, bytes]]:
+    """(name, audio bytes) of every clip to compare"""
+    for duration in args.durations:
+        for seed in args.seeds:
+            voice = make_voice_clip(duration, sample_rate, seed=seed)
+            noise = np.random.default_rng(seed + 1000).standard_normal(len(voice)).astype(np.float32)
+            noisy = voice + 0.05 * noise
+            yield f"voice/{duration:g}s/seed{seed}", to_audio_bytes(voice, sample_rate)
+            yield f"noisy/{duration:g}s/seed{seed}", to_audio_bytes(noisy / np.max(np.abs(noisy)) * 0.3, sample_rate)
+    for path in args.files:
+        yield Path(path).name, Path(path).read_bytes()
+
+
+def time_harmonic(extractor: AudioFeatureExtractor, y: np.ndarray, sr: int, spec, repeat: int):
+    """Best wall time (seconds) of the harmonic stage and its three features"""
+    timings = []
+    values = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        values = extractor.extract_harmonic_features(y, sr, spec)
+        timings.append(time.perf_counter() - start)
+    return min(timings), np.asarray(values, dtype=np.float64)
+
+
+def load_classifier():
+    """VoiceClassifier without a result cache, or None when no model has been trained"""
+    from ml_engine import VoiceClassifier
+
+    try:
+        return VoiceClassifier(result_cache=None)
+    except FileNotFoundError as e:
+        print(f"Skipping the classification comparison: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="*", default=[5.0, 30.0], help="Synthetic clip lengths in seconds")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="Seeds of the synthetic clips")
+    parser.add_argument("--files", nargs="*", default=[], help="Audio files to compare as well")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per estimator")
+    args = parser.parse_args()
+
+    classifier = load_classifier()
+    config = classifier.feature_extractor.get_config() if classifier is not None else AudioFeatureExtractor().get_config()
+    exact = AudioFeatureExtractor(**{**config, "harmonic_estimator": "hpss"})
+    fast = AudioFeatureExtractor(**{**config, "harmonic_estimator": "fast"})
+
+    # Warm up numba-compiled librosa kernels so they don't skew the first row
+    warmup = to_audio_bytes(make_voice_clip(1.0, exact.sample_rate), exact.sample_rate)
+    exact.extract_all_features(warmup)
+    fast.extract_all_features(warmup)
+
+    errors: Dict[str, List[float]] = {name: [] for name in HARMONIC_FEATURES}
+    exact_total = fast_total = 0.0
+    agreements = []
+    probability_deltas = []
+
+    header = " ".join(f"{name + ' err':>20}" for name in HARMONIC_FEATURES)
+    print(f"{'clip':<28} {'exact ms':>9} {'fast ms':>9} {'speedup':>8} {header}")
+    for name, audio_bytes in clips(args, exact.sample_rate):
+        y, sr = exact.load_audio_from_bytes(audio_bytes)
+        y = exact.gate_audio(y, sr)
+        spec = exact.compute_spectrogram(y)
+        exact_s, exact_values = time_harmonic(exact, y, sr, spec, args.repeat)
+        fast_s, fast_values = time_harmonic(fast, y, sr, spec, args.repeat)
+        exact_total += exact_s
+        fast_total += fast_s
+
+        relative = (fast_values - exact_values) / np.maximum(np.abs(exact_values), 1e-12)
+        for feature, error in zip(HARMONIC_FEATURES, relative):
+            errors[feature].append(float(error))
+        print(
+            f"{name:<28} {exact_s * 1000:>9.1f} {fast_s * 1000:>9.1f} {exact_s / fast_s:>7.1f}x "
+            + " ".join(f"{error:>+20.1%}" for error in relative)
+        )
+
+        if classifier is not None:
+            features = exact.extract_all_features(audio_bytes)
+            exact_row = classifier.features_to_array(features)
+            features.update(zip(HARMONIC_FEATURES, fast_values))
+            fast_row = classifier.features_to_array(features)
+            probabilities = classifier.forest.predict_proba(np.vstack([exact_row, fast_row]))
+            # Column 0 is class 0, AI_GENERATED
+            ai_column = int(np.flatnonzero(classifier.forest.classes_ == 0)[0])
+            agreements.append(probabilities[0].argmax() == probabilities[1].argmax())
+            probability_deltas.append(abs(probabilities[1, ai_column] - probabilities[0, ai_column]))
+
+    if not agreements and not errors["hnr"]:
+        print("No clips to compare")
+        return
+
+    print(f"\nHarmonic stage: {exact_total * 1000:.0f} ms exact, {fast_total * 1000:.0f} ms fast "
+          f"({exact_total / max(fast_total, 1e-9):.1f}x faster)")
+    for feature in HARMONIC_FEATURES:
+        values = np.array(errors[feature])
+        print(
+            f"{feature:<16} relative error: median {np.median(values):+.1%}, "
+            f"mean |err| {np.mean(np.abs(values)):.1%}, max |err| {np.max(np.abs(values)):.1%}"
+        )
+    if agreements:
+        deltas = np.array(probability_deltas)
+        print(
+            f"Classification agreement: {np.mean(agreements):.1%} of {len(agreements)} clips; "
+            f"AI probability change: mean {deltas.mean():.3f}, max {deltas.max():.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Measure the memory cost of feature extraction per request.
+
+Runs the same clips through AudioFeatureExtractor.extract_feature_array in a
+fresh spawned process per mode, with --threads threads sharing the extractor
+the way the API's threadpool does:
+
+    fresh    reuse_buffers=False: every request allocates its arrays
+    buffers  reuse_buffers=True (the default): per-thread work buffers
+
+For each mode it reports the latency, the peak traced memory of one request
+(numpy buffers included), the minor page faults per request, and the peak and
+final RSS of the process. Page faults stand in for allocation counts: every
+fresh multi-megabyte array is mapped and faulted in page by page, while a
+reused buffer is already resident. The main thread runs extractions too, so
+only --threads below WORK_BUFFER_MAX_THREADS all keep buffers; set it higher
+to measure more threads.
+
+Usage:
+    python tools/measure_extraction_memory.py --duration 10 --requests 20 --threads 4
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+MODES = ["fresh", "buffers"]
+
+
+def rss_mb() -> float:
+    """Current RSS of this process (Linux /proc)"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / 1e6
+
+
+def worker(mode, duration, requests, threads, results):
+    from ml_engine.feature_extractor import AudioFeatureExtractor
+    from synthetic_audio import make_voice_clip, to_audio_bytes
+
+    extractor = AudioFeatureExtractor(reuse_buffers=(mode == "buffers"))
+    clips = [
+        to_audio_bytes(make_voice_clip(duration, extractor.sample_rate, seed=seed), extractor.sample_rate)
+        for seed in range(4)
+    ]
+
+    # Warm up every thread, so compiled kernels and (with buffers) full-size buffers exist
+    def run(count):
+        for i in range(count):
+            extractor.extract_feature_array(clips[i % len(clips)])
+
+    pool = [threading.Thread(target=run, args=(2,)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    # The traced request runs on this thread, so warm it as well
+    run(2)
+
+    tracemalloc.start()
+    extractor.extract_feature_array(clips[0])
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    faults_before = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    per_thread = max(1, requests // threads)
+    start = time.perf_counter()
+    pool = [threading.Thread(target=run, args=(per_thread,)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults_before
+
+    results.put({
+        "msPerRequest": elapsed * 1000 / total,
+        "tracedPeakMB": traced_peak / 1e6,
+        "faultsPerRequest": faults / total,
+        # ru_maxrss is in kilobytes on Linux
+        "peakRssMB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rssMB": rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="Clip length in seconds")
+    parser.add_argument("--requests", type=int, default=20, help="Timed requests per mode")
+    parser.add_argument("--threads", type=int, default=4, help="Threads sharing one extractor")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    # A fresh interpreter per mode, so the peak RSS of one does not hide the other's
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':>8} {'ms/req':>8} {'traced MB':>10} {'faults/req':>11} {'peak RSS MB':>12} {'RSS MB':>8}")
+    for mode in args.modes:
+        results = context.Queue()
+        process = context.Process(target=worker, args=(mode, args.duration, args.requests, args.threads, results))
+        process.start()
+        result = results.get()
+        process.join()
+        print(
+            f"{mode:>8} {result['msPerRequest']:>8.1f} {result['tracedPeakMB']:>10.1f} "
+            f"{result['faultsPerRequest']:>11.0f} {result['peakRssMB']:>12.0f} {result['rssMB']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measure the memory each worker process spends on the model.
+
+Starts N processes that load the model the way a gunicorn worker would, touch
+every node with a batch of predictions, and report the growth of their RSS and
+PSS (proportional set size: shared pages are split between the processes
+mapping them) over the interpreter baseline. Modes:
+
+    pickle  joblib.load of voice_classifier.pkl + scaler.pkl (previous behaviour)
+    flat    FlatForest read into process memory
+    mmap    FlatForest memory-mapped read-only (MODEL_MMAP=true, the default)
+
+With --synthetic a production-sized forest (200 trees, depth 20) is trained on
+random data first, as the demo model is too small to show a difference.
+
+Usage:
+    python tools/measure_worker_rss.py --workers 4 --synthetic
+    python tools/measure_worker_rss.py --workers 4 --model-dir ml_engine/model_artifacts
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+MODES = ["pickle", "flat", "mmap"]
+
+
+def memory_kb():
+    """RSS and PSS of this process in kB (Linux /proc)"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1])
+    return values["Rss"], values["Pss"]
+
+
+def worker(mode, model_dir, n_features, barrier, results):
+    import joblib
+    from ml_engine.flat_forest import FlatForest
+
+    X = np.random.default_rng(0).normal(size=(512, n_features))
+    rss_before, pss_before = memory_kb()
+
+    if mode == "pickle":
+        classifier = joblib.load(model_dir / "voice_classifier.pkl")
+        scaler = joblib.load(model_dir / "scaler.pkl")
+        classifier.set_params(n_jobs=1)
+        classifier.predict_proba(scaler.transform(X))
+    else:
+        forest = FlatForest.load(model_dir / "voice_classifier.npz", mmap=(mode == "mmap"))
+        forest.predict_proba(X)
+        # Fault in every page, as a long-running worker eventually does
+        for array in (forest.feature, forest.threshold, forest.left, forest.right, forest.value):
+            array.sum()
+
+    # Measure while every worker holds its model, so shared pages are split N ways
+    barrier.wait()
+    rss_after, pss_after = memory_kb()
+    results.put((rss_after - rss_before, pss_after - pss_before))
+    barrier.wait()
+
+
+def build_synthetic_model(model_dir, n_samples, n_features):
+    """Train a forest with the production hyperparameters on random data"""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from ml_engine.flat_forest import FlatForest
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(n_samples, n_features))
+    y = (X[:, 0] + rng.normal(scale=2.0, size=n_samples) > 0).astype(int)
+
+    scaler = StandardScaler()
+    classifier = RandomForestClassifier(
+        n_estimators=200, max_depth=20, min_samples_split=5, min_samples_leaf=2, random_state=42, n_jobs=-1
+    )
+    classifier.fit(scaler.fit_transform(X), y)
+
+    joblib.dump(classifier, model_dir / "voice_classifier.pkl")
+    joblib.dump(scaler, model_dir / "scaler.pkl")
+    FlatForest.from_sklearn(classifier, scaler).save(model_dir / "voice_classifier.npz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model-dir", type=Path, default=Path("ml_engine/model_artifacts"))
+    parser.add_argument("--synthetic", action="store_true", help="Train a production-sized forest on random data")
+    parser.add_argument("--samples", type=int, default=20000, help="Training rows for --synthetic")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    n_features = 40
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        if args.synthetic:
+            model_dir = Path(tmp)
+            print(f"Training a synthetic forest on {args.samples} rows...")
+            build_synthetic_model(model_dir, args.samples, n_features)
+
+        for name in ("voice_classifier.pkl", "voice_classifier.npz"):
+            print(f"{name}: {(model_dir / name).stat().st_size / 1e6:.1f} MB")
+
+        # Spawned workers start clean, like separately forked gunicorn workers without --preload
+        context = multiprocessing.get_context("spawn")
+        print(f"\n{'mode':>7} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {f'PSS x{args.workers} MB':>13}")
+        for mode in args.modes:
+            barrier = context.Barrier(args.workers)
+            results = context.Queue()
+            processes = [
+                context.Process(target=worker, args=(mode, model_dir, n_features, barrier, results))
+                for _ in range(args.workers)
+            ]
+            for process in processes:
+                process.start()
+            samples = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            rss = np.mean([s[0] for s in samples]) / 1024
+            pss = np.mean([s[1] for s in samples]) / 1024
+            print(f"{mode:>7} {rss:>14.1f} {pss:>14.1f} {pss * args.workers:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()